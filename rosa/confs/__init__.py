@@ -1,2 +1,29 @@
-from .config import LOGGING_LEVEL, XCONFIG, MAX_ALLOWED_PACKET, BLACKLIST, TZ, RED, GREEN, YELLOW, RESET
-from .sql_queries import INIT2, SINIT, _TRUNCATE, _DROP, CVERSION, VERSIONS, TABLE_CHECK, ASSESS2
\ No newline at end of file
+from . import defaults
+
+try:
+	from . import config
+except ImportError:
+	config = defaults # no config.py; the environment & defaults apply
+
+# a config.py written before a setting existed gets the setting's default
+LOGGING_LEVEL = getattr(config, "LOGGING_LEVEL", defaults.LOGGING_LEVEL)
+XCONFIG = getattr(config, "XCONFIG", defaults.XCONFIG)
+MAX_ALLOWED_PACKET = getattr(config, "MAX_ALLOWED_PACKET", defaults.MAX_ALLOWED_PACKET)
+SCAN_WORKERS = getattr(config, "SCAN_WORKERS", defaults.SCAN_WORKERS)
+HASH_WORKERS = getattr(config, "HASH_WORKERS", defaults.HASH_WORKERS)
+UPLOAD_BUFFER = getattr(config, "UPLOAD_BUFFER", defaults.UPLOAD_BUFFER) or 4 * MAX_ALLOWED_PACKET
+UPLOAD_CONNECTIONS = getattr(config, "UPLOAD_CONNECTIONS", defaults.UPLOAD_CONNECTIONS)
+BULK_LOAD = getattr(config, "BULK_LOAD", defaults.BULK_LOAD)
+COMPRESSION = getattr(config, "COMPRESSION", defaults.COMPRESSION)
+COMPRESS_MIN = getattr(config, "COMPRESS_MIN", defaults.COMPRESS_MIN)
+COMPRESS_PROTOCOL = getattr(config, "COMPRESS_PROTOCOL", defaults.COMPRESS_PROTOCOL)
+CDC_MIN = getattr(config, "CDC_MIN", defaults.CDC_MIN)
+HASH_ALGO = getattr(config, "HASH_ALGO", defaults.HASH_ALGO)
+BLACKLIST = getattr(config, "BLACKLIST", defaults.BLACKLIST)
+TZ = getattr(config, "TZ", defaults.TZ)
+RED = getattr(config, "RED", defaults.RED)
+GREEN = getattr(config, "GREEN", defaults.GREEN)
+YELLOW = getattr(config, "YELLOW", defaults.YELLOW)
+RESET = getattr(config, "RESET", defaults.RESET)
+
+from .sql_queries import INIT2, SINIT, _TRUNCATE, _DROP, CVERSION, VERSIONS, TABLE_CHECK, ASSESS2
@@ -9,10 +9,30 @@ XCONFIG = {
     'addr': os.getenv('DB_ADDR', 'local_host')
 } # EX for host machine
 
-BLACKLIST = os.getenv('BLACKLIST', '.index,.git,.obsidian,.vscode,.DS_Store,.pyc,.db').split(',')
+BLACKLIST = os.getenv('BLACKLIST', '.index,.git,.obsidian,.vscode,.DS_Store,*.pyc,*.db').split(',') # gitignore-style globs; a bare '.ext' is also read as '*.ext' (with a warning)
 
 MAX_ALLOWED_PACKET = int(os.getenv('MAX_ALLOWED_PACKET', 16_000_000)) # 16 mb
 
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', 4)) # threads walking top-level subtrees; 1 walks in a single thread
+
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', os.cpu_count() or 1)) # threads reading & hashing files; 1 hashes in a single thread
+
+UPLOAD_BUFFER = int(os.getenv('UPLOAD_BUFFER', 4 * MAX_ALLOWED_PACKET)) # bytes read ahead of the upload; bounds memory while disk & network overlap
+
+UPLOAD_CONNECTIONS = int(os.getenv('UPLOAD_CONNECTIONS', 1)) # connections staging new & altered content in parallel; 1 uploads over the main connection
+
+BULK_LOAD = os.getenv('BULK_LOAD', 'false').lower() == 'true' # 'rosa init' loads files & directories with LOAD DATA LOCAL INFILE (the server needs local_infile on)
+
+COMPRESSION = os.getenv('COMPRESSION', 'zstd') # zstd, zlib or raw; per row, for content & patches (zstd falls back to zlib if unavailable)
+
+COMPRESS_MIN = int(os.getenv('COMPRESS_MIN', 512)) # bytes; smaller content is stored raw
+
+COMPRESS_PROTOCOL = os.getenv('COMPRESS_PROTOCOL', 'false').lower() == 'true' # compress the MySQL connection itself
+
+CDC_MIN = int(os.getenv('CDC_MIN', 0)) # bytes; files at least this big are stored as content-defined chunks; 0 picks 2 mb with NumPy, else only files too big for one packet
+
+HASH_ALGO = os.getenv('HASH_ALGO', 'xxh3_128') # xxh64, xxh3_64 or xxh3_128; for new repositories & 'rosa rehash'
+
 LOGGING_LEVEL = os.getenv('LOGGING_LEVEL', 'info')
 
 TZ = os.getenv('TZ', 'America/New York')
@@ -0,0 +1,48 @@
+"""Defaults for every setting, read from the environment.
+
+config.py (copied from config_example.py) overrides any of these;
+settings added after a config.py was written fall back to here,
+so older configs keep working.
+"""
+
+import os
+
+XCONFIG = {
+    'user': os.getenv('DB_USER', 'root'),
+    'pswd': os.getenv('DB_PASS', 'password'),
+    'name': os.getenv('DB_NAME', 'database_name'),
+    'addr': os.getenv('DB_ADDR', 'local_host')
+}
+
+BLACKLIST = os.getenv('BLACKLIST', '.index,.git,.obsidian,.vscode,.DS_Store,*.pyc,*.db').split(',')
+
+MAX_ALLOWED_PACKET = int(os.getenv('MAX_ALLOWED_PACKET', 16_000_000))
+
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', 4))
+
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', os.cpu_count() or 1))
+
+UPLOAD_BUFFER = int(os.getenv('UPLOAD_BUFFER', 0)) # 0 is 4x whichever MAX_ALLOWED_PACKET is in force
+
+UPLOAD_CONNECTIONS = int(os.getenv('UPLOAD_CONNECTIONS', 1))
+
+BULK_LOAD = os.getenv('BULK_LOAD', 'false').lower() == 'true'
+
+COMPRESSION = os.getenv('COMPRESSION', 'zstd')
+
+COMPRESS_MIN = int(os.getenv('COMPRESS_MIN', 512))
+
+COMPRESS_PROTOCOL = os.getenv('COMPRESS_PROTOCOL', 'false').lower() == 'true'
+
+CDC_MIN = int(os.getenv('CDC_MIN', 0))
+
+HASH_ALGO = os.getenv('HASH_ALGO', 'xxh3_128')
+
+LOGGING_LEVEL = os.getenv('LOGGING_LEVEL', 'info')
+
+TZ = os.getenv('TZ', 'America/New York')
+
+RED = "\x1b[31;1m"
+GREEN = "\x1b[32m"
+YELLOW = "\x1b[33m"
+RESET = "\x1b[0m"
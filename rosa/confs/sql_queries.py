@@ -17,12 +17,14 @@ CREATE TABLE IF NOT EXISTS files (
      id INT AUTO_INCREMENT NOT NULL,
      rp VARCHAR(512) NOT NULL UNIQUE,
      content LONGBLOB NOT NULL,
-     hash BINARY(8) NOT NULL,
+     addressed BOOLEAN NOT NULL DEFAULT 0,
+     hash VARBINARY(16) NOT NULL,
      original_version INTEGER NOT NULL,
      from_version INTEGER NOT NULL,
      track ENUM ('T', 'F') NOT NULL,
 PRIMARY KEY (id),
-INDEX rps (rp)
+INDEX rps (rp),
+INDEX fhs (hash)
 );
 
 CREATE TABLE IF NOT EXISTS directories (
@@ -37,23 +39,30 @@ CREATE TABLE IF NOT EXISTS deltas (
      d_id INT AUTO_INCREMENT NOT NULL,
      rp VARCHAR(512) NOT NULL,
      patch LONGBLOB NOT NULL,
+     codec ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw',
+     addressed BOOLEAN NOT NULL DEFAULT 0,
+     hash VARBINARY(16) NULL,
      original_version INTEGER NOT NULL,
      from_version INTEGER NOT NULL,
      to_version INTEGER NOT NULL,
 PRIMARY KEY (d_id),
-INDEX mrps (rp)
+INDEX mrps (rp),
+INDEX mhs (hash)
 );
 
 CREATE TABLE IF NOT EXISTS deleted (
      idd INT AUTO_INCREMENT NOT NULL,
      rp VARCHAR(512) NOT NULL,
      content LONGBLOB NOT NULL,
+     addressed BOOLEAN NOT NULL DEFAULT 0,
+     hash VARBINARY(16) NULL,
      original_version INTEGER NOT NULL,
      from_version INTEGER NOT NULL,
      to_version INTEGER NOT NULL,
      track ENUM ('T', 'F') NOT NULL,
 PRIMARY KEY (idd),
-INDEX drps (rp)
+INDEX drps (rp),
+INDEX dhs (hash)
 );
 
 CREATE TABLE IF NOT EXISTS depr_directories (
@@ -64,6 +73,76 @@ CREATE TABLE IF NOT EXISTS depr_directories (
 PRIMARY KEY (ddid),
 INDEX ddps (rp)
 );
+
+CREATE TABLE IF NOT EXISTS settings (
+     name VARCHAR(64) NOT NULL,
+     value VARCHAR(256) NOT NULL,
+PRIMARY KEY (name)
+);
+
+CREATE TABLE IF NOT EXISTS moves (
+     mid INT AUTO_INCREMENT NOT NULL,
+     rp VARCHAR(512) NOT NULL,
+     from_rp VARCHAR(512) NOT NULL,
+     version INTEGER NOT NULL,
+PRIMARY KEY (mid),
+INDEX mvps (version)
+);
+
+CREATE TABLE IF NOT EXISTS blobs (
+     bid INT AUTO_INCREMENT NOT NULL,
+     digest VARBINARY(16) NOT NULL UNIQUE,
+     refs INTEGER NOT NULL,
+     size BIGINT NOT NULL,
+     chunked BOOLEAN NOT NULL DEFAULT 0,
+     codec ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw',
+     content LONGBLOB NOT NULL,
+PRIMARY KEY (bid),
+INDEX brefs (refs)
+);
+
+CREATE TABLE IF NOT EXISTS stage_blobs (
+     version INTEGER NOT NULL,
+     digest VARBINARY(16) NOT NULL,
+     size BIGINT NOT NULL,
+     chunked BOOLEAN NOT NULL DEFAULT 0,
+     codec ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw',
+     content LONGBLOB NOT NULL,
+PRIMARY KEY (version, digest)
+);
+
+CREATE TABLE IF NOT EXISTS stage_chunks (
+     version INTEGER NOT NULL,
+     chash VARBINARY(16) NOT NULL,
+     size INTEGER NOT NULL,
+     codec ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw',
+     data LONGBLOB NOT NULL,
+PRIMARY KEY (version, chash)
+);
+
+CREATE TABLE IF NOT EXISTS stage_manifests (
+     version INTEGER NOT NULL,
+     digest VARBINARY(16) NOT NULL,
+     seq INTEGER NOT NULL,
+     chash VARBINARY(16) NOT NULL,
+PRIMARY KEY (version, digest, seq)
+);
+
+CREATE TABLE IF NOT EXISTS chunks (
+     chash VARBINARY(16) NOT NULL,
+     size INTEGER NOT NULL,
+     codec ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw',
+     data LONGBLOB NOT NULL,
+PRIMARY KEY (chash)
+);
+
+CREATE TABLE IF NOT EXISTS manifests (
+     digest VARBINARY(16) NOT NULL,
+     seq INTEGER NOT NULL,
+     chash VARBINARY(16) NOT NULL,
+PRIMARY KEY (digest, seq),
+INDEX mchs (chash)
+);
 """)
 
 """
@@ -81,9 +160,13 @@ CREATE TABLE IF NOT EXISTS records (
      rp TEXT NOT NULL,
      original_version INTEGER NOT NULL,
      from_version INTEGER NOT NULL,
-     ctime INTEGER NOT NULL,
-     bytes INTEGER NOT NULL,
-     track CHAR NOT NULL
+     mtime_ns INTEGER NOT NULL,
+     ctime_ns INTEGER NOT NULL,
+     size INTEGER NOT NULL,
+     ino INTEGER NOT NULL,
+     dev INTEGER NOT NULL,
+     track CHAR NOT NULL,
+     hash BLOB
 );
 
 CREATE TABLE IF NOT EXISTS interior (
@@ -99,6 +182,41 @@ CREATE TABLE IF NOT EXISTS directories (
      version INT NOT NULL
 );
 
+CREATE TABLE IF NOT EXISTS settings (
+     name TEXT PRIMARY KEY,
+     value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dirstate (
+     rp TEXT PRIMARY KEY,
+     mtime INTEGER NOT NULL,
+     entries TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS journal (
+     id INTEGER PRIMARY KEY,
+     rp TEXT NOT NULL,
+     event CHAR NOT NULL,
+     is_dir INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watcher (
+     id INTEGER PRIMARY KEY,
+     pid INTEGER NOT NULL,
+     valid INTEGER NOT NULL,
+     started INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+     version INTEGER NOT NULL,
+     rp TEXT NOT NULL,
+     hash BLOB NOT NULL,
+     track CHAR NOT NULL,
+     size INTEGER NOT NULL,
+     mtime_ns INTEGER NOT NULL,
+PRIMARY KEY (version, rp)
+);
+
 CREATE INDEX IF NOT EXISTS rps ON records(rp);
 
 CREATE INDEX IF NOT EXISTS drps ON directories (rp);
@@ -153,6 +271,14 @@ _DROP = os.getenv("""_DROP""","""
      DROP TABLE deleted;
      DROP TABLE directories;
      DROP TABLE depr_directories;
+     DROP TABLE IF EXISTS moves;
+     DROP TABLE IF EXISTS settings;
+     DROP TABLE IF EXISTS stage_manifests;
+     DROP TABLE IF EXISTS stage_chunks;
+     DROP TABLE IF EXISTS stage_blobs;
+     DROP TABLE IF EXISTS blobs;
+     DROP TABLE IF EXISTS manifests;
+     DROP TABLE IF EXISTS chunks;
 """)
 
 TRUNCATE = os.getenv("""TRUNCATE""","""
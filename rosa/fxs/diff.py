@@ -7,7 +7,7 @@ from rosa.confs import RED, RESET
 from rosa.lib import (
 	phones, finale, mini_ps, query_index,
 	phones, query_dindex, version_check, 
-	landline, Heart
+	landline, Heart, pair_moves
 )
 
 NOMIC: str = "[diff]"
@@ -63,23 +63,27 @@ def main(args: argparse = None):
 
 	local = Heart(redirect)
 
-	with phones() as conn:
-		with landline(local.index) as sconn:
-			new: list, deleted: list, diffs: list, remaining: list, xdiff: bool = query_index(conn, sconn, local.target)
-			newd: list, deletedd: list, ledeux: list = query_dindex(sconn, local.target)
+	with landline(local.index) as sconn:
+		parked: dict = {} # this scan's directories, from query_index to query_dindex
+		new: list, deleted: list, diffs: list, remaining: list, xdiff: bool = query_index(sconn, local.target, keep=False, parked=parked)
+		newd: list, deletedd: list, ledeux: list = query_dindex(sconn, local.target, parked)
 
-			if r:
+		if xdiff is True:
+			moves: list, new: list, deleted: list = pair_moves(sconn, local.target, new, deleted)
+
+		if r:
+			with phones() as conn:
 				vok: bool, vers: int = version_check(conn, sconn)
 
-				if vok is True:
-					logger.info('versions: twinned')
-				elif vok is False:
-					logger.info(f"versions: {RED}twisted{RESET}")
+			if vok is True:
+				logger.info('versions: twinned')
+			elif vok is False:
+				logger.info(f"versions: {RED}twisted{RESET}")
 
 	try:
 		if xdiff is True:
-			if any((new, deleted, diffs)):
-				logger.info(f"found {len(new)} new files, {len(deleted)} deleted files, and {len(diffs)} altered files.")
+			if any((new, deleted, diffs, moves)):
+				logger.info(f"found {len(new)} new files, {len(deleted)} deleted files, {len(diffs)} altered files, and {len(moves)} moved files.")
 			
 			if any((newd, deletedd)):
 				logger.info(f"found {len(newd)} new directories & {len(deletedd)} deleted directories.")
@@ -107,6 +111,13 @@ def main(args: argparse = None):
 					"message": "file[s] with hash discrepancies"
 				}
 			)
+			diff_data.append(
+				{ # PILGRIMS
+					"type": "moved files", 
+					"details": [f"{previous} -> {current}" for previous, current in moves],
+					"message": "file[s] moved or renamed"
+				}
+			)
 
 			diff_data.append(
 				{ # CAVES
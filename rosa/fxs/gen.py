@@ -5,16 +5,12 @@ import sys
 import xxhash
 import random
 
-from rosa.confs import BLACKLIST
-from rosa.lib import mini_ps, _r
+from rosa.lib import mini_ps, _r, walk, rules, hash_files
 
 logger = logging.getLogger('rosa.log')
 
 NOMIC: str = "[gen]"
 
-def is_ignored(_str):
-	return any(blckd in _str for blckd in BLACKLIST)
-
 def contrast(dir1: str = "", dir2: str = ""):
 	"""Compares contents and respective hashes for two directories.
 
@@ -56,31 +52,21 @@ def inv(dirn: str = ""):
 	
 	Returns:
 		a (dict): Relative paths keyed to their hashes.
-		ign (int): Count of ignored files.
+		ign (int): Count of ignored files & (pruned) directories.
 	"""
-	hasher = xxhash.xxh64()
-	ign: int = 0
+	pruned: list = []
 	a: dict = {}
 
 	pfx: int = len(dirn) + 1
 
-	for file in _r(dirn):
-		if is_ignored(file):
-			ign += 1
-			continue
-		hasher.reset()
-
-		with open(file, 'rb') as f:
-			content: bytes = f.read()
+	fps: list = [entry.path for entry in walk(dirn, rules(dirn), pruned) if not entry.is_dir()]
 
-		hasher.update(content)
-		hashx: bytes = hasher.digest()
-
-		path: str = file[pfx:]
+	for fp, hashx in zip(fps, hash_files(fps)):
+		path: str = fp[pfx:]
 
 		a[path] = hashx
 	
-	return a, ign
+	return a, len(pruned)
 
 def compare_contrast():
 	"""Compares and contrasts two directories.
@@ -212,8 +198,10 @@ def rm():
 	tchd: int = 0
 
 	if os.path.exists(abs_path):
-		for item in _r(abs_path):
-			if not is_ignored(item):
+		for entry in walk(abs_path, rules(abs_path)):
+			item: str = entry.path
+
+			if not entry.is_dir():
 				item_no += 1
 				if random.random() < 0.05:
 					ext: str = os.path.splitext(item)[1]
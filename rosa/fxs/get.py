@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Rolls local directory back to state of latest commitment.
 
-Does not query or connect to the server EXCEPT to verify the hashes.
+Does not query or connect to the server (except to fetch hashes an older index doesn't have yet).
 """
 
 import os
@@ -12,7 +12,7 @@ import subprocess
 import sqlite3
 
 from rosa.lib import (
-	phones, fat_boy, mk_rrdir, 
+	fat_boy, mk_rrdir, 
 	save_people, mini_ps, finale,
 	query_index, _config, refresh_index,
 	scrape_dindex, landline, Heart
@@ -65,10 +65,10 @@ def main(args: argparse = None):
 
 	local = Heart()
 
-	with phones() as conn:
-		with landline(local.index) as sconn:
-			new: list, deleted: list, diffs: list, remaining: list, xdiff: bool = query_index(conn, sconn, local.target)
-			newd: list, deletedd: list, ledeux: list = query_dindex(sconn, local.target)
+	with landline(local.index) as sconn:
+		parked: dict = {} # this scan's directories, from query_index to query_dindex
+		new: list, deleted: list, diffs: list, remaining: list, xdiff: bool = query_index(sconn, local.target, parked=parked)
+		newd: list, deletedd: list, ledeux: list = query_dindex(sconn, local.target, parked)
 
 	if xdiff is True:
 		logger.info(f"found {len(new)} new files, {len(deleted)} deleted files, and {len(diffs)} altered files.")
@@ -14,7 +14,7 @@ import logging
 from rosa.lib import (
     phones, calc_batch, 
     sfat_boy, mk_rrdir, 
-    mini_ps, finale
+    mini_ps, finale, spill, unsqueeze
 )
 
 NOMIC: str = "[get][current]"
@@ -37,7 +37,8 @@ def main(args: argparse = None):
             mk_rrdir(c_dirs, tmpd)
 
             batch_size, row_size = calc_batch(conn)
-            cquery: str = "SELECT rp, content FROM files;"
+            cquery: str = "SELECT f.rp, IF(f.addressed, b.content, f.content), IF(f.addressed, b.codec, 'raw'), b.chunked, f.hash FROM files f LEFT JOIN blobs b ON f.addressed AND b.digest = f.hash;"
+            chunked: list = []
 
             with conn.cursor(buffered=False) as cursor:
                 cursor.execute(cquery)
@@ -48,11 +49,18 @@ def main(args: argparse = None):
                     if not fdata:
                         break
 
-                    for rp, content in fdata:
+                    for rp, content, codec, is_chunked, digest in fdata:
                         fp: str = os.path.join(tmpd, rp)
 
+                        if is_chunked:
+                            chunked.append((digest, fp)) # the connection's busy streaming files
+                            continue
+
                         with open(fp, 'wb') as f:
-                            f.write(content)
+                            f.write(unsqueeze(codec, content))
+
+            for digest, fp in chunked:
+                spill(conn, digest, fp)
 
     finale(NOMIC, start, prints)
 
@@ -16,11 +16,42 @@ import diff_match_patch as dmp_
 from rosa.confs import VERSIONS
 from rosa.lib import (
     phones, mk_rrdir, calc_batch, 
-    mini_ps, finale, sfat_boy, Heart
+    mini_ps, finale, sfat_boy, Heart,
+    spill, assemble, unsqueeze
 )
 
 NOMIC: str = "[get][version]"
 
+def origins(moves: list = []):
+    """Builds a lookup for where a path lived in an older version.
+
+    Args:
+        moves (list): Tupled (rp, from_rp, version) made after the requested version, newest first.
+
+    Returns:
+        origin_of (function): Maps a current relative path to the requested version's.
+    """
+    into: dict = {}
+
+    for current, previous, version in moves:
+        into.setdefault(current, []).append((version, previous)) # stays newest first
+
+    def origin_of(rp: str = "", until: int = None):
+        """Follows rp back through its moves.
+
+        Only moves made before until count (a deleted row's to_version);
+        anything moved to its path after that was another file.
+        """
+        while True:
+            for version, previous in into.get(rp, ()):
+                if until is None or version < until:
+                    rp, until = previous, version
+                    break
+            else:
+                return rp
+
+    return origin_of
+
 def main(args: argparse = None):
     """Fetches all versions and downloads the user's choice."""
     xdiff: bool = False
@@ -98,14 +129,25 @@ def main(args: argparse = None):
                     logger.info('writing directory tree...')
                     mk_rrdir(drps, dirx)
 
+                    VMOVES: str = """
+                    SELECT rp, from_rp, version
+                    FROM moves
+                    WHERE version > %s
+                    ORDER BY version DESC, mid DESC;
+                    """
+                    cursor.execute(VMOVES, (version,))
+                    origin_of = origins(cursor.fetchall())
+
                     logger.info('writing un-altered files...')
                     VFILES: str = """
-                    SELECT rp, content 
-                    FROM files 
-                    WHERE from_version <= %s;
+                    SELECT f.rp, IF(f.addressed, b.content, f.content), IF(f.addressed, b.codec, 'raw'), b.chunked, f.hash 
+                    FROM files f
+                    LEFT JOIN blobs b ON f.addressed AND b.digest = f.hash
+                    WHERE f.from_version <= %s;
                     """
                     cursor.execute(VFILES, (version,))
                     vcount: int = 0
+                    chunked: list = []
 
                     while True:
                         fdata: list = cursor.fetchmany(batch_size)
@@ -113,18 +155,31 @@ def main(args: argparse = None):
                         if not fdata:
                             break
 
-                        for rp, content in fdata:
+                        for rp, content, codec, is_chunked, digest in fdata:
                             vcount: int += 1
-                            fp: str = os.path.join(dirx, rp)
+                            fp: str = os.path.join(dirx, origin_of(rp))
+
+                            if is_chunked:
+                                chunked.append((digest, fp)) # written once this result is drained
+                                continue
 
                             with open(fp, 'wb') as f:
-                                f.write(content)
+                                f.write(unsqueeze(codec, content))
+
+                    for digest, fp in chunked:
+                        spill(conn, digest, fp)
                     
                     logger.info(f"wrote {vcount} un-altered files")
 
                     logger.info('downloading and writing altered files...')
                     JCVM_FILES: str = """
-                    SELECT DISTINCT d.rp, COALESCE(del.track, f.track) AS track
+                    SELECT DISTINCT d.rp, COALESCE(del.track, f.track) AS track, (
+                        SELECT MIN(x.to_version)
+                        FROM deleted x
+                        WHERE x.rp = d.rp
+                        AND x.original_version <= %(vs)s
+                        AND x.to_version > %(vs)s
+                    ) AS until
                     FROM deltas d
                     LEFT JOIN files f ON d.rp = f.rp
                     LEFT JOIN deleted del ON d.rp = del.rp
@@ -140,32 +195,39 @@ def main(args: argparse = None):
                     vv_count: int = 0
                     vc_count: int = 0
 
-                    for rp, track in rpsto_patch:
+                    for rp, track, until in rpsto_patch:
                         mcount: int += 1
-                        fp: str = os.path.join(dirx, rp)
+                        fp: str = os.path.join(dirx, origin_of(rp, until))
 
                         if track == "T":
                             vv_count: int += 1
                             VMDC_FILES: str = """
-                            SELECT content 
-                            FROM files
-                                WHERE rp = %s
-                                AND original_version <= %s
+                            SELECT IF(f.addressed, b.content, f.content), IF(f.addressed, b.codec, 'raw'), b.chunked, f.hash 
+                            FROM files f
+                            LEFT JOIN blobs b ON f.addressed AND b.digest = f.hash
+                                WHERE f.rp = %s
+                                AND f.original_version <= %s
                             UNION ALL
-                            SELECT content 
-                            FROM deleted 
-                                WHERE rp = %s
-                                AND original_version <= %s
-                                AND to_version > %s;
+                            SELECT IF(d.addressed, b.content, d.content), IF(d.addressed, b.codec, 'raw'), b.chunked, d.hash 
+                            FROM deleted d
+                            LEFT JOIN blobs b ON d.addressed AND b.digest = d.hash
+                                WHERE d.rp = %s
+                                AND d.original_version <= %s
+                                AND d.to_version > %s;
                             """
 
                             cursor.execute(VMDC_FILES, (rp, version, rp, version, version))
-                            content: bytes = cursor.fetchone()[0]
+                            content, codec, is_chunked, digest = cursor.fetchall()[0]
+
+                            if is_chunked:
+                                content: bytes = assemble(conn, digest)
+                            else:
+                                content: bytes = unsqueeze(codec, content)
 
                             content: str = content.decode('utf-8')
 
                             VMP_FILES: str = """
-                            SELECT patch 
+                            SELECT patch, codec 
                             FROM deltas 
                             WHERE rp = %s
                             AND %s < to_version 
@@ -183,7 +245,7 @@ def main(args: argparse = None):
 
                                     break
 
-                                ptxt: bytes = cpatch[0][0]
+                                ptxt: bytes = unsqueeze(cpatch[0][1], cpatch[0][0])
                                 patch: str = ptxt.decode("utf-8")
                                 
                                 patch = dmp.patch_fromText(patch)
@@ -204,32 +266,39 @@ def main(args: argparse = None):
                         elif track == "F":
                             vc_count: int += 1
                             VC_CONTENT: str = """
-                            SELECT patch
-                            FROM deltas
-                            WHERE rp = %s
-                            AND from_version <= %s
-                            AND original_version <= %s
-                            AND %s < to_version
-                            ORDER BY from_version DESC
+                            SELECT IF(d.addressed, b.content, d.patch), IF(d.addressed, b.codec, d.codec), b.chunked, d.hash
+                            FROM deltas d
+                            LEFT JOIN blobs b ON d.addressed AND b.digest = d.hash
+                            WHERE d.rp = %s
+                            AND d.from_version <= %s
+                            AND d.original_version <= %s
+                            AND %s < d.to_version
+                            ORDER BY d.from_version DESC
                             LIMIT 1;
                             """
                             cursor.execute(VC_CONTENT, (rp, version, version, version))
-                            content: bytes = cursor.fetchone()[0]
+                            content, codec, is_chunked, digest = cursor.fetchall()[0]
+
+                            if is_chunked:
+                                spill(conn, digest, fp)
+                                continue
 
                             with open(fp, 'wb') as f:
-                                f.write(content)
+                                f.write(unsqueeze(codec, content))
                     
                     logger.info(f"wrote {mcount} altered files ({vc_count} not tracked and {vv_count} tracked)")
 
                     logger.info('downloading & writing deleted files...')
                     VD_FILES: str = """
-                    SELECT content, rp 
-                    FROM deleted 
-                    WHERE original_version <= %(vs)s
-                    AND to_version > %(vs)s;
+                    SELECT IF(d.addressed, b.content, d.content), IF(d.addressed, b.codec, 'raw'), d.rp, b.chunked, d.hash, d.to_version 
+                    FROM deleted d
+                    LEFT JOIN blobs b ON d.addressed AND b.digest = d.hash
+                    WHERE d.original_version <= %(vs)s
+                    AND d.to_version > %(vs)s;
                     """
                     cursor.execute(VD_FILES, vers_)
                     vdcount: int = 0
+                    chunked: list = []
 
                     while True:
                         fdata: list = cursor.fetchmany(batch_size)
@@ -237,15 +306,22 @@ def main(args: argparse = None):
                         if not fdata:
                             break
 
-                        for content, rp in fdata:
+                        for content, codec, rp, is_chunked, digest, to_version in fdata:
                             vdcount: int += 1
-                            fp: str = os.path.join(dirx, rp)
+                            fp: str = os.path.join(dirx, origin_of(rp, to_version))
 
                             # if os.path.isfile(fp):
                             #     continue
 
+                            if is_chunked:
+                                chunked.append((digest, fp))
+                                continue
+
                             with open(fp, 'wb') as f:
-                                f.write(content)
+                                f.write(unsqueeze(codec, content))
+
+                    for digest, fp in chunked:
+                        spill(conn, digest, fp)
                     
                     logger.info(f"wrote {vdcount} deleted files")
 
@@ -8,6 +8,8 @@ Updates the local index.
 
 import os
 import sys
+import sqlite3
+import contextlib
 
 from rosa.confs import RED, RESET
 from rosa.lib import (
@@ -17,7 +19,10 @@ from rosa.lib import (
 	upload_patches, local_audit_, historian, 
 	rm_remdir, local_daudit, upload_dirs,
 	fat_boy_o, refresh_index, xxdeleted, 
-	query_dindex, landline, Heart
+	query_dindex, landline, Heart,
+	pair_moves, move_remfiles, upgrade_remote,
+	remote_algo, local_algo, sweep,
+	stage_files, publish, clear_checkpoints
 )
 
 NOMIC: str = "[give]"
@@ -30,19 +35,30 @@ def main(args: argparse = None):
 
 	local = Heart()
 
-	with phones() as conn:
-		with landline(local.index) as sconn:
-			new: list, deleted: list, diffs: list, remaining: list, xdiff: bool = query_index(conn, sconn, local.target)
-			newd: list, deletedd: list, ledeux: list = query_dindex(sconn, local.target)
+	with landline(local.index) as sconn:
+		parked: dict = {} # this scan's directories, from query_index to query_dindex
+		new: list, deleted: list, diffs: list, remaining: list, xdiff: bool = query_index(sconn, local.target, parked=parked)
+		newd: list, deletedd: list, ledeux: list = query_dindex(sconn, local.target, parked)
+
+		if xdiff is True:
+			moves: list, new: list, deleted: list = pair_moves(sconn, local.target, new, deleted)
 
 	if xdiff is True:
-		logger.info(f"found {len(new)} new files, {len(deleted)} deleted files, and {len(diffs)} altered files.")
+		logger.info(f"found {len(new)} new files, {len(deleted)} deleted files, {len(diffs)} altered files, and {len(moves)} moved files.")
+
+		done: bool = False # phones rolls back & swallows an interrupt; only a finished upload may touch the checkpoints
 
 		try:
 			with phones() as conn:
-				with landline(local.index) as sconn:
+				# not landline: it swallows an interrupt too, & phones would then commit whatever was half sent
+				with contextlib.closing(sqlite3.connect(local.index)) as sconn, sconn:
+					upgrade_remote(conn)
 					vok: bool, version: int = version_check(conn, sconn)
 
+					if vok is True and remote_algo(conn) != local_algo(sconn):
+						logger.critical(f"{RED}the server & the index hash differently; run 'rosa rehash' first{RESET}")
+						return
+
 					if vok is True:
 						cv: int = version + 1
 
@@ -51,13 +67,25 @@ def main(args: argparse = None):
 						else:
 							message: str = input("attach a message to this version [Return for None]: ") or None
 
+						if new or diffs:
+							# committed a batch at a time & checkpointed, so an interruption resumes here
+							logger.info('uploading new & altered files\' content...')
+							staged: dict = stage_files(conn, sconn, new + diffs, local.target, cv)
+
 						logger.info('updating records...')
 						remote_records(conn, cv, message)
 						historian(sconn, cv, message)
 
+						if moves:
+							logger.info('moving moved files...')
+							move_remfiles(conn, moves, cv)
+
+						if new or diffs:
+							publish(conn, cv, staged, local.target) # the staged content goes live with this transaction
+
 						if new:
 							logger.info('uploading new files...')
-							collector(conn, new, local.target, cv, key="new_files")
+							collector(conn, new, cv, key="new_files", staged=staged)
 
 						if diffs:
 							logger.debug('getting altered files\' previous versions...')
@@ -70,7 +98,7 @@ def main(args: argparse = None):
 									details[diff] = (data[0], data[1], data[2])
 
 							logger.info('uploading altered files...')
-							collector(conn, diffs, local.target, cv, key="altered_files") # updates altered
+							collector(conn, diffs, cv, key="altered_files", staged=staged) # updates altered
 
 							logger.info('generating altered files\' patches...')
 							patches: list = diff_gen(diffs, details, local.originals, local.target) # computes & returns patches
@@ -79,8 +107,8 @@ def main(args: argparse = None):
 							upload_patches(conn, patches, cv, details) # uploads the patches to deltas
 
 						if deleted:
-							logger.info('removing deleted files...')
-							dodata: tuple = rm_remfile(conn, sconn, deleted)
+							logger.info('archiving deleted files...')
+							rm_remfile(conn, deleted, cv)
 
 						if deletedd or newd:
 							logger.info('updating remote directories...')
@@ -89,21 +117,29 @@ def main(args: argparse = None):
 
 						logger.info('updating local index...')
 						with fat_boy_o(local.originals) as secure:
-							local_audit_(sconn, local.target, new, diffs, remaining, cv, secure)
+							local_audit_(sconn, local.target, new, diffs, remaining, cv, secure, moves)
 							local_daudit(sconn, newd, deletedd, cv)
 
 							if deleted:
-								logger.info('backing up deleted files...')
-								xxdeleted(conn, sconn, deleted, cv, secure, dodata)
+								xxdeleted(sconn, deleted)
+
+						sweep(conn) # every reference is in; drop what nothing points at
+
+						done = True
 
 					else:
 						logger.critical(f"{RED}versions did not align; pull most recent upload from server before committing{RESET}")
 						return
 
-			updates = remaining + new
+			if done is False:
+				logger.warning("\nthe upload was interrupted & rolled back; the content staged so far is kept for the next 'rosa give'")
+				sys.exit(1)
+
+			updates = remaining + new + [current for _, current in moves]
 
 			with landline(local.index) as sconn:
 				refresh_index(sconn, local.target, updates)
+				clear_checkpoints(sconn)
 
 		except KeyboardInterrupt:
 			logger.warning(f'\nboss killed the process; index could be corrupted; refreshing before exit...')
@@ -11,13 +11,17 @@ import os
 import sys
 import time
 import shutil
+import logging
+import sqlite3
+import contextlib
 
-from rosa.confs import TABLE_CHECK, _DROP
+from rosa.confs import TABLE_CHECK, _DROP, BULK_LOAD
 from rosa.lib import (
 	phones, mini_ps, finale, _config,
 	init_remote, init_index, _r, init_dindex, 
-	_safety, shutil_fx, is_ignored, r,
-	landline, construct, Heart
+	_safety, shutil_fx, rules, survey,
+	landline, construct, Heart,
+	checkpointed, checkpoint, clear_checkpoints
 )
 
 NOMIC: str = "[init]"
@@ -30,26 +34,141 @@ def scraper(origin: str = ""):
 	
 	Returns:
 		drps (list): Relative paths of every directory.
-		frps (list): Relative paths of every file.
+		files (list): Tupled relative paths & stats of every file.
 	"""
-	pfx: int = len(origin) + 1
-
-	frps: list = []
-	drps: list = []
-
-	for obj in r(origin):
-		if is_ignored(obj.path):
-			continue
-
-		elif obj.is_file():
-			rp: str = obj.path[pfx:]
-			frps.append(rp)
-		
-		elif obj.is_dir():
-			rp: str = obj.path[pfx:]
-			drps.append(rp)
-	
-	return drps, frps
+	files, drps = survey(origin, rules(origin))
+
+	return drps, files
+
+def acked(sconn: sqlite3 | None = None):
+	"""The version an index holds checkpoints for (None if it has none, or predates them)."""
+	if not sconn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'checkpoints';").fetchone():
+		return None
+
+	return checkpointed(sconn)
+
+def resumable(index: str = ""):
+	"""Reads what an interrupted init already uploaded.
+
+	Only if the server never recorded v0; its rows go in with
+	the record, so none of them did either.
+
+	Args:
+		index (str): Path to the local index.
+
+	Returns:
+		carry (list): Tupled (rp, hash, track, size, mtime_ns) of every acknowledged file (empty if it can't resume).
+	"""
+	with landline(index) as sconn:
+		if acked(sconn) != 0:
+			return []
+
+		carry: list = sconn.execute("SELECT rp, hash, track, size, mtime_ns FROM checkpoints WHERE version = 0;").fetchall()
+
+	with phones() as conn:
+		with conn.cursor() as cursor:
+			cursor.execute("SELECT COUNT(*) FROM interior;")
+
+			if cursor.fetchone()[0]:
+				return []
+
+	return carry
+
+def keep(index: str = None, logger: logging = None):
+	"""Checks whether a failed init uploaded anything it can resume from.
+
+	A BULK_LOAD init can't resume (its loads commit as they go), so it's always erased.
+
+	Args:
+		index (str): Path to the local index.
+		logger (logging): The command's logger.
+
+	Returns:
+		kept (bool): True if the index & server should be left for 'rosa init' to resume.
+	"""
+	if not index or BULK_LOAD or not os.path.exists(index):
+		return False
+
+	with landline(index) as sconn:
+		if acked(sconn) is None:
+			return False
+
+	logger.warning("the content uploaded so far was kept; run 'rosa init' again to resume")
+
+	return True
+
+def initiate(local: Heart = None, logger: logging = None, carry: list = []):
+	"""Builds the local index & uploads the directory as v0.
+
+	Args:
+		local (Heart): Paths to the target & the index.
+		logger (logging): The command's logger.
+		carry (list): Checkpoints kept from an interrupted init (see resumable).
+
+	Returns:
+		None
+	"""
+	index: str = None
+
+	with phones() as conn:
+		try:
+			logger.info('scraping source directory...')
+			drps, files = scraper(local.target)
+			frps: list = [rp for rp, _ in files]
+
+			logger.info('initiating the index...')
+			index: str = _config() # don't use the class's attributes bc they don't exist
+
+			if index:
+				# not landline: it swallows an interrupt, & phones would commit whatever was half sent
+				with contextlib.closing(sqlite3.connect(index)) as sconn: # *they are None, but you get it
+					construct(sconn)
+
+					init_dindex(sconn, drps)
+
+					if carry:
+						checkpoint(sconn, 0, carry)
+
+					sconn.commit()
+
+				logger.info(f'initiating remote database...')
+				with contextlib.closing(sqlite3.connect(index)) as sconn:
+					originals: str = os.path.join(os.path.dirname(index), "originals")
+
+					# one read per file uploads it, copies it into the originals & hashes it for the index
+					staged: dict = init_remote(conn, sconn, local.target, drps, frps, originals)
+					init_index(sconn, os.path.dirname(index), files, drps, staged)
+
+					conn.commit() # v0 is in; the checkpoints aren't needed anymore
+					clear_checkpoints(sconn)
+					sconn.commit()
+
+			else:
+				logger.error('_config() did not produce an index path value')
+				sys.exit(2)
+
+		except KeyboardInterrupt as ki:
+			logger.info(f"\ninitiation process killed")
+			if keep(index, logger):
+				sys.exit(1)
+			if index:
+				shutil_fx(os.path.dirname(index))
+			with conn.cursor() as cursor:
+				cursor.execute(_DROP)
+				while cursor.nextset():
+					pass
+			sys.exit(1)
+		except Exception as e:
+			logger.error(f"\ninitiation process failed: {e}")
+			if keep(index, logger):
+				sys.exit(7)
+			if index:
+				shutil_fx(os.path.dirname(index))
+			with conn.cursor() as cursor:
+				cursor.execute(_DROP)
+				while cursor.nextset():
+					pass
+			sys.exit(7)
 
 def main(args: argparse = None):
 	"""Initiating the local index & remote database.
@@ -91,6 +210,16 @@ def main(args: argparse = None):
 					except Exception as e:
 						logger.info(f"failed to erase server due to: {e}", exc_info=True)
 
+			elif carry := resumable(local.index):
+				logger.info(f'a previous init was interrupted after uploading {len(carry)} file[s].')
+				dec: str = input('Resume [r] it? [Return to quit]: ').lower()
+
+				if dec in('r', 'resume', ' r', 'r '):
+					start: float = time.perf_counter()
+
+					shutil_fx(os.path.dirname(local.index)) # the index is rebuilt; only its checkpoints carry over
+					initiate(local, logger, carry)
+
 			elif local.index:
 				logger.info('the server has tables and the local index exists; they both need to be erased.')
 				dec: str = input('Erase now [e]? [Return to quit]: ').lower()
@@ -120,46 +249,7 @@ def main(args: argparse = None):
 		else:
 			start: float = time.perf_counter()
 
-			with phones() as conn:
-				try:
-					logger.info('scraping source directory...')
-					drps: list, frps: list = scraper(local.target)
-
-					logger.info('initiating the index...')
-					index: str = _config() # don't use the class's attributes bc they don't exist
-
-					if index:
-						with landline(index) as sconn: # *they are None, but you get it
-							construct(sconn)
-
-							init_dindex(sconn, drps)
-							init_index(sconn, local.target, os.path.dirname(index))
-
-						logger.info(f'initiating remote database...')
-						init_remote(conn, local.target, drps, frps)
-
-					else:
-						logger.error('_config() did not produce an index path value')
-						sys.exit(2)
-
-				except KeyboardInterrupt as ki:
-					logger.info(f"\ninitiation process killed")
-					if index:
-						shutil_fx(os.path.dirname(index))
-					with conn.cursor() as cursor:
-						cursor.execute(_DROP)
-						while cursor.nextset():
-							pass
-					sys.exit(1)
-				except Exception as e:
-					logger.error(f"\ninitiation process failed: {e}")
-					if index:
-						shutil_fx(os.path.dirname(index))
-					with conn.cursor() as cursor:
-						cursor.execute(_DROP)
-						while cursor.nextset():
-							pass
-					sys.exit(7)
+			initiate(local, logger)
 
 	except KeyboardInterrupt:
 		logger.warning(f'\nboss killed the process; abandoning...')
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Migrates the repository to the configured hash algorithm.
+
+Re-hashes the server's files, blobs & chunks in committed
+batches (resumable), then the index from the local originals.
+"""
+
+import sys
+import argparse
+
+from rosa.confs import HASH_ALGO, RED, RESET
+from rosa.lib import (
+	phones, landline, mini_ps, finale,
+	version_check, upgrade_remote, calc_batch,
+	local_algo, rehash_index, remote_algo,
+	rehash_remote, upkeep, Heart
+)
+
+NOMIC: str = "[rehash]"
+
+def main(args: argparse = None):
+	"""Moves the server & the index over to HASH_ALGO."""
+	logger, force, prints, start = mini_ps(args, NOMIC)
+
+	local = Heart()
+
+	try:
+		with phones() as conn:
+			with landline(local.index) as sconn:
+				upkeep(sconn, local.target)
+				upgrade_remote(conn)
+
+				vok, version = version_check(conn, sconn)
+
+				if vok is not True:
+					logger.critical(f"{RED}versions did not align; pull most recent upload from server before rehashing{RESET}")
+					return
+
+				lalgo: str = local_algo(sconn)
+				ralgo: str = remote_algo(conn)
+
+				if lalgo == ralgo == HASH_ALGO:
+					logger.info(f"already hashing with {HASH_ALGO}")
+
+				else:
+					if ralgo != HASH_ALGO:
+						logger.info(f"rehashing the server's files ({ralgo} -> {HASH_ALGO})...")
+						batch_size, r_sz = calc_batch(conn)
+
+						rehashed: int = rehash_remote(conn, HASH_ALGO, batch_size)
+						logger.info(f"rehashed {rehashed} files, blobs & chunks on the server")
+
+					if lalgo != HASH_ALGO:
+						logger.info(f"rehashing the index ({lalgo} -> {HASH_ALGO})...")
+						rehash_index(sconn, local.originals, HASH_ALGO)
+
+	except KeyboardInterrupt:
+		logger.warning(f'\nboss killed the process; run rehash again to resume')
+		sys.exit(1)
+
+	finale(NOMIC, start, prints)
+
+if __name__=="__main__":
+	main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Watches the indexed directory for changes (Linux).
+
+Journals created, modified, deleted and moved paths
+into the index so diffs only check what changed.
+Runs until interrupted.
+"""
+
+import sys
+import argparse
+
+from rosa.lib import mini_ps, finale, watch, Heart
+
+NOMIC: str = "[watch]"
+
+def main(args: argparse = None):
+	"""Subscribes to the indexed tree and journals its changes."""
+	logger, force, prints, start = mini_ps(args, NOMIC)
+
+	if not sys.platform.startswith("linux"):
+		logger.error('rosa watch needs inotify (Linux); diffs will keep walking the tree')
+		sys.exit(5)
+
+	local = Heart()
+
+	watch(local.target, local.index)
+
+	finale(NOMIC, start, prints)
+
+if __name__=="__main__":
+	main()
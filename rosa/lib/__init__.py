@@ -1,5 +1,13 @@
 from .opps import doit_urself, mini_ps, finale, diff_gen, Heart
-from .index import query_index, version_check, _r, r, _config, historian, refresh_index, local_audit_, xxdeleted, query_dindex, local_daudit, scrape_dindex, init_dindex, init_index, is_ignored, construct, encoding
+from .index import query_index, version_check, _r, _config, historian, refresh_index, local_audit_, xxdeleted, query_dindex, local_daudit, scrape_dindex, init_dindex, init_index, construct, encoding, pair_moves, upkeep, local_algo, record_algo, rehash_index
 from .dispatch import phones, init_conn, landline, calc_batch, _safety, confirm
-from .technician import rm_remdir, rm_remfile, collect_data, upload_dirs, upload_created, upload_edited, collector, init_remote, remote_records, upload_patches
-from .contractor import fat_boy, fat_boy_o, sfat_boy, shutil_fx, save_people, wr_batches, mk_rrdir
\ No newline at end of file
+from .technician import rm_remdir, rm_remfile, collect_data, upload_dirs, upload_created, upload_edited, collector, init_remote, remote_records, upload_patches, upgrade_remote, move_remfiles, remote_algo, rehash_remote, put_blobs, drop_refs, sweep, publish, bulk_init, stage_files, checkpointed, clear_checkpoints, checkpoint
+from .contractor import fat_boy, fat_boy_o, sfat_boy, shutil_fx, save_people, wr_batches, mk_rrdir
+from .hashing import hash_file, hash_bytes, hash_files, pool_map, ingest
+from .walker import walk, survey, share
+from .ignore import is_ignored, rules, Matcher
+from .journal import watch, journal_state
+from .ledger import Ledger
+from .chunker import cuts, stow, assemble, spill
+from .codec import squeeze, unsqueeze
+from .loader import LoadFile, deferred
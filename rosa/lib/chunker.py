@@ -0,0 +1,474 @@
+"""Content-defined chunk store.
+
+Large files are cut with FastCDC (gear hash, normalized
+chunking) so an edit only moves the boundaries around it.
+Chunks are stored once on the server keyed by their hash;
+a file is its ordered list of chunk hashes (its manifest,
+keyed by the file's digest). Uploads skip chunks the server
+already has. Files on disk are cut as they're read, so neither
+side ever holds more than a few chunks of one in memory.
+
+The boundary search is vectorized with NumPy when it's installed
+('pip install rosa[fast]'); without it, only files too big to go
+up whole are cut unless CDC_MIN says otherwise.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import NamedTuple
+from itertools import batched
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+import mysql.connector
+from mysql.connector import MySQLConnection as MySQL
+
+from rosa.confs import CDC_MIN, MAX_ALLOWED_PACKET
+from rosa.lib.hashing import hash_bytes, new_hasher
+from rosa.lib.codec import squeeze, unsqueeze
+
+logger = logging.getLogger('rosa.log')
+
+MIN: int = 512*1024 # no cut before this
+AVG: int = 1024*1024 # normalized target
+MAX: int = 4*1024*1024 # forced cut; keeps every chunk well under MAX_ALLOWED_PACKET
+
+if CDC_MIN:
+	CHUNKED: int = min(CDC_MIN, MAX_ALLOWED_PACKET // 2) # files at least this big are stored as chunks
+elif np is not None:
+	CHUNKED: int = 2*AVG
+else:
+	CHUNKED: int = MAX_ALLOWED_PACKET // 2 # the pure-Python cut is slow (~7 MB/s); only cut what can't go up whole
+
+SCAN: int = 256*1024 # bytes hashed per vectorized step; most cuts land in the first few past MIN
+
+LOOKUP: int = 1000 # chunk hashes per 'IN (...)' query
+FLUSH: int = 4*MAX # bytes of streamed chunks held before checking which ones the server lacks
+
+_M64: int = (1 << 64) - 1
+
+# 256 fixed 64-bit values; derived, so every machine cuts identically
+GEAR: tuple = tuple(int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], 'little') for i in range(256))
+
+def _spread(bits: int = 0):
+	"""A mask of bits ones spread over the hash's upper 48 bits (each depends on a long window)."""
+	return sum(1 << (63 - (i * 48) // bits) for i in range(bits))
+
+# FastCDC's normalized masks: more bits (harder to hit) before AVG, fewer after
+MASK_S: int = _spread(22)
+MASK_L: int = _spread(18)
+
+if np is not None:
+	_GEAR = np.array(GEAR, dtype=np.uint64)
+	_MASK_S = np.uint64(MASK_S)
+	_MASK_L = np.uint64(MASK_L)
+
+class OnDisk(NamedTuple):
+	"""Content left on disk to be streamed up rather than read into memory.
+
+	Attributes:
+		fp (str): Path to the file.
+		size (int): Its size when it was hashed.
+	"""
+	fp: str
+	size: int
+
+def _cut_py(data: bytes = b"", start: int = 0, end: int = 0):
+	"""Finds the length of the next chunk starting at start, a byte at a time.
+
+	Args:
+		data (bytes): The whole content.
+		start (int): Where this chunk begins.
+		end (int): Where the content ends.
+
+	Returns:
+		length (int): The chunk's length.
+	"""
+	remaining: int = end - start
+
+	if remaining <= MIN:
+		return remaining
+
+	limit: int = min(remaining, MAX)
+	normal: int = min(limit, AVG)
+
+	gear: tuple = GEAR
+	h: int = 0
+	i: int = start + MIN
+
+	for stop, mask in ((start + normal, MASK_S), (start + limit, MASK_L)):
+		while i < stop:
+			h = ((h << 1) + gear[data[i]]) & _M64
+			i += 1
+
+			if not h & mask:
+				return i - start
+
+	return limit
+
+def _cut_np(data: bytes = b"", start: int = 0, end: int = 0):
+	"""Finds the same cut as _cut_py(), SCAN bytes at a time with NumPy.
+
+	The gear hash at a byte is the sum of the last 64 bytes' GEAR
+	values, each shifted by its distance (older ones fall off the
+	top), so a whole span is hashed with six shifted adds that
+	double the window each time. Spans overlap by 63 bytes so
+	each one starts with full windows.
+
+	Args:
+		data (bytes): The whole content (bytes or bytearray).
+		start (int): Where this chunk begins.
+		end (int): Where the content ends.
+
+	Returns:
+		length (int): The chunk's length.
+	"""
+	remaining: int = end - start
+
+	if remaining <= MIN:
+		return remaining
+
+	limit: int = min(remaining, MAX)
+	split: int = start + min(limit, AVG) # MASK_S before, MASK_L from here
+	stop: int = start + limit
+
+	base: int = start + MIN # the hash starts empty here
+	i: int = base
+
+	while i < stop:
+		j: int = min(i + SCAN, stop)
+		lo: int = max(base, i - 63)
+
+		h = _GEAR[np.frombuffer(data, dtype=np.uint8, count=j - lo, offset=lo)]
+
+		for span in (1, 2, 4, 8, 16, 32):
+			h[span:] += h[:-span] << np.uint64(span)
+
+		h = h[i - lo:]
+
+		for a, b, mask in ((i, min(j, split), _MASK_S), (max(i, split), j, _MASK_L)):
+			if a < b:
+				hits = np.flatnonzero((h[a - i:b - i] & mask) == 0)
+
+				if hits.size:
+					return a + int(hits[0]) + 1 - start
+
+		i = j
+
+	return limit
+
+_cut = _cut_np if np is not None else _cut_py
+
+def cuts(content: bytes = b""):
+	"""Cuts content into content-defined chunks.
+
+	Args:
+		content (bytes): A file's content.
+
+	Returns:
+		pieces (list): Tupled (offset, length) of every chunk, in order.
+	"""
+	pieces: list = []
+	start: int = 0
+	end: int = len(content)
+
+	while start < end:
+		length: int = _cut(content, start, end)
+		pieces.append((start, length))
+		start += length
+
+	return pieces
+
+def cut_stream(f = None):
+	"""Cuts a binary file object into the same chunks cuts() would, as it's read.
+
+	A cut never looks more than MAX bytes ahead, so the buffer
+	is topped up to MAX before each one.
+
+	Args:
+		f (file): Opened in 'rb' mode.
+
+	Yields:
+		chunk (bytes): Each chunk, in order.
+	"""
+	buf: bytearray = bytearray()
+	eof: bool = False
+
+	while True:
+		while not eof and len(buf) < MAX:
+			data: bytes = f.read(MAX)
+
+			if data:
+				buf += data
+			else:
+				eof = True
+
+		if not buf:
+			return
+
+		length: int = _cut(buf, 0, len(buf))
+
+		yield bytes(buf[:length])
+		del buf[:length]
+
+def known(conn: MySQL | None = None, chashes: list = [], version: int = None):
+	"""Finds which chunk hashes the server already holds.
+
+	Args:
+		conn (mysql): Connection object.
+		chashes (list): Chunk hashes.
+		version (int): Optional version whose staged chunks count too.
+
+	Returns:
+		held (set): The ones already stored.
+	"""
+	held: set = set()
+
+	with conn.cursor() as cursor:
+		for chunk in batched(list(dict.fromkeys(chashes)), LOOKUP):
+			marks: str = ", ".join(["%s"] * len(chunk))
+			query: str = f"SELECT chash FROM chunks WHERE chash IN ({marks})"
+			params: tuple = chunk
+
+			if version is not None:
+				query += f" UNION SELECT chash FROM stage_chunks WHERE version = %s AND chash IN ({marks})"
+				params += (version,) + chunk
+
+			cursor.execute(query + ";", params)
+
+			held.update(bytes(chash) for (chash,) in cursor.fetchall())
+
+	return held
+
+def stow(conn: MySQL | None = None, items: list = [], version: int = None):
+	"""Stores large files as chunks & manifests, uploading only the chunks the server lacks.
+
+	Args:
+		conn (mysql): Connection object.
+		items (list): Tupled (digest, content) of files at least CHUNKED bytes.
+		version (int): Optional version to stage the chunks & manifests under instead (see technician.publish).
+
+	Returns:
+		sent (int): Bytes of chunk data actually uploaded.
+	"""
+	sent: int = 0
+	uploaded: int = 0
+
+	manifests: list = []
+	fresh: dict = {}
+
+	with conn.cursor() as cursor:
+		digests: list = list(dict.fromkeys(digest for digest, _ in items))
+		stored: set = set()
+
+		for chunk in batched(digests, LOOKUP):
+			marks: str = ", ".join(["%s"] * len(chunk))
+			query: str = f"SELECT DISTINCT digest FROM manifests WHERE digest IN ({marks})"
+			params: tuple = chunk
+
+			if version is not None:
+				query += f" UNION SELECT DISTINCT digest FROM stage_manifests WHERE version = %s AND digest IN ({marks})"
+				params += (version,) + chunk
+
+			cursor.execute(query + ";", params)
+
+			stored.update(bytes(digest) for (digest,) in cursor.fetchall())
+
+	for digest, content in items:
+		if digest in stored:
+			continue # same content is already chunked on the server
+		stored.add(digest)
+
+		view = memoryview(content)
+
+		for seq, (offset, length) in enumerate(cuts(content)):
+			piece = view[offset:offset + length]
+			chash: bytes = hash_bytes(piece)
+
+			manifests.append((digest, seq, chash))
+			fresh.setdefault(chash, piece)
+
+	held: set = known(conn, list(fresh), version)
+
+	if version is None:
+		cquery: str = "INSERT IGNORE INTO chunks (chash, size, codec, data) VALUES (%s, %s, %s, %s);"
+		mquery: str = "INSERT IGNORE INTO manifests (digest, seq, chash) VALUES (%s, %s, %s);"
+		lead: tuple = ()
+	else:
+		cquery: str = "INSERT IGNORE INTO stage_chunks (version, chash, size, codec, data) VALUES (%s, %s, %s, %s, %s);"
+		mquery: str = "INSERT IGNORE INTO stage_manifests (version, digest, seq, chash) VALUES (%s, %s, %s, %s);"
+		lead: tuple = (version,)
+
+	try:
+		with conn.cursor(prepared=True) as cursor:
+			for chash, piece in fresh.items():
+				if chash in held:
+					continue
+
+				codec, data = squeeze(piece)
+
+				cursor.execute(cquery, lead + (chash, len(piece), codec, bytes(data)))
+				sent += len(data)
+				uploaded += 1
+
+			if manifests:
+				cursor.executemany(mquery, [lead + row for row in manifests])
+
+	except (mysql.connector.Error, ConnectionError, Exception) as c:
+		logger.error(f"error encountered while uploading chunks: {c}", exc_info=True)
+		raise
+
+	logger.debug(f"uploaded {uploaded} of {len(fresh)} distinct chunk[s] ({sent} bytes)")
+
+	return sent
+
+def stow_file(conn: MySQL | None = None, digest: bytes = b"", fp: str = "", version: int = None):
+	"""Streams a file up as chunks & a manifest, reading it once and uploading only the chunks the server lacks.
+
+	Args:
+		conn (mysql): Connection object.
+		digest (bytes): The file's digest, as hashed earlier.
+		fp (str): Path to the file.
+		version (int): Optional version to stage the chunks & manifest under instead.
+
+	Returns:
+		sent (int): Bytes of chunk data actually uploaded.
+	"""
+	if version is None:
+		cquery: str = "INSERT IGNORE INTO chunks (chash, size, codec, data) VALUES (%s, %s, %s, %s);"
+		mquery: str = "INSERT IGNORE INTO manifests (digest, seq, chash) VALUES (%s, %s, %s);"
+		lead: tuple = ()
+	else:
+		cquery: str = "INSERT IGNORE INTO stage_chunks (version, chash, size, codec, data) VALUES (%s, %s, %s, %s, %s);"
+		mquery: str = "INSERT IGNORE INTO stage_manifests (version, digest, seq, chash) VALUES (%s, %s, %s, %s);"
+		lead: tuple = (version,)
+
+	with conn.cursor() as cursor:
+		query: str = "SELECT 1 FROM manifests WHERE digest = %s"
+		params: tuple = (digest,)
+
+		if version is not None:
+			query += " UNION SELECT 1 FROM stage_manifests WHERE version = %s AND digest = %s"
+			params += (version, digest)
+
+		cursor.execute(query + ";", params)
+
+		if cursor.fetchall():
+			return 0 # same content is already chunked on the server
+
+	sent: int = 0
+
+	manifest: list = []
+	group: dict = {}
+	held: int = 0
+
+	hasher = new_hasher()
+
+	def flush():
+		"""Uploads the group's chunks the server lacks."""
+		nonlocal sent
+
+		have: set = known(conn, list(group), version)
+
+		with conn.cursor(prepared=True) as cursor:
+			for chash, data in group.items():
+				if chash not in have:
+					codec, packed = squeeze(data)
+
+					cursor.execute(cquery, lead + (chash, len(data), codec, packed))
+					sent += len(packed)
+
+		group.clear()
+
+	try:
+		with open(fp, 'rb') as f:
+			for seq, data in enumerate(cut_stream(f)):
+				hasher.update(data)
+				chash: bytes = hash_bytes(data)
+
+				manifest.append(lead + (digest, seq, chash))
+
+				if chash not in group:
+					group[chash] = data
+					held += len(data)
+
+				if held >= FLUSH:
+					flush()
+					held = 0
+
+		if group:
+			flush()
+
+		if hasher.digest() != digest:
+			raise RuntimeError(f"{fp} changed while it was being uploaded")
+
+		with conn.cursor(prepared=True) as cursor:
+			cursor.executemany(mquery, manifest)
+
+	except (mysql.connector.Error, ConnectionError, Exception) as c:
+		logger.error(f"error encountered while streaming {fp} up: {c}", exc_info=True)
+		raise
+
+	logger.debug(f"streamed {fp} up in {len(manifest)} chunk[s] ({sent} bytes sent)")
+
+	return sent
+
+def pieces(conn: MySQL | None = None, digest: bytes = b""):
+	"""Streams a chunked file's chunks in order.
+
+	Args:
+		conn (mysql): Connection object.
+		digest (bytes): The file's digest.
+
+	Yields:
+		data (bytes): Each chunk's data.
+	"""
+	query: str = "SELECT c.codec, c.data FROM manifests m JOIN chunks c ON c.chash = m.chash WHERE m.digest = %s ORDER BY m.seq;"
+
+	with conn.cursor(buffered=False) as cursor:
+		cursor.execute(query, (digest,))
+
+		for codec, data in cursor:
+			yield unsqueeze(codec, data)
+
+def assemble(conn: MySQL | None = None, digest: bytes = b""):
+	"""Rebuilds a chunked file's content in memory (i.e., as a patch's base)."""
+	return b"".join(pieces(conn, digest))
+
+def hash_pieces(conn: MySQL | None = None, digest: bytes = b"", algo: str = None):
+	"""Hashes a chunked file as it streams down, without assembling it.
+
+	Args:
+		conn (mysql): Connection object.
+		digest (bytes): The file's (current) digest.
+		algo (str): Optional algorithm (the active one by default).
+
+	Returns:
+		_hash (bytes): The file's digest under algo.
+	"""
+	hasher = new_hasher(algo)
+
+	for data in pieces(conn, digest):
+		hasher.update(data)
+
+	return hasher.digest()
+
+def spill(conn: MySQL | None = None, digest: bytes = b"", fp: str = ""):
+	"""Writes a chunked file to disk one chunk at a time.
+
+	Args:
+		conn (mysql): Connection object (not mid-way through another unbuffered result).
+		digest (bytes): The file's digest.
+		fp (str): Destination path.
+
+	Returns:
+		None
+	"""
+	with open(fp, 'wb') as f:
+		for data in pieces(conn, digest):
+			f.write(data)
@@ -0,0 +1,91 @@
+"""Per-row compression.
+
+Content is compressed before it's stored and the codec is kept
+beside it, so rows written with any codec (or none) read back
+the same. Data under COMPRESS_MIN bytes, or that doesn't shrink,
+stays raw. zstd comes from the standard library (3.14+) or the
+'zstandard' package ('pip install rosa[zstd]'); zlib otherwise.
+"""
+
+import zlib
+import logging
+
+try:
+	from compression.zstd import compress as _zcompress, decompress as _zdecompress
+except ImportError:
+	try:
+		from zstandard import compress as _zcompress, decompress as _zdecompress
+	except ImportError:
+		_zcompress = _zdecompress = None
+
+from rosa.confs import COMPRESSION, COMPRESS_MIN
+
+logger = logging.getLogger('rosa.log')
+
+CODECS: tuple = ("raw", "zlib", "zstd") # same order as the codec columns' ENUM
+
+ZLIB_LEVEL: int = 6
+ZSTD_LEVEL: int = 3
+
+def _preferred():
+	"""The configured codec, falling back to zlib when zstd isn't installed."""
+	if COMPRESSION == "zstd" and _zcompress is None:
+		logger.debug('zstd is unavailable; compressing with zlib')
+		return "zlib"
+
+	if COMPRESSION not in CODECS:
+		raise ValueError(f"unknown COMPRESSION '{COMPRESSION}'; choose from {list(CODECS)}")
+
+	return COMPRESSION
+
+PREFERRED: str = _preferred()
+
+def squeeze(data: bytes = b"", codec: str = None):
+	"""Compresses data for storage.
+
+	Args:
+		data (bytes): Any bytes-like object.
+		codec (str): Optional codec (PREFERRED by default).
+
+	Returns:
+		codec (str): The codec actually used ("raw" if it didn't pay off).
+		data (bytes): What to store.
+	"""
+	codec = codec or PREFERRED
+
+	if codec == "raw" or len(data) < COMPRESS_MIN:
+		return "raw", data
+
+	if codec == "zstd":
+		packed: bytes = _zcompress(data, ZSTD_LEVEL)
+	else:
+		packed: bytes = zlib.compress(data, ZLIB_LEVEL)
+
+	if len(packed) >= len(data):
+		return "raw", data # already compressed (archives, media, ...)
+
+	return codec, packed
+
+def unsqueeze(codec: str = "raw", data: bytes = b""):
+	"""Restores data read back from the server.
+
+	Args:
+		codec (str): The row's codec (None reads as raw; i.e., outer joins on rows stored inline).
+		data (bytes): The stored bytes.
+
+	Returns:
+		data (bytes): The original content.
+	"""
+	if codec is None or codec == "raw":
+		return data
+
+	if codec == "zlib":
+		return zlib.decompress(data)
+
+	if codec == "zstd":
+		if _zdecompress is None:
+			raise RuntimeError("this content is zstd-compressed; install 'zstandard' (or use Python 3.14+) to read it")
+
+		return _zdecompress(data)
+
+	raise ValueError(f"unknown codec '{codec}'")
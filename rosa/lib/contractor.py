@@ -17,7 +17,8 @@ from itertools import batched
 
 import mysql.connector
 
-from rosa.confs import RED, RESET, BLACKLIST
+from rosa.confs import RED, RESET
+from rosa.lib.ignore import is_ignored
 
 logger = logging.getLogger('rosa.log')
 
@@ -343,9 +344,6 @@ def configure_o(dir_: str = ""):
 		logger.warning(f"{dir_} doesn't exist; fix the config or pull a version")
 		raise FileNotFoundError ('source directory does not exist')
 
-def is_ignored(_str: str = ""):
-	return any(blckd in _str for blckd in BLACKLIST)
-
 def apply_atomicy(dir_: str = "", tmpd: str = "", backup: str = ""):
 	"""Cleans up the 'atomic' writing for fat_boy. 
 	
@@ -5,6 +5,8 @@ Initiaton of the connection object.
 Error handling, server rollback, committing.
 """
 
+from __future__ import annotations
+
 import sys
 import logging
 import contextlib
@@ -13,7 +15,7 @@ import sqlite3
 import mysql.connector
 from mysql.connector import errorcode
 
-from rosa.confs import XCONFIG, ASSESS2, MAX_ALLOWED_PACKET
+from rosa.confs import XCONFIG, ASSESS2, MAX_ALLOWED_PACKET, COMPRESS_PROTOCOL, BULK_LOAD
 
 logger = logging.getLogger('rosa.log')
 
@@ -102,7 +104,9 @@ def init_conn(db_user: str = "", db_pswd: str = "", db_name: str = "", db_addr:
 		'password': db_pswd,
 		'database': db_name,
 		'autocommit': False,
-		'use_pure': True
+		'use_pure': True,
+		'compress': COMPRESS_PROTOCOL, # compresses the wire too; mostly pays off over slow links
+		'allow_local_infile': BULK_LOAD # only lets the client send files when bulk loading is wanted
 	}
 
 	conn = mysql.connector.connect(**config)
@@ -49,7 +49,7 @@ class Error:
           message: str = f"boss killed the process"
           level: str = "warning"
           if self.context:
-               message: str += f" during {self.context}"
+               message += f" during {self.context}"
 
           Exit(exCode.KEYBOARD_INTERRUPT, message, level)
 
@@ -65,7 +65,7 @@ class Error:
           """
           message: str = f"Connection Error encountered"
           if self.context:
-               message: str += f" due to: {self.context}"
+               message += f" due to: {self.context}"
 
           Exit(exCode.CONNECTION_ERROR, message)
 
@@ -81,7 +81,7 @@ class Error:
           """
           message: str = f"FileNotFoundError"
           if self.context:
-               message: str += f" during {self.context}"
+               message += f" during {self.context}"
 
           Exit(exCode.FILENOTFOUND_ERROR, message, xi=True)
 
@@ -97,7 +97,7 @@ class Error:
           """
           message: str = f"PermissionError"
           if self.context:
-               message: str += f" during {self.context}"
+               message += f" during {self.context}"
 
           Exit(exCode.PERMISSION_ERROR, message, xi=True)
 
@@ -115,7 +115,7 @@ class Error:
           message: str = "IndexNotFoundError"
 
           if context:
-               message: str += f" during {context}"
+               message += f" during {context}"
 
           Exit(exCode.INDEXNOTFOUND_ERROR, message, level="warning")
 
@@ -132,9 +132,9 @@ class Error:
           message: str = f"Versions misaligned"
 
           if vss:
-               message: str += f": (remote: {vss[0]}), (local: {vss[1]})"
+               message += f": (remote: {vss[0]}), (local: {vss[1]})"
           else:
-               message: str += f"!"
+               message += f"!"
 
           Exit(exCode.VERSION_MISALIGNMENT, message, level="critical")
 
@@ -0,0 +1,217 @@
+"""Shared file hashing.
+
+Files are hashed a fixed-size chunk at a time through one
+reused buffer, so memory stays flat whatever the file's size.
+The kernel is told the reads are sequential so it can read
+ahead while the current chunk is hashed. xxhash releases the
+GIL while it hashes, so many files are hashed on a thread pool.
+
+The algorithm is recorded per repository (see index.local_algo);
+HASH_ALGO only applies to new repositories and 'rosa rehash'.
+"""
+
+import os
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+import xxhash
+
+from rosa.confs import HASH_WORKERS
+
+logger = logging.getLogger('rosa.log')
+
+CHUNK: int = 1024*1024 # bytes read & hashed per update
+HEAD: int = 1024*1024 # leading bytes that decide whether a file is tracked as text
+
+ALGOS: dict = {
+	"xxh64": xxhash.xxh64,
+	"xxh3_64": xxhash.xxh3_64,
+	"xxh3_128": xxhash.xxh3_128
+} # names keyed to hasher constructors; digests are 8 or 16 bytes
+
+DEFAULT: str = "xxh64" # repositories that predate the setting
+
+_current: dict = {"algo": DEFAULT}
+
+def use(algo: str = DEFAULT):
+	"""Sets the algorithm every hash in this process uses.
+
+	Args:
+		algo (str): One of ALGOS' names.
+
+	Returns:
+		None
+	"""
+	if algo not in ALGOS:
+		raise ValueError(f"unknown hash algorithm '{algo}'; choose from {list(ALGOS)}")
+
+	_current["algo"] = algo
+
+def active():
+	"""Name of the algorithm in use."""
+	return _current["algo"]
+
+def new_hasher(algo: str = None):
+	"""A fresh hasher for algo (the active one by default)."""
+	return ALGOS[algo or _current["algo"]]()
+
+def _advise(fd: int = None):
+	"""Hints sequential access for a file descriptor, where the platform allows it."""
+	if hasattr(os, "posix_fadvise"):
+		try:
+			os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+		except OSError:
+			pass # e.g., pipes & some network filesystems
+
+def hash_bytes(content: bytes = b"", algo: str = None):
+	"""Hashes content that's already in memory.
+
+	Args:
+		content (bytes): Any bytes-like object.
+		algo (str): Optional algorithm (the active one by default).
+
+	Returns:
+		_hash (bytes): The content's digest.
+	"""
+	hasher = new_hasher(algo)
+	hasher.update(content)
+
+	return hasher.digest()
+
+def hash_file(fp: str = "", algo: str = None):
+	"""Hashes a file without reading it into memory whole.
+
+	readinto() a reused buffer rather than mmap: a file truncated
+	while it's mapped would kill the process with SIGBUS.
+
+	Args:
+		fp (str): Path to the file.
+		algo (str): Optional algorithm (the active one by default).
+
+	Returns:
+		_hash (bytes): The file's digest.
+	"""
+	hasher = new_hasher(algo)
+
+	buf = bytearray(CHUNK)
+	view = memoryview(buf)
+
+	with open(fp, 'rb', buffering=0) as f:
+		_advise(f.fileno())
+
+		while True:
+			n: int = f.readinto(buf)
+
+			if not n:
+				break
+
+			hasher.update(view[:n])
+
+	return hasher.digest()
+
+def classify(head: bytes = b""):
+	"""Checks if a file's first mb can be decoded as utf-8.
+
+	Args:
+		head (bytes): The file's first HEAD bytes (or all of it, if shorter); any buffer.
+
+	Returns:
+		utf (str): Single-character string: "T" or "F".
+	"""
+	try:
+		str(head, 'utf-8')
+	except UnicodeDecodeError:
+		return "F"
+
+	return "T"
+
+def ingest(fp: str = "", keep: bool = False, copy: str = None, algo: str = None):
+	"""Reads a file once for everything a commitment needs from it.
+
+	Args:
+		fp (str): Path to the file.
+		keep (bool): Whether to return the content itself.
+		copy (str): Optional path the content is written to on the way through.
+		algo (str): Optional algorithm (the active one by default).
+
+	Returns:
+		content (bytes): The file's content (None unless kept).
+		_hash (bytes): The content's digest.
+		track (str): "T" if the first mb is utf-8, else "F".
+		size (int): Bytes read.
+	"""
+	hasher = new_hasher(algo)
+
+	out = open(copy, 'wb') if copy else None
+
+	try:
+		with open(fp, 'rb', buffering=0) as f:
+			_advise(f.fileno())
+
+			if keep:
+				content: bytes = f.read() # one allocation; it's going up whole anyway
+
+				hasher.update(content)
+				if out:
+					out.write(content)
+
+				return content, hasher.digest(), classify(memoryview(content)[:HEAD]), len(content)
+
+			head: bytearray = bytearray()
+			size: int = 0
+
+			buf = bytearray(CHUNK)
+			view = memoryview(buf)
+
+			while True:
+				n: int = f.readinto(buf)
+
+				if not n:
+					break
+
+				chunk = view[:n]
+				hasher.update(chunk)
+
+				if len(head) < HEAD:
+					head += chunk[:HEAD - len(head)]
+				if out:
+					out.write(chunk)
+
+				size += n
+
+	finally:
+		if out:
+			out.close()
+
+	return None, hasher.digest(), classify(head), size
+
+def pool_map(fx = None, items: list = [], workers: int = HASH_WORKERS):
+	"""Runs fx over items on a thread pool, returning the results in the items' order.
+
+	Args:
+		fx (function): Single-argument function (e.g., hash_file).
+		items (list): Its arguments.
+		workers (int): Threads to use (1, or a single item, runs in this thread).
+
+	Returns:
+		results (list): fx(item) for every item, in order.
+	"""
+	if workers <= 1 or len(items) <= 1:
+		return [fx(item) for item in items]
+
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rosa-hash") as pool:
+		return list(pool.map(fx, items))
+
+def hash_files(fps: list = [], workers: int = HASH_WORKERS, algo: str = None):
+	"""Hashes many files in parallel.
+
+	Args:
+		fps (list): Paths to the files.
+		workers (int): Threads to hash with.
+		algo (str): Optional algorithm (the active one by default).
+
+	Returns:
+		hashes (list): Each file's digest, in the same order as fps.
+	"""
+	return pool_map(partial(hash_file, algo=algo or _current["algo"]), fps, workers)
@@ -0,0 +1,321 @@
+"""Compiled ignore rules for the walkers.
+
+BLACKLIST and every '.rosaignore' found are read as
+gitignore-style globs and compiled once into regexes.
+Walkers ask before descending, so ignored directories
+are cut off instead of being listed and thrown away.
+"""
+
+import os
+import re
+import logging
+
+from rosa.confs import BLACKLIST
+
+logger = logging.getLogger('rosa.log')
+
+IGNORE_FILE: str = ".rosaignore"
+
+_roots: dict = {} # origin keyed to its compiled Matcher
+_nested: dict = {} # (origin, relative directory) keyed to the Matcher in force inside it
+
+def _translate(pattern: str = ""):
+	"""Translates a gitignore-style glob into a regex.
+
+	Args:
+		pattern (str): Glob without its '!' prefix or trailing '/'.
+
+	Returns:
+		regex (str): Equivalent regular expression (for fullmatch).
+	"""
+	i: int = 0
+	n: int = len(pattern)
+	regex: list = []
+
+	while i < n:
+		c: str = pattern[i]
+
+		if pattern.startswith("**/", i):
+			regex.append("(?:.*/)?")
+			i += 3
+			continue
+
+		if pattern.startswith("**", i):
+			regex.append(".*")
+			i += 2
+			continue
+
+		if c == "*":
+			regex.append("[^/]*")
+		elif c == "?":
+			regex.append("[^/]")
+		elif c == "[":
+			j: int = pattern.find("]", i + 1)
+
+			if j == -1:
+				regex.append(re.escape(c))
+			else:
+				body: str = pattern[i + 1:j]
+				if body.startswith("!"):
+					body = "^" + body[1:]
+
+				regex.append(f"[{body}]")
+				i = j
+		elif c == "\\" and i + 1 < n:
+			i += 1
+			regex.append(re.escape(pattern[i]))
+		else:
+			regex.append(re.escape(c))
+
+		i += 1
+
+	return "".join(regex)
+
+def _compile(lines: list = [], base: str = ""):
+	"""Compiles glob lines into rules.
+
+	Args:
+		lines (list): Raw lines from BLACKLIST or an ignore file.
+		base (str): Relative path of the directory the lines apply under ('' for the root).
+
+	Returns:
+		rules (list): Tuples of (base, regex, negate, dir_only, anchored).
+	"""
+	rules: list = []
+
+	for line in lines:
+		line: str = line.rstrip("\n").strip()
+
+		if not line or line.startswith("#"):
+			continue
+
+		negate: bool = line.startswith("!")
+		if negate:
+			line = line[1:]
+
+		dir_only: bool = line.endswith("/")
+		line = line.rstrip("/")
+
+		anchored: bool = "/" in line
+		line = line.lstrip("/")
+
+		if not line:
+			continue
+
+		regex = re.compile(_translate(line))
+		rules.append((base, regex, negate, dir_only, anchored))
+
+	return rules
+
+class Matcher:
+	"""Ordered, compiled ignore rules; the last matching rule wins.
+
+	Attributes:
+		rules (list): Tuples of (base, regex, negate, dir_only, anchored).
+	"""
+	def __init__(self, rules: list = None):
+		"""Holds the compiled rules."""
+		self.rules: list = rules or []
+
+	def extend(self, base: str = "", lines: list = []):
+		"""Returns a new Matcher with an ignore file's rules appended.
+
+		Args:
+			base (str): Relative path of the directory holding the ignore file.
+			lines (list): The file's lines.
+
+		Returns:
+			Matcher: The parent's rules followed by the new ones.
+		"""
+		rules: list = _compile(lines, base)
+
+		if not rules:
+			return self
+
+		return Matcher(self.rules + rules)
+
+	def ignores(self, rp: str = "", is_dir: bool = False):
+		"""Checks a single relative path (its parents are assumed kept).
+
+		Args:
+			rp (str): Relative path from the walk's origin.
+			is_dir (bool): Whether the path is a directory.
+
+		Returns:
+			ignored (bool): True if the path should be skipped.
+		"""
+		ignored: bool = False
+
+		for base, regex, negate, dir_only, anchored in self.rules:
+			if dir_only and not is_dir:
+				continue
+
+			if base:
+				if not rp.startswith(base + "/"):
+					continue
+				rel: str = rp[len(base) + 1:]
+			else:
+				rel: str = rp
+
+			if not anchored:
+				rel = rel.rpartition("/")[2]
+
+			if regex.fullmatch(rel):
+				ignored = not negate
+
+		return ignored
+
+	def blocked(self, rp: str = "", is_dir: bool = False):
+		"""Checks a relative path and every parent directory above it.
+
+		Args:
+			rp (str): Relative path from the walk's origin.
+			is_dir (bool): Whether the path itself is a directory.
+
+		Returns:
+			bool: True if the path or any of its parents is ignored.
+		"""
+		parts: list = rp.split("/")
+
+		for i in range(1, len(parts)):
+			if self.ignores("/".join(parts[:i]), True):
+				return True
+
+		return self.ignores(rp, is_dir)
+
+def read_ignore(dirx: str = ""):
+	"""Reads the ignore file in a directory, if there is one.
+
+	Args:
+		dirx (str): Path to a directory.
+
+	Returns:
+		lines (list): The file's lines (empty if missing or unreadable).
+	"""
+	try:
+		with open(os.path.join(dirx, IGNORE_FILE), 'r', encoding='utf-8') as f:
+			return f.readlines()
+
+	except (FileNotFoundError, PermissionError, UnicodeDecodeError) as e:
+		logger.debug(f"skipping {IGNORE_FILE} in {dirx}: {e}")
+		return []
+
+NAMES: set = {".index", ".git", ".obsidian", ".vscode", ".DS_Store"} # shipped BLACKLIST entries; always meant as names
+
+def _legacy(entries: list = []):
+	"""Keeps BLACKLISTs written before globs working.
+
+	Entries used to match as substrings, so an extension like '.pyc'
+	caught every .pyc file; as a glob it only matches a file named
+	'.pyc'. Such entries (a leading '.', no glob characters, not one
+	of the shipped NAMES) also get '*<entry>'.
+
+	Args:
+		entries (list): BLACKLIST as configured.
+
+	Returns:
+		globs (list): The entries, plus a '*' form of every legacy one.
+	"""
+	globs: list = [entry.strip() for entry in entries if entry.strip()]
+	legacy: list = [entry for entry in globs if entry.startswith(".") and entry not in NAMES and not any(c in entry for c in "*?[/!")]
+
+	if legacy:
+		globs += ["*" + entry for entry in legacy if "*" + entry not in globs]
+		logger.warning(f"BLACKLIST takes gitignore-style globs now; also ignoring {', '.join('*' + entry for entry in legacy)} (write them that way to silence this)")
+
+	return globs
+
+BASE = Matcher(_compile([".index"] + _legacy(BLACKLIST))) # the index is never tracked
+
+def rules(origin: str = ""):
+	"""Compiles BLACKLIST and the origin's own ignore file once per origin.
+
+	Nested ignore files are picked up by the walker as it descends.
+
+	Args:
+		origin (str): Path to the walk's root.
+
+	Returns:
+		Matcher: Compiled rules for the root.
+	"""
+	matcher = _roots.get(origin)
+
+	if matcher is None:
+		matcher = BASE.extend("", read_ignore(origin))
+		_roots[origin] = matcher
+
+	return matcher
+
+def forget(origin: str = "", rp: str = ""):
+	"""Drops the cached rules for a directory (& everything beneath it) after its ignore file changed.
+
+	Args:
+		origin (str): Path to the walk's root.
+		rp (str): Relative path of the directory holding the ignore file ('' for the root).
+
+	Returns:
+		None
+	"""
+	if not rp:
+		_roots.pop(origin, None)
+
+	for key in [key for key in _nested if key[0] == origin and (not rp or key[1] == rp or key[1].startswith(rp + "/"))]:
+		_nested.pop(key, None)
+
+def is_ignored(_str: str = ""):
+	"""Checks a path against BLACKLIST alone, one component at a time.
+
+	Args:
+		_str (str): A file or directory path (relative or absolute).
+
+	Returns:
+		bool: True if the path or a parent matches BLACKLIST.
+	"""
+	return BASE.blocked(_str.strip(os.sep).replace(os.sep, "/"))
+
+def governing(origin: str = "", rp: str = ""):
+	"""Finds the rules a walk from origin would apply to one path, without walking.
+
+	Parents are checked on the way down and each one's ignore
+	file is applied (read once per directory, until forget() drops it).
+
+	Args:
+		origin (str): Path to the walk's root.
+		rp (str): Relative path from origin.
+
+	Returns:
+		Matcher: Rules deciding rp itself; None if a parent is already ignored.
+	"""
+	matcher = rules(origin)
+	parts: list = rp.split("/")
+
+	for i in range(1, len(parts)):
+		parent: str = "/".join(parts[:i])
+
+		if matcher.ignores(parent, True):
+			return None
+
+		inner = _nested.get((origin, parent))
+
+		if inner is None:
+			inner = matcher.extend(parent, read_ignore(os.path.join(origin, parent)))
+			_nested[(origin, parent)] = inner
+
+		matcher = inner
+
+	return matcher
+
+def resolve(origin: str = "", rp: str = "", is_dir: bool = False):
+	"""Checks one path exactly like a walk from origin would.
+
+	Args:
+		origin (str): Path to the walk's root.
+		rp (str): Relative path from origin.
+		is_dir (bool): Whether the path itself is a directory.
+
+	Returns:
+		bool: True if a walk from origin would skip the path.
+	"""
+	matcher = governing(origin, rp)
+
+	return matcher is None or matcher.ignores(rp, is_dir)
@@ -1,25 +1,37 @@
 """Management and interactions with the index.
 
-Sqlite3 database w.files' ctimes, 
-sizes, and path. Used to detect
+Sqlite3 database w.files' mtimes & ctimes (ns),
+sizes, inodes, devices, and path. Used to detect
 files that were changed or touched.
 """
 
+from __future__ import annotations
+
 import os
 import sys
+import json
+import stat
 import time
-import shutil
 import logging
+import threading
 import subprocess
+from itertools import batched
 from datetime import datetime, UTC
 
-import xxhash
 import sqlite3
 
-from rosa.confs import SINIT, CVERSION, BLACKLIST
+from rosa.confs import SINIT, CVERSION, HASH_ALGO
+from rosa.lib.ignore import is_ignored, rules, governing, resolve
+from rosa.lib.walker import walk, survey, share, park, fanout
+from rosa.lib.journal import journal_state, pending, settle, arm
+from rosa.lib.ledger import Ledger, BLOCK, blocks
+from rosa.lib.dispatch import phones
+from rosa.lib.hashing import hash_file, hash_files, pool_map, ingest, classify, use, DEFAULT, HEAD
 
 logger = logging.getLogger('rosa.log')
 
+LOOKUP: int = 1000 # relative paths per 'WHERE rp IN (...)' query
+
 def _config():
 	"""Makes the directory for the index & path for SQLite database connection.
 
@@ -38,142 +50,156 @@ def _config():
 
 	return index
 
-def is_ignored(_str: str = ""):
-	"""Checks file paths for blocked parents & files."""
-	return any(blckd in _str for blckd in BLACKLIST)
+STAMP: str = "mtime_ns, ctime_ns, size, ino, dev" # records' columns matching stamp()
 
 def construct(sconn: sqlite3 | None = None):
 	"""Makes the SQLite tables inside the database."""
 	sconn.executescript(SINIT)
 
-def copier(origin: str = "", originals: str = ""):
-	"""Backs up the current directory to the index with the 'cp -r' unix command.
+def stamp(stats: os.stat_result = None):
+	"""Integer metadata compared between the disk & the index.
 
 	Args:
-		origin (str): Path to the source directory.
-		originals (str): Path to the 'originals' directory.
+		stats (os.stat_result): A file's stat.
 
 	Returns:
-		None
+		stamp (tuple): st_mtime_ns, st_ctime_ns, st_size, st_ino, st_dev.
 	"""
-	os.makedirs(originals, exist_ok=True)
+	return (stats.st_mtime_ns, stats.st_ctime_ns, stats.st_size, stats.st_ino, stats.st_dev)
 
-	for obj in os.scandir(origin):
-		if not is_ignored(obj.path):
-			destination: str = os.path.join(originals, obj.name)
-
-			if obj.is_dir(): # root level directories
-				shutil.copytree(obj, destination)
-
-			elif obj.is_file(): # root level files
-				# shutil.copy2(obj, destination)
-				shutil.copyfile(obj, destination)
-
-def r(dir_: str = ""):
-	"""Recursive function for files & directory paths.
+def local_algo(sconn: sqlite3 | None = None):
+	"""Reads the index's hash algorithm and switches hashing over to it.
 
 	Args:
-		dir_ (str): Path to a directory.
+		sconn (sqlite3): Index's connection object.
 
-	Yields:
-		obj (str): Path to an entry found.
+	Returns:
+		algo (str): The algorithm's name (xxh64 for indexes that predate the setting).
 	"""
-	for obj in os.scandir(dir_):
-		yield obj.path
+	row: tuple = sconn.execute("SELECT value FROM settings WHERE name = 'hash_algo';").fetchone()
+	algo: str = row[0] if row else DEFAULT
 
-		if os.path.isdir(obj):
-			yield from _r(obj.path)
+	use(algo)
 
-		else:
-			yield obj.path
+	return algo
 
-def _r(dir_: str = ""):
-	"""Recursive function for files.
+def record_algo(sconn: sqlite3 | None = None, algo: str = ""):
+	"""Records the index's hash algorithm.
 
 	Args:
-		dir_ (str): Path to a directory.
+		sconn (sqlite3): Index's connection object.
+		algo (str): The algorithm's name.
 
-	Yields:
-		obj (str): A file object found.
+	Returns:
+		None
 	"""
-	for obj in os.scandir(dir_):
+	sconn.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('hash_algo', ?);", (algo,))
 
-		if os.path.isdir(obj):
-			yield from _r(obj.path)
-
-		else:
-			yield obj.path
-
-def _rd(dirx: str = ""):
-	"""Recursive function for finding directories.
+def rehash_index(sconn: sqlite3 | None = None, originals: str = "", algo: str = ""):
+	"""Re-hashes every record from the 'originals' copies (the committed content).
 
 	Args:
-		dirx (str): Path to the given directory.
-	
-	Yields:
-		d.path (str): A directory's path.
+		sconn (sqlite3): Index's connection object.
+		originals (str): Path to the 'originals' directory.
+		algo (str): The algorithm to migrate to.
+
+	Returns:
+		None
 	"""
-	for d in os.scandir(dirx):
+	query: str = "UPDATE records SET hash = ? WHERE rp = ?;"
+	rps: list = [rp for (rp,) in sconn.execute("SELECT rp FROM records;")]
 
-		if d.is_dir():
-			yield d.path
+	def rehash(rp: str = ""):
+		"""Hashes one original; a missing copy leaves the hash for backfill()."""
+		try:
+			return hash_file(os.path.join(originals, rp), algo)
+		except FileNotFoundError:
+			return None
+
+	for chunk in batched(rps, LOOKUP):
+		hashes: list = pool_map(rehash, list(chunk))
+		sconn.executemany(query, list(zip(hashes, chunk)))
 
-			yield from _rd(d.path)
+	record_algo(sconn, algo)
+	use(algo)
 
-def _surveyor(origin: str = ""):
-	"""Collects metadata for initial indexing.
+def upkeep(sconn: sqlite3 | None = None, core: str = ""):
+	"""Brings an older index up to the current schema.
+
+	Creates missing tables, adds the (initially empty) local hash column,
+	and moves 'records' from the float ctime &
+	scaled 'bytes' columns to integer stamps. A record whose old ctime
+	& size still match the file (unchanged by the old rules) takes the
+	file's current stamp; anything else keeps a stamp that can't match,
+	so it gets hash-verified on the next diff.
 
 	Args:
-		origin (str): Path pointing to the requested directory.
+		sconn (sqlite3): Index's connection object.
+		core (str): Source directory.
 
 	Returns:
-		inventory (list): Tupled relative paths, st_ctimes, and st_sizes for every file found.
+		None
 	"""
-	prefix: int = len(origin) + 1
+	columns: list = [row[1] for row in sconn.execute("PRAGMA table_info(records);")]
 
-	inventory: list = []
-
-	for file in _r(origin):
-		if not is_ignored(file):
-			rp: str = file[prefix:]
+	if columns and "bytes" not in columns and "hash" not in columns:
+		sconn.execute("ALTER TABLE records ADD COLUMN hash BLOB;") # filled in from the server as files get verified
 
-			stats = os.stat(file)
+	if "bytes" not in columns:
+		construct(sconn)
+		return
 
-			ctime: int = stats.st_ctime
-			size: int = stats.st_size*(10**7)
+	logger.info('migrating the index to integer metadata...')
+	sconn.executescript("""
+		ALTER TABLE records RENAME TO records_v1;
+		DROP INDEX IF EXISTS rps;
+	""")
+	construct(sconn)
 
-			inventory.append((rp, ctime, size))
+	query: str = f"INSERT INTO records (id, rp, original_version, from_version, {STAMP}, track) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
+	rows: list = []
 
-	return inventory
+	for _id, rp, original_version, from_version, ctime, size, track in sconn.execute("SELECT id, rp, original_version, from_version, ctime, bytes, track FROM records_v1;"):
+		try:
+			stats = os.stat(os.path.join(core, rp))
+		except (FileNotFoundError, NotADirectoryError):
+			stats = None
 
-def _survey(origin: str = "", version: int = None):
-	"""Collects metadata for initial indexing but includes versions for the index.
-	
-	Args:
-		origin (str): Path to the requested directory.
-		version (int): Current version for the index.
-	
-	Returns:
-		inventory (list): Tupled relative pats, versions, st_ctimes and st_sizes for all the files found.
-	"""
-	inventory: list = []
+		if stats and stats.st_ctime == ctime and stats.st_size*(10**7) == size:
+			new: tuple = stamp(stats)
+		else:
+			new: tuple = (0, int(ctime*(10**9)), size // (10**7), 0, 0)
 
-	prefix: int = len(origin) + 1
+		rows.append((_id, rp, original_version, from_version, *new, track))
 
-	for file in _r(origin):
-		if not is_ignored(file.path):
-			rp: str = file.path[prefix:]
+	sconn.executemany(query, rows)
+	sconn.execute("DROP TABLE records_v1;")
 
-			stats = os.stat(file)
+def _r(dir_: str = ""):
+	"""Recursive function for files.
 
-			ctime: int = stats.st_ctime
-			size: int = stats.st_size*(10**7)
+	Args:
+		dir_ (str): Path to a directory.
 
-			track: str = encoding(file.path)
+	Yields:
+		obj (str): A file's path.
+	"""
+	for obj in walk(dir_):
+		if not obj.is_dir():
+			yield obj.path
 
-			inventory.append((rp, version, version, ctime, size, track))
+def _rd(dirx: str = ""):
+	"""Recursive function for finding directories.
 
-	return inventory
+	Args:
+		dirx (str): Path to the given directory.
+	
+	Yields:
+		d.path (str): A directory's path.
+	"""
+	for d in walk(dirx):
+		if d.is_dir():
+			yield d.path
 
 def encoding(obj: str = ""):
 	"""Checks if the first mb of a file can be encoded in utf-8.
@@ -184,33 +210,22 @@ def encoding(obj: str = ""):
 	Returns:
 		utf (str): Single-character string: "T" or "F".
 	"""
-	utf: str = "T"
-
 	with open(obj, 'rb') as f:
-		raw: bytes = f.read(1024*1024)
+		raw: bytes = f.read(HEAD)
 
-	try:
-		raw.decode('utf-8')
-	except UnicodeDecodeError:
-		utf: str = "F"
-	
-	return utf
+	return classify(raw)
 
-def _dsurvey(origin: str = ""):
+def _dsurvey(origin: str = "", parked: dict = None):
 	"""Collects the subdirectories within the requested directory.
 
 	Args:
 		origin (str): Path to the requested directory.
+		parked (dict): Optional halves parked by this scan's query_index.
 
 	Returns:
 		ldrps (list): Relative paths of every directory found.
 	"""
-	pfx: int = len(origin) + 1
-	ldrps: list = []
-
-	for obj in _rd(origin):
-		if not is_ignored(obj):
-			ldrps.append(obj[pfx:])
+	ldrps: list = share(origin, "dirs", rules(origin), parked=parked)
 
 	return ldrps
 
@@ -222,9 +237,9 @@ def _surveyorx(origin: str = "", rps: list = []):
 		rps (list): Relative paths of all the altered files.
 
 	Returns:
-		inventory (list): Tupled st_ctimes, st_sizes and relative paths of every file path in rps.
+		inventory (list): Tupled stamps and relative paths of every file path in rps.
 	"""
-	query: str = "UPDATE records SET ctime = ?, bytes = ? WHERE rp = ?;"
+	query: str = "UPDATE records SET mtime_ns = ?, ctime_ns = ?, size = ?, ino = ?, dev = ? WHERE rp = ?;"
 	inventory: list = []
 
 	for rp in rps:
@@ -232,10 +247,7 @@ def _surveyorx(origin: str = "", rps: list = []):
 
 		stats = os.stat(fp)
 
-		ctime: int = stats.st_ctime
-		size: int = stats.st_size *(10**7)
-
-		inventory.append((ctime, size, rp))
+		inventory.append((*stamp(stats), rp))
 
 	return query, inventory
 
@@ -257,43 +269,170 @@ def historian(sconn: sqlite3 | None = None, version: int = None, message: str =
 
 	sconn.execute(x, values)
 
-def _formatter(origin: str = ""):
-	"""Builds a dictionary of indexed st_ctimes and st_sizes for every file found.
+def _formatter(origin: str = "", sconn: sqlite3 | None = None, dirs: list = None):
+	"""Streams the stamp of every file found, in relative-path order.
+
+	With the index's connection, the walk reuses and refreshes the dirstate
+	one directory at a time (see Dirstate).
 
 	Args:
 		origin (str): Path to the requested directory.
+		sconn (sqlite3): Optional index's connection object.
+		dirs (list): Optional list collecting the directories passed on the way.
 
-	Returns:
-		rollcall (dict): Relative paths keyed to each files' st_ctime and st_size.
+	Yields:
+		rp (str): A file's relative path.
+		stamp (tuple): The file's stamp.
 	"""
-	inventory: list = _surveyor(origin)
-	rollcall: dict = {rp:(ctime, size) for rp, ctime, size in inventory}
+	state = Dirstate(sconn) if sconn else None
+
+	try:
+		for rp, stats in fanout(origin, rules(origin), state, state):
+			if stats is None:
+				if dirs is not None:
+					dirs.append(rp)
+
+				if state:
+					state.flush()
+				continue
+
+			yield rp, stamp(stats)
+
+		if state:
+			state.flush(True)
+
+	finally:
+		if state:
+			state.close()
+
+class Dirstate:
+	"""The index's dirstate, looked up per directory & written back in batches.
+
+	Stands in for both of the walker's cached & seen dicts. Scan
+	threads can't share the index's connection, so each one reads
+	through its own; what they observe is queued and written through
+	the index's connection by flush(). When a re-listed directory lost
+	subdirectories, their rows (& everything beneath) are dropped.
+
+	Attributes:
+		sconn (sqlite3): Index's connection object.
+		fp (str): Path to the index's database file.
+		fresh (list): Listings waiting to be written.
+		gone (list): Directories whose rows wait to be dropped.
+	"""
+	def __init__(self, sconn: sqlite3 | None = None):
+		"""Holds the connection; readers for other threads open on demand."""
+		self.sconn = sconn
+		self.fp: str = sconn.execute("PRAGMA database_list;").fetchone()[2]
+
+		self.owner: int = threading.get_ident()
+		self.local = threading.local()
+		self.lock = threading.Lock()
+		self.readers: list = []
+
+		self.fresh: list = []
+		self.gone: list = []
+
+	def _reader(self):
+		"""This thread's connection for lookups."""
+		if threading.get_ident() == self.owner:
+			return self.sconn
+
+		reader = getattr(self.local, "sconn", None)
+
+		if reader is None:
+			reader = sqlite3.connect(self.fp, timeout=30, check_same_thread=False) # closed by close(), from the owner
+			self.local.sconn = reader
+
+			with self.lock:
+				self.readers.append(reader)
+
+		return reader
+
+	def get(self, rp: str = ""):
+		"""Looks up one directory's recorded (st_mtime_ns, [(name, is_dir), ...]); None if unknown."""
+		query: str = "SELECT mtime, entries FROM dirstate WHERE rp = ?;"
+
+		row: tuple = self._reader().execute(query, (rp,)).fetchone()
+
+		if row is None:
+			self.local.last = None
+			return None
+
+		hit: tuple = (row[0], json.loads(row[1]))
+		self.local.last = (rp, hit[1])
 
-	return rollcall
+		return hit
+
+	def __setitem__(self, rp: str = "", state: tuple = None):
+		"""Queues a re-scanned listing (None marks a cache hit, which needs no write)."""
+		if state is None:
+			return
+
+		mtime, entries = state
+		last: tuple = getattr(self.local, "last", None)
+
+		lost: list = []
+		if last and last[0] == rp:
+			kept: set = {name for name, is_dir in entries if is_dir}
+			lost = [f"{rp}/{name}" if rp else name for name, is_dir in last[1] if is_dir and name not in kept]
+
+		with self.lock:
+			self.fresh.append((rp, mtime, json.dumps(entries)))
+			self.gone += lost
+
+	def flush(self, force: bool = False):
+		"""Writes the queued listings once a batch is waiting (or whatever is left, with force)."""
+		query: str = "INSERT OR REPLACE INTO dirstate (rp, mtime, entries) VALUES (?, ?, ?);"
+		xquery: str = "DELETE FROM dirstate WHERE rp = ? OR substr(rp, 1, ?) = ?;"
+
+		with self.lock:
+			if not force and len(self.fresh) + len(self.gone) < LOOKUP:
+				return
+
+			fresh, self.fresh = self.fresh, []
+			gone, self.gone = self.gone, []
+
+		if gone:
+			self.sconn.executemany(xquery, [(rp, len(rp) + 1, rp + "/") for rp in gone])
+		if fresh:
+			self.sconn.executemany(query, fresh)
+
+	def close(self):
+		"""Closes the scan threads' connections."""
+		with self.lock:
+			readers, self.readers = self.readers, []
+
+		for reader in readers:
+			reader.close()
 
 def get_records(sconn: sqlite3 | None = None):
-	"""Builds a dictionary of indexed files' st_ctimes and st_sizes.
+	"""Streams indexed files' stamps in relative-path order.
 
 	Args:
 		sconn (sqlite3): Index's connection object.
 
-	Returns:
-		infrc_records (dict): Relative path keyed to each files' st_ctime and st_size.
+	Yields:
+		rp (str): An indexed file's relative path.
+		stamp (tuple): The file's indexed stamp.
 	"""
-	query: str = "SELECT rp, ctime, bytes FROM records;"
-
-	records: list = sconn.execute(query).fetchall()
-	index_records: dict = {rp:(ctime, size) for rp, ctime, size in records}
+	query: str = f"SELECT rp, {STAMP} FROM records ORDER BY rp;"
 
-	return index_records
+	for rp, *rest in sconn.execute(query):
+		yield rp, tuple(rest)
 
-def init_index(sconn: sqlite3 | None = None, origin: str = "", parent: str = ""):
+def init_index(sconn: sqlite3 | None = None, parent: str = "", files: list = [], drps: list = [], staged: dict = {}):
 	"""Initiates a new index.
 
+	Nothing's read here: the originals were written & the hashes
+	taken from the same read that uploaded each file (see init_remote).
+
 	Args:
 		sconn (sqlite3): Index's connection object.
-		origin (str): Target directory.
 		parent (str): Index's parent directory.
+		files (list): Tupled relative paths & stats from the init's scrape.
+		drps (list): Relative paths of every directory (the originals get the empty ones too).
+		staged (dict): Relative paths keyed to (hash, track, size), from init_remote.
 
 	Returns:
 		None
@@ -302,11 +441,16 @@ def init_index(sconn: sqlite3 | None = None, origin: str = "", parent: str = "")
 	version: int = 0
 
 	originals: str = os.path.join(parent, "originals")
-	copier(origin, originals) # backup created first
+	os.makedirs(originals, exist_ok=True)
+
+	for rp in drps:
+		os.makedirs(os.path.join(originals, rp), exist_ok=True)
+
+	record_algo(sconn, HASH_ALGO) # what init_remote uploaded with
 
-	query: str = "INSERT INTO records (rp, original_version, from_version, ctime, bytes, track) VALUES (?, ?, ?, ?, ?, ?);"
+	query: str = f"INSERT INTO records (rp, original_version, from_version, {STAMP}, track, hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
 
-	inventory: list = _survey(origin, version) # collect current files' metadata
+	inventory: list = [(rp, version, version, *stamp(stats), staged[rp][1], staged[rp][0]) for rp, stats in files]
 	sconn.executemany(query, inventory)
 
 	historian(sconn, version, message) # load the version into the local records table
@@ -328,12 +472,93 @@ def init_dindex(sconn: sqlite3 | None = None, drps: list = []):
 
 	sconn.executemany(query, values)
 
-def qfdiffr(index_records: dict = {}, real_stats: dict = {}):
+def _scoped(sconn: sqlite3 | None = None, core: str = "", files: set = set(), dirs: set = set()):
+	"""Collects real & indexed metadata for only the journaled paths.
+
+	Journaled directories are re-walked (their subtrees could have
+	been created, moved or deleted wholesale); files are stat'd.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		core (str): Source directory.
+		files (set): Journaled files' relative paths.
+		dirs (set): Journaled directories' relative paths.
+
+	Returns:
+		None if the source directory itself was journaled (walk everything), else:
+			real_stats (Ledger): Actual stamps within the scope.
+			index_records (Ledger): Indexed stamps within the scope.
+			real_dirs (set): Actual directories within the scope.
+			index_dirs (set): Indexed directories within the scope.
+	"""
+	if "" in dirs:
+		return None
+
+	real_stats = Ledger()
+	index_records = Ledger()
+	real_dirs: set = set()
+	index_dirs: set = set()
+
+	rquery: str = f"SELECT rp, {STAMP} FROM records WHERE rp = ?;"
+	rrange: str = f"SELECT rp, {STAMP} FROM records WHERE rp > ? AND rp < ?;"
+	dquery: str = "SELECT rp FROM directories WHERE rp = ? OR (rp > ? AND rp < ?);"
+
+	def beneath(rp: str = ""):
+		"""Whether a journaled directory above rp already covers it."""
+		parts: list = rp.split("/")
+		return any("/".join(parts[:i]) in dirs for i in range(1, len(parts)))
+
+	dirs = {d for d in dirs if not beneath(d)} # a nested directory is re-walked with its ancestor; twice would duplicate its entries
+
+	for d in dirs:
+		lo: str = d + "/"
+		hi: str = d + "0" # '0' follows '/'; covers everything beneath d
+
+		for rp, *rest in sconn.execute(rrange, (lo, hi)):
+			index_records.append(rp, tuple(rest))
+
+		index_dirs.update(rp for (rp,) in sconn.execute(dquery, (d, lo, hi)))
+
+		matcher = governing(core, d)
+
+		if matcher is None or matcher.ignores(d, True) or not os.path.isdir(os.path.join(core, d)):
+			continue
+
+		real_dirs.add(d)
+
+		found, drps = survey(core, matcher, None, None, d)
+		real_dirs.update(drps)
+
+		for rp, stats in found:
+			real_stats.append(rp, stamp(stats))
+
+	for rp in files:
+		if beneath(rp):
+			continue # re-walked with its directory
+
+		record: tuple = sconn.execute(rquery, (rp,)).fetchone()
+		if record:
+			index_records.append(rp, tuple(record[1:]))
+
+		if resolve(core, rp):
+			continue
+
+		try:
+			stats = os.stat(os.path.join(core, rp))
+		except (FileNotFoundError, NotADirectoryError):
+			continue
+
+		if not stat.S_ISDIR(stats.st_mode):
+			real_stats.append(rp, stamp(stats))
+
+	return real_stats, index_records, real_dirs, index_dirs
+
+def qfdiffr(index_records: Ledger = None, real_stats: Ledger = None):
 	"""Compares the indexed vs actual files & their metadata.
 
 	Args:
-		index_records (dict): Relative paths key paired to each file's st ctime & size.
-		real_stats (dict): Relative paths key paired to each file's st ctime & size.
+		index_records (Ledger): Relative paths & each file's indexed stamp.
+		real_stats (Ledger): Relative paths & each file's actual stamp.
 
 	Returns:
 		new (list): Files created since the last commitment.
@@ -341,34 +566,86 @@ def qfdiffr(index_records: dict = {}, real_stats: dict = {}):
 		diffs (list): Files whose metadata differs.
 		unchanged (list): Unaltered files.
 	"""
-	all_indexes: set = set(index_records.keys())
-	all_files: set = set(real_stats.keys())
+	return index_records.compare(real_stats)
 
-	deleted: set = all_indexes - all_files
-	new: set = all_files - all_indexes
+def mergediff(index_records = (), real_stats = (), keep: bool = True):
+	"""Compares the indexed vs actual files over two path-ordered streams.
 
-	remaining: set = all_indexes & all_files
+	Both streams are read a block at a time into columnar Ledgers.
+	Each round compares everything up to the smaller of the two
+	blocks' last paths and carries the rest over, so memory stays
+	at a couple of blocks whatever the tree's size.
+
+	Args:
+		index_records (iterable): Tupled relative paths & indexed stamps, ordered by path.
+		real_stats (iterable): Tupled relative paths & actual stamps, ordered by path.
+		keep (bool): Whether to collect the unaltered files (skipped when only the changes matter).
 
+	Returns:
+		new (list): Files created since the last commitment.
+		deleted (list): Files deleted since the last commitment.
+		diffs (list): Files whose metadata differs.
+		unchanged (list): Unaltered files (empty if not kept).
+	"""
+	new: list = []
+	deleted: list = []
 	diffs: list = []
-	for rp in remaining:
-		if index_records[rp][0] != real_stats[rp][0]:
-			diffs.append(rp)
+	unchanged: list = []
+
+	indexed = iter(index_records)
+	real = iter(real_stats)
+
+	iledger = Ledger()
+	rledger = Ledger()
+	idone: bool = False
+	rdone: bool = False
+
+	while True:
+		if not idone and len(iledger) < BLOCK:
+			fresh = blocks(indexed)
+			idone = len(fresh) < BLOCK
+			iledger.join(fresh)
+
+		if not rdone and len(rledger) < BLOCK:
+			fresh = blocks(real)
+			rdone = len(fresh) < BLOCK
+			rledger.join(fresh)
+
+		if idone and rdone:
+			bound: str = None
+		elif idone:
+			bound: str = rledger.rps[-1]
+		elif rdone:
+			bound: str = iledger.rps[-1]
+		else:
+			bound: str = min(iledger.rps[-1], rledger.rps[-1])
+
+		ihead, iledger = iledger.split(bound)
+		rhead, rledger = rledger.split(bound)
+
+		n, d, a, u = ihead.compare(rhead, keep)
 
-		elif index_records[rp][1] != real_stats[rp][1]:
-			diffs.append(rp)
+		new += n
+		deleted += d
+		diffs += a
+		unchanged += u
 
-	diffs_: set = set(diffs)
-	unchanged: set = remaining - diffs_
+		if idone and rdone:
+			break
 
-	return list(new), list(deleted), diffs, list(unchanged)
+	return new, deleted, diffs, unchanged
 
-def query_index(conn: MySQL | None = None, sconn: sqlite3 | None = None, core: str = ""):
+def query_index(sconn: sqlite3 | None = None, core: str = "", keep: bool = True, parked: dict = None):
 	"""Finds file discrepancies between indexed and actual files.
 
+	Runs against the index alone; the server is only called for
+	records that predate the local hash column.
+
 	Args:
-		conn (mysql): Server's connection object.
 		sconn (sqlite3): Index's connection object.
 		core (str): Source directory.
+		keep (bool): Whether to list the unaltered files (False when only the changes are reported).
+		parked (dict): Optional; collects the directories found for query_dindex.
 
 	Returns:
 		new (list): Files created since the last commitment.
@@ -380,12 +657,42 @@ def query_index(conn: MySQL | None = None, sconn: sqlite3 | None = None, core: s
 	diff: bool = False
 	remaining: list = []
 
-	real_stats: dict = _formatter(core)
-	index_records: dict = get_records(sconn)
+	upkeep(sconn, core) # older indexes predate the dirstate & journal tables and integer stamps
+	local_algo(sconn)
+
+	watching, valid, upto = journal_state(sconn)
+	scoped: tuple = None
+
+	if valid:
+		files, dirs = pending(sconn, upto)
+		scoped = _scoped(sconn, core, files, dirs)
+
+	if scoped:
+		logger.debug('diffing the journaled paths only')
+		real_stats, index_records, real_dirs, index_dirs = scoped
+
+		new, deleted, diffs, remaining = qfdiffr(index_records, real_stats)
+
+		if keep is True:
+			scope: set = set(index_records.rps)
+			remaining += [rp for (rp,) in sconn.execute("SELECT rp FROM records;") if rp not in scope]
+
+		drps: list = [rp for (rp,) in sconn.execute("SELECT rp FROM directories;") if rp not in index_dirs]
+		park(parked, "dirs", drps + list(real_dirs)) # for query_dindex
+
+		settle(sconn, upto, new + deleted + diffs, list(real_dirs ^ index_dirs))
+
+	else:
+		drps: list = []
+
+		new, deleted, diffs, remaining = mergediff(get_records(sconn), _formatter(core, sconn, drps), keep)
+
+		park(parked, "dirs", drps) # for query_dindex
 
-	new: list, deleted: list, diffs: list, remaining: list = qfdiffr(index_records, real_stats)
+		if watching:
+			arm(sconn, upto)
 
-	failed: list, succeeded: list = verification(conn, diffs, core)
+	failed, succeeded = verification(sconn, diffs, core)
 
 	passed: list = remaining + succeeded
 
@@ -394,11 +701,161 @@ def query_index(conn: MySQL | None = None, sconn: sqlite3 | None = None, core: s
 
 	return new, deleted, failed, passed, diff
 
-def verification(conn: MySQL | None or None, diffs: list = [], origin: str = ""):
-	"""Checks actual vs. recorded hash for files with metadata discrepancies.
+def remote_hashes(conn: MySQL | None = None, rps: list = []):
+	"""Fetches the server's recorded hashes, a chunk of paths per query.
 
 	Args:
 		conn (mysql): Server's connection object.
+		rps (list): Relative paths to look up.
+
+	Returns:
+		rhashes (dict): Relative paths keyed to their recorded hash (None if absent).
+	"""
+	rhashes: dict = dict.fromkeys(rps)
+
+	with conn.cursor() as cursor:
+		for chunk in batched(rhashes, LOOKUP):
+			marks: str = ", ".join(["%s"] * len(chunk))
+			query: str = f"SELECT rp, hash FROM files WHERE rp IN ({marks});"
+
+			cursor.execute(query, chunk)
+
+			for rp, rhash in cursor.fetchall():
+				rhashes[rp] = rhash
+
+	return rhashes
+
+def pair_moves(sconn: sqlite3 | None = None, core: str = "", new: list = [], deleted: list = []):
+	"""Pairs deleted & new files that hold the same content under a new path.
+
+	A new file sharing a deleted record's inode & device is tried
+	first; otherwise deleted records of the same size are. A pair only
+	counts if the new file's hash matches the deleted one's recorded
+	hash, so whole moved subtrees pair file by file.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		core (str): Source directory.
+		new (list): Files created since the last commitment.
+		deleted (list): Files deleted since the last commitment.
+
+	Returns:
+		moves (list): Tupled (previous, current) relative paths of moved files.
+		new (list): New files that aren't moves.
+		deleted (list): Deleted files that aren't moves.
+	"""
+	if not new or not deleted:
+		return [], new, deleted
+
+	query: str = "SELECT size, ino, dev FROM records WHERE rp = ?;"
+
+	by_inode: dict = {}
+	by_size: dict = {}
+
+	for rp in deleted:
+		size, ino, dev = sconn.execute(query, (rp,)).fetchone()
+
+		if ino:
+			by_inode[(dev, ino)] = rp
+		by_size.setdefault(size, []).append(rp)
+
+	candidates: dict = {}
+
+	for rp in new:
+		try:
+			stats = os.stat(os.path.join(core, rp))
+
+		except FileNotFoundError:
+			logger.debug(f"{rp} vanished before it could be paired; leaving it out")
+			continue
+
+		twin: str = by_inode.get((stats.st_dev, stats.st_ino))
+
+		if twin:
+			candidates[rp] = [twin] + [c for c in by_size.get(stats.st_size, []) if c != twin]
+		elif stats.st_size in by_size:
+			candidates[rp] = by_size[stats.st_size]
+
+	if not candidates:
+		return [], new, deleted
+
+	needed: set = {c for cs in candidates.values() for c in cs}
+	records: dict = recorded(sconn, list(needed))
+
+	rhashes: dict = {rp:_hash for rp, (size, _hash) in records.items()}
+	rhashes.update(backfill(sconn, [rp for rp, _hash in rhashes.items() if _hash is None]))
+
+	moves: list = []
+	taken: set = set()
+
+	lhashes: list = hash_files([os.path.join(core, rp) for rp in candidates])
+
+	for (rp, cs), lhash in zip(candidates.items(), lhashes):
+		for c in cs:
+			if c not in taken and rhashes.get(c) == lhash:
+				moves.append((c, rp))
+				taken.add(c)
+				break
+
+	moved: set = {rp for _, rp in moves}
+
+	new = [rp for rp in new if rp not in moved]
+	deleted = [rp for rp in deleted if rp not in taken]
+
+	return moves, new, deleted
+
+def recorded(sconn: sqlite3 | None = None, rps: list = []):
+	"""Reads indexed sizes & hashes, a chunk of paths per query.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		rps (list): Relative paths to look up.
+
+	Returns:
+		records (dict): Relative paths keyed to (size, hash); hash is None for records that predate the column.
+	"""
+	records: dict = {}
+
+	for chunk in batched(rps, LOOKUP):
+		marks: str = ", ".join(["?"] * len(chunk))
+		query: str = f"SELECT rp, size, hash FROM records WHERE rp IN ({marks});"
+
+		for rp, size, _hash in sconn.execute(query, chunk):
+			records[rp] = (size, _hash)
+
+	return records
+
+def backfill(sconn: sqlite3 | None = None, rps: list = []):
+	"""Fetches hashes missing from older indexes from the server, and keeps them.
+
+	The server is only called if something is actually missing.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		rps (list): Relative paths whose records have no hash.
+
+	Returns:
+		rhashes (dict): Relative paths keyed to the server's hash (None if absent).
+	"""
+	if not rps:
+		return {}
+
+	logger.debug(f"fetching {len(rps)} hash[es] the index doesn't have yet...")
+	with phones() as conn:
+		rhashes: dict = remote_hashes(conn, rps)
+
+	query: str = "UPDATE records SET hash = ? WHERE rp = ?;"
+	sconn.executemany(query, [(rhash, rp) for rp, rhash in rhashes.items() if rhash is not None])
+
+	return rhashes
+
+def verification(sconn: sqlite3 | None = None, diffs: list = [], origin: str = ""):
+	"""Checks actual vs. recorded hash for files with metadata discrepancies.
+
+	A file whose size changed has changed; it isn't hashed.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
 		diffs (list): Files with metadata discrepancies.
 		origin (str): The directory to search.
 
@@ -409,46 +866,48 @@ def verification(conn: MySQL | None or None, diffs: list = [], origin: str = "")
 	failed: list = []
 	succeeded: list = []
 
-	local_ids: dict = {}
-	remote_ids: dict = {}
+	records: dict = recorded(sconn, diffs)
 
-	hasher = xxhash.xxh64()
+	hashable: list = []
+	missing: list = []
 
 	for diff in diffs:
-		hasher.reset()
 		fp: str = os.path.join(origin, diff)
+		size, _hash = records[diff]
 
-		with open(fp, 'rb') as f:
-			content: bytes = f.read()
+		if os.stat(fp).st_size != size:
+			failed.append(diff)
+			continue
 
-		hasher.update(content)
-		_hash: bytes = hasher.digest()
+		hashable.append(diff)
 
-		local_ids[diff] = _hash
+		if _hash is None:
+			missing.append(diff)
 
-	query: str = "SELECT hash FROM files WHERE rp = %s;"
+	local_ids: dict = dict(zip(hashable, hash_files([os.path.join(origin, diff) for diff in hashable])))
 
-	with conn.cursor() as cursor:
-		for diff in diffs:
-			cursor.execute(query, (diff,))
-			rhash: bytes = cursor.fetchone()
+	rhashes: dict = backfill(sconn, missing)
 
-			remote_ids[diff] = rhash
+	for diff, lhash in local_ids.items():
+		_hash: bytes = records[diff][1]
 
-	for diff in diffs:
-		if remote_ids[diff][0] != local_ids[diff]:
+		if _hash is None:
+			_hash = rhashes[diff]
+
+		if _hash != lhash:
 			failed.append(diff)
 		else:
 			succeeded.append(diff)
 
 	return failed, succeeded
 
-def query_dindex(sconn: MySQL | None = None, core: str = ""):
+def query_dindex(sconn: MySQL | None = None, core: str = "", parked: dict = None):
 	"""Checks the actual directories against recorded.
 
 	Args:
 		sconn (sqlite3): Index's connection object.
 		core (str): Source directory.
+		parked (dict): Optional; the directories query_index found this scan.
 
 	Returns:
 		newd (list): Directories created since the last recorded commitment.
@@ -459,7 +918,7 @@ def query_dindex(sconn: MySQL | None = None, core: str = ""):
 	idrps: list = sconn.execute(query).fetchall()
 	xdrps: list = [i[0] for i in idrps]
 
-	ldrps: list = _dsurvey(core)
+	ldrps: list = _dsurvey(core, parked)
 
 	index_dirs: set = set(xdrps)
 	real_dirs: set = set(ldrps)
@@ -498,7 +957,7 @@ def version_check(conn: MySQL | None = None, sconn: sqlite3 | None = None):
 
 	return vok, lc_version
 
-def local_audit_(sconn: sqlite3 | None = None, core: str = "", new: list = [], diffs: list = [], remaining: list = [], version: int = None, secure: tuple = ()):
+def local_audit_(sconn: sqlite3 | None = None, core: str = "", new: list = [], diffs: list = [], remaining: list = [], version: int = None, secure: tuple = (), moves: list = []):
 	"""Reverts the current directory back to the latest locally recorded commit.
 
 	Args:
@@ -509,13 +968,14 @@ def local_audit_(sconn: sqlite3 | None = None, core: str = "", new: list = [], d
 		remaining (list): Unaltered files.
 		version (int): Current version.
 		secure (Tuple): Contains the two paths to tmp & backup directories.
+		moves (list): Tupled (previous, current) relative paths of moved files.
 
 	Returns:
 		None
 	"""
 	logger.debug('auditing the local index')
 
-	tmpd: str, backup: str = secure
+	tmpd, backup = secure
 
 	inew: list = []
 	idiffs: list = []
@@ -523,9 +983,9 @@ def local_audit_(sconn: sqlite3 | None = None, core: str = "", new: list = [], d
 	logger.debug('recreating original\'s directory tree')
 	prefix: int = len(backup) + 1
 
-	for dirs in _rd(backup):
-		if not is_ignored(dirs):
-			rp: str = dirs[prefix:]
+	for dirs in walk(backup, rules(core)):
+		if dirs.is_dir():
+			rp: str = dirs.path[prefix:]
 			ndir: str = os.path.join(tmpd, rp)
 
 			os.makedirs(ndir, exist_ok=True)
@@ -541,6 +1001,8 @@ def local_audit_(sconn: sqlite3 | None = None, core: str = "", new: list = [], d
 
 			os.link(origin, destin)
 
+	if moves:
+		xxmoved(sconn, moves, core, tmpd, backup)
 	if new:
 		inew: list = xxnew(new, core, version, tmpd)
 	if diffs:
@@ -548,6 +1010,35 @@ def local_audit_(sconn: sqlite3 | None = None, core: str = "", new: list = [], d
 
 	index_audit(sconn, inew, idiffs)
 
+def xxmoved(sconn: sqlite3 | None = None, moves: list = [], origin: str = "", tmpd: str = "", backup: str = ""):
+	"""Moves the originals & index records of moved files to their new paths.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		moves (list): Tupled (previous, current) relative paths.
+		origin (str): The given directory.
+		tmpd (str): The new 'originals' directory.
+		backup (str): The previous 'originals' directory.
+
+	Returns:
+		None
+	"""
+	logger.debug('moving originals of moved files...')
+	query: str = "UPDATE records SET rp = ?, mtime_ns = ?, ctime_ns = ?, size = ?, ino = ?, dev = ? WHERE rp = ?;"
+	values: list = []
+
+	for previous, current in moves:
+		bp: str = os.path.join(backup, previous)
+		destin: str = os.path.join(tmpd, current)
+
+		os.makedirs(os.path.dirname(destin), exist_ok=True)
+		os.link(bp, destin)
+
+		stats = os.stat(os.path.join(origin, current))
+		values.append((current, *stamp(stats), previous))
+
+	sconn.executemany(query, values)
+
 def xxnew(new: list = [], origin: str = "", version: int = None, tmpd: str = ""):
 	"""Backs up new files to the 'originals' directory.
 
@@ -558,23 +1049,22 @@ def xxnew(new: list = [], origin: str = "", version: int = None, tmpd: str = "")
 		tmpd (str): The new directory.
 
 	Returns:
-		inew (list): Tuples containing relative path, 1, 1, version for every new file.
+		inew (list): Tuples containing relative path, stamp, encoding, version (twice), and hash for every new file.
 	"""
 	logger.debug('copying new files over...')
 	inew: list = []
 
 	for rp in new:
-		fp: str = os.path.join(origin, rp)
-		bp: str = os.path.join(tmpd, rp)
+		os.makedirs(os.path.dirname(os.path.join(tmpd, rp)), exist_ok=True)
 
-		os.makedirs(os.path.dirname(bp), exist_ok=True)
-
-		track: str = encoding(fp)
+	def take(rp: str = ""):
+		"""Copies, hashes & classifies one new file in a single read."""
+		return ingest(os.path.join(origin, rp), copy=os.path.join(tmpd, rp))
 
-		# shutil.copy2(fp, bp)
-		shutil.copyfile(fp, bp)
+	for rp, (_, _hash, track, _) in zip(new, pool_map(take, new)):
+		stats = os.stat(os.path.join(origin, rp))
 
-		inew.append((rp, 1, 1, track, version, version))
+		inew.append((rp, *stamp(stats), track, version, version, _hash))
 
 	return inew
 
@@ -588,28 +1078,27 @@ def xxdiff(diffs: list = [], origin: str = "", version: int = None, tmpd: str =
 		tmpd (str): The new directory.
 
 	Returns:
-		idiffs (list): Tuples containing each files' ctime, size, version and relative path.
+		idiffs (list): Tuples containing each files' stamp, version, hash and relative path.
 	"""
 	logger.debug('writing over dated files...')
 	idiff: list = []
 
 	for rp in diffs:
-		fp: str = os.path.join(origin, rp)
 		bp: str = os.path.join(tmpd, rp)
 
 		os.makedirs(os.path.dirname(bp), exist_ok=True)
 
-		with open(fp, 'rb') as m:
-			modified: bytes = m.read()
+		if os.path.exists(bp):
+			os.remove(bp) # may be a hard link to the previous originals
 
-		with open(bp, 'wb') as o:
-			o.write(modified)
+	def take(rp: str = ""):
+		"""Copies & hashes one altered file in a single read."""
+		return ingest(os.path.join(origin, rp), copy=os.path.join(tmpd, rp))
 
-		stats = os.stat(fp)
-		ctime: int = stats.st_ctime
-		size: int = stats.st_size*(10**7)
+	for rp, (_, _hash, _, _) in zip(diffs, pool_map(take, diffs)):
+		stats = os.stat(os.path.join(origin, rp))
 
-		idiff.append((ctime, size, version, rp))
+		idiff.append((*stamp(stats), version, _hash, rp))
 
 	return idiff
 
@@ -618,56 +1107,35 @@ def index_audit(sconn: sqlite3 | None = None, new: list = [], diffs: list = []):
 
 	Args:
 		sconn (sqlite3): Index's connection object.
-		new (list): Tuples containing relative path, 1, 1, version for every new file.
-		diffs (list): Tuples containing the ctime, size, version and relative path of each altered file.
+		new (list): Tuples containing relative path, stamp, encoding, version (twice), and hash for every new file.
+		diffs (list): Tuples containing the stamp, version, hash and relative path of each altered file.
 
 	Returns:
 		None
 	"""
 	if new:
-		query: str = "INSERT INTO records (rp, ctime, bytes, track, original_version, from_version) VALUES (?, ?, ?, ?, ?, ?);"
+		query: str = f"INSERT INTO records (rp, {STAMP}, track, original_version, from_version, hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
 		sconn.executemany(query, new)
 
 	if diffs:
-		query: str = "UPDATE records SET ctime = ?, bytes = ?, from_version = ? WHERE rp = ?;"
+		query: str = "UPDATE records SET mtime_ns = ?, ctime_ns = ?, size = ?, ino = ?, dev = ?, from_version = ?, hash = ? WHERE rp = ?;"
 		sconn.executemany(query, diffs)
 
-def xxdeleted(conn: MySQL | None = None, sconn: sqlite3 | None = None, deleted: list = [], to_version: int = None, secure: tuple = (), dodata: tuple = ()):
-	"""Backs up deleted files to the server; deletes them from the index.
+def xxdeleted(sconn: sqlite3 | None = None, deleted: list = []):
+	"""Deletes deleted files from the index.
+
+	They're archived on the server by technician.rm_remfile, which
+	moves their rows (& content references) from files to deleted.
 
 	Args:
-		conn (mysql): Server's connection object.
 		sconn (sqlite3): Index's connection object.
 		deleted (list): Deleted files' relative paths.
-		to_version (int): Version in wich the given file was deleted.
-		secure (tuple): Temporary and backup directory's paths.
-		dodata (tuple): Relevant deleted data in dictionaries.
 
 	Returns:
 		None
 	"""
-	logger.debug('archiving deleted files...')
-	tmpd: str, backup: str = secure
-
-	dov: dict, dog: dict, trk: dict = dodata
-
-	query: str = "INSERT INTO deleted (rp, original_version, to_version, from_version, content, track) VALUES (%s, %s, %s, %s, %s, %s);"
 	xquery: str = "DELETE FROM records WHERE rp = ?;"
 
-	for rp in deleted:
-		fp: str = os.path.join(backup, rp)
-
-		with open(fp, 'rb') as d:
-			dcontent: bytes = d.read()
-		
-		from_version: int = dov[rp]
-		original_version: int = dog[rp]
-		track: str = trk[rp]
-
-		with conn.cursor(prepared=True) as cursor:
-			deletedx: tuple = (rp, original_version, to_version, from_version, dcontent, track)
-			cursor.execute(query, deletedx)
-
 	data: list = [(rp,) for rp in deleted]
 	sconn.executemany(xquery, data)
 
@@ -719,5 +1187,5 @@ def refresh_index(sconn: sqlite3 | None = None, core: str = "", diffs: list = []
 	Returns:
 		None
 	"""
-	query: str, inventory: list = _surveyorx(core, diffs)
+	query, inventory = _surveyorx(core, diffs)
 	sconn.executemany(query, inventory)
\ No newline at end of file
@@ -0,0 +1,342 @@
+"""Change journal fed by inotify (Linux).
+
+'rosa watch' subscribes to every tracked directory and
+appends the paths it hears about to the index's journal.
+While the journal is valid, diffs only look at those paths;
+an overflow or a dead watcher sends them back to a full walk.
+"""
+
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+import sqlite3
+
+from rosa.confs import SINIT
+from rosa.lib.ignore import rules, resolve, forget, IGNORE_FILE
+from rosa.lib.walker import walk
+
+logger = logging.getLogger('rosa.log')
+
+IN_MODIFY: int = 0x00000002
+IN_ATTRIB: int = 0x00000004
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_FROM: int = 0x00000040
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_DELETE: int = 0x00000200
+IN_DELETE_SELF: int = 0x00000400
+IN_MOVE_SELF: int = 0x00000800
+IN_Q_OVERFLOW: int = 0x00004000
+IN_IGNORED: int = 0x00008000
+IN_ONLYDIR: int = 0x01000000
+IN_ISDIR: int = 0x40000000
+IN_CLOEXEC: int = 0o2000000
+
+MASK: int = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+EVENT = struct.Struct("iIII") # wd, mask, cookie, len
+
+class Inotify:
+	"""Thin ctypes wrapper around the inotify syscalls.
+
+	Attributes:
+		fd (int): The inotify instance's file descriptor.
+	"""
+	def __init__(self):
+		"""Opens an inotify instance."""
+		self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		self.fd: int = self.libc.inotify_init1(IN_CLOEXEC)
+
+		if self.fd < 0:
+			err: int = ctypes.get_errno()
+			raise OSError(err, os.strerror(err))
+
+	def add(self, path: str = ""):
+		"""Watches a directory; returns its watch descriptor."""
+		wd: int = self.libc.inotify_add_watch(self.fd, os.fsencode(path), MASK)
+
+		if wd < 0:
+			err: int = ctypes.get_errno()
+			raise OSError(err, os.strerror(err), path)
+
+		return wd
+
+	def rm(self, wd: int = None):
+		"""Stops watching a descriptor (already-gone watches are fine)."""
+		self.libc.inotify_rm_watch(self.fd, wd)
+
+	def read(self, timeout: float = 1.0):
+		"""Waits up to timeout seconds for events.
+
+		Returns:
+			events (list): Tuples of (wd, mask, cookie, name).
+		"""
+		events: list = []
+
+		ready, _, _ = select.select([self.fd], [], [], timeout)
+		if not ready:
+			return events
+
+		buf: bytes = os.read(self.fd, 256 * 1024)
+		i: int = 0
+
+		while i < len(buf):
+			wd, mask, cookie, length = EVENT.unpack_from(buf, i)
+			i += EVENT.size
+
+			name: str = os.fsdecode(buf[i:i + length].rstrip(b"\0"))
+			i += length
+
+			events.append((wd, mask, cookie, name))
+
+		return events
+
+	def close(self):
+		"""Closes the instance (drops every watch)."""
+		os.close(self.fd)
+
+def alive(pid: int = None):
+	"""Checks whether a process id is still running."""
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return False
+	except PermissionError:
+		return True
+
+	return True
+
+def journal_state(sconn: sqlite3.Connection | None = None):
+	"""Reads the watcher's status from the index.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+
+	Returns:
+		watching (bool): A live watcher has every directory subscribed.
+		valid (bool): The journal covers every change since the last full scan.
+		upto (int): Highest journal id at the time of reading.
+	"""
+	row: tuple = sconn.execute("SELECT pid, valid FROM watcher WHERE id = 1;").fetchone()
+	upto: int = sconn.execute("SELECT COALESCE(MAX(id), 0) FROM journal;").fetchone()[0]
+
+	if not row or not alive(row[0]):
+		return False, False, upto
+
+	return True, bool(row[1]), upto
+
+def pending(sconn: sqlite3.Connection | None = None, upto: int = 0):
+	"""Collects the journaled paths up to a journal id.
+
+	A changed ignore file counts as a change to its whole directory.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		upto (int): Highest journal id to read.
+
+	Returns:
+		files (set): Relative paths of files (or unknowns) to re-check.
+		dirs (set): Relative paths of directories whose subtrees need a re-check.
+	"""
+	files: set = set()
+	dirs: set = set()
+
+	query: str = "SELECT DISTINCT rp, is_dir FROM journal WHERE id <= ?;"
+
+	for rp, is_dir in sconn.execute(query, (upto,)):
+		if is_dir:
+			dirs.add(rp)
+		elif rp.rpartition("/")[2] == IGNORE_FILE:
+			dirs.add(rp.rpartition("/")[0])
+		else:
+			files.add(rp)
+
+	return files, dirs
+
+def settle(sconn: sqlite3.Connection | None = None, upto: int = 0, files: list = [], dirs: list = []):
+	"""Consumes the journal up to upto, keeping only the paths that still differ from the index.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		upto (int): Highest journal id that was read.
+		files (list): Files still new, deleted or altered.
+		dirs (list): Directories still new or deleted.
+
+	Returns:
+		None
+	"""
+	sconn.execute("DELETE FROM journal WHERE id <= ?;", (upto,))
+
+	query: str = "INSERT INTO journal (rp, event, is_dir) VALUES (?, 'M', ?);"
+	rows: list = [(rp, 0) for rp in files] + [(rp, 1) for rp in dirs]
+
+	if rows:
+		sconn.executemany(query, rows)
+
+def arm(sconn: sqlite3.Connection | None = None, upto: int = 0):
+	"""Marks the journal valid after a full scan taken while the watcher was live.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		upto (int): Highest journal id read before the scan began.
+
+	Returns:
+		None
+	"""
+	sconn.execute("DELETE FROM journal WHERE id <= ?;", (upto,))
+	sconn.execute("UPDATE watcher SET valid = 1 WHERE id = 1;")
+
+	logger.debug('journal armed; the next diff only checks what the watcher heard')
+
+def subscribe(ino: Inotify | None = None, core: str = "", top: str = "", paths: dict = {}):
+	"""Watches a directory and every kept directory beneath it.
+
+	Args:
+		ino (Inotify): The inotify instance.
+		core (str): Source directory.
+		top (str): Relative path of the subtree ('' for the source directory).
+		paths (dict): Watch descriptors keyed to relative paths; updated in place.
+
+	Returns:
+		None
+	"""
+	pfx: int = len(core) + 1
+
+	paths[ino.add(os.path.join(core, top) if top else core)] = top
+
+	for entry in walk(core, rules(core), None, None, None, top):
+		if entry.is_dir():
+			try:
+				paths[ino.add(entry.path)] = entry.path[pfx:]
+
+			except FileNotFoundError:
+				continue # gone already; its parent's event covers it
+
+def unsubscribe(ino: Inotify | None = None, top: str = "", paths: dict = {}):
+	"""Drops the watches for a directory moved away and everything beneath it."""
+	for wd, rp in list(paths.items()):
+		if rp == top or rp.startswith(top + "/"):
+			ino.rm(wd)
+			paths.pop(wd, None)
+
+def invalidate(sconn: sqlite3.Connection | None = None):
+	"""Drops the journal and marks it invalid; the next diff walks everything."""
+	sconn.execute("DELETE FROM journal;")
+	sconn.execute("UPDATE watcher SET valid = 0 WHERE id = 1;")
+	sconn.commit()
+
+def watch(core: str = "", index: str = ""):
+	"""Journals every change under core until interrupted.
+
+	Args:
+		core (str): Source directory.
+		index (str): Path to the index's database.
+
+	Returns:
+		None
+	"""
+	ino = Inotify()
+	paths: dict = {}
+	backlog: list = []
+
+	sconn = sqlite3.connect(index, timeout=1)
+	sconn.execute("PRAGMA journal_mode=WAL;")
+	sconn.executescript(SINIT)
+
+	logger.info('subscribing to the tracked directories...')
+	try:
+		subscribe(ino, core, "", paths)
+
+	except OSError as e:
+		if e.errno == errno.ENOSPC:
+			logger.error('ran out of inotify watches; raise fs.inotify.max_user_watches')
+		ino.close()
+		raise
+
+	query: str = "INSERT OR REPLACE INTO watcher (id, pid, valid, started) VALUES (1, ?, 0, ?);"
+	sconn.execute(query, (os.getpid(), time.time_ns()))
+	sconn.commit()
+
+	logger.info(f"watching {len(paths)} directories; the journal arms on the next diff")
+
+	try:
+		while True:
+			for wd, mask, cookie, name in ino.read():
+				if mask & IN_Q_OVERFLOW:
+					logger.warning('inotify queue overflowed; the next diff will walk everything')
+					backlog.clear()
+					invalidate(sconn)
+					continue
+
+				if mask & IN_IGNORED:
+					paths.pop(wd, None)
+					continue
+
+				base: str = paths.get(wd)
+				if base is None:
+					continue
+
+				if not name:
+					if base == "" and mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+						logger.error('the source directory itself went away; stopping')
+						return
+					continue # a subdirectory's own events are reported by its parent too
+
+				rp: str = f"{base}/{name}" if base else name
+				is_dir: bool = bool(mask & IN_ISDIR)
+
+				if name == IGNORE_FILE:
+					forget(core, base) # its directory's rules (& those beneath) are read again
+
+				if resolve(core, rp, is_dir):
+					continue
+
+				if is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+					try:
+						subscribe(ino, core, rp, paths)
+					except FileNotFoundError:
+						pass
+
+				elif is_dir and mask & IN_MOVED_FROM:
+					unsubscribe(ino, rp, paths)
+
+				if mask & IN_CREATE:
+					event: str = "C"
+				elif mask & IN_DELETE:
+					event: str = "D"
+				elif mask & IN_MOVED_FROM:
+					event: str = "F"
+				elif mask & IN_MOVED_TO:
+					event: str = "T"
+				else:
+					event: str = "M"
+
+				backlog.append((rp, event, int(is_dir)))
+
+			if backlog:
+				try:
+					sconn.executemany("INSERT INTO journal (rp, event, is_dir) VALUES (?, ?, ?);", backlog)
+					sconn.commit()
+
+				except sqlite3.OperationalError as oe:
+					sconn.rollback()
+					logger.debug(f"index busy ({oe}); holding {len(backlog)} events")
+				else:
+					backlog.clear()
+
+	except KeyboardInterrupt:
+		logger.info('\nwatcher stopped')
+	finally:
+		try:
+			sconn.execute("DELETE FROM watcher WHERE id = 1;")
+			sconn.commit()
+		except sqlite3.OperationalError:
+			logger.warning('could not clear the watcher\'s row; the journal is ignored once its pid is gone')
+		sconn.close()
+		ino.close()
@@ -0,0 +1,181 @@
+"""Columnar store for file stamps.
+
+Paths are kept once in a list; each stamp field lives in
+its own array of 64-bit ints instead of a tuple per file.
+Stamps are compared a column at a time (with NumPy when
+it's installed: 'pip install rosa[fast]').
+"""
+
+import sys
+import logging
+from array import array
+from bisect import bisect_right
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+logger = logging.getLogger('rosa.log')
+
+FIELDS: tuple = ("mtime_ns", "ctime_ns", "size", "ino", "dev") # same order as index.STAMP
+TYPES: tuple = ("q", "q", "q", "Q", "Q") # inodes & devices can use all 64 bits
+
+BLOCK: int = 65536 # rows pulled from each stream per comparison
+
+class Ledger:
+	"""Relative paths with their stamps stored column by column.
+
+	Attributes:
+		rps (list): Interned relative paths, in insertion order.
+		columns (tuple): One 64-bit array per stamp field.
+	"""
+	__slots__ = ("rps", "columns")
+
+	def __init__(self, rows = ()):
+		"""Builds the ledger from (rp, stamp) pairs."""
+		self.rps: list = []
+		self.columns: tuple = tuple(array(code) for code in TYPES)
+
+		self.extend(rows)
+
+	def __len__(self):
+		"""Number of files held."""
+		return len(self.rps)
+
+	def append(self, rp: str = "", stamp: tuple = ()):
+		"""Adds one file."""
+		self.rps.append(sys.intern(rp))
+
+		for column, value in zip(self.columns, stamp):
+			column.append(value)
+
+	def extend(self, rows = ()):
+		"""Adds (rp, stamp) pairs."""
+		for rp, stamp in rows:
+			self.append(rp, stamp)
+
+	def join(self, other = None):
+		"""Appends another ledger's rows (column arrays extend in C)."""
+		self.rps += other.rps
+
+		for column, more in zip(self.columns, other.columns):
+			column.extend(more)
+
+	def stamp(self, i: int = 0):
+		"""Rebuilds row i's stamp tuple."""
+		return tuple(column[i] for column in self.columns)
+
+	def split(self, bound: str = None):
+		"""Splits a path-ordered ledger after bound.
+
+		Args:
+			bound (str): Last relative path to keep in the head (None keeps everything).
+
+		Returns:
+			head (Ledger): Rows up to & including bound.
+			tail (Ledger): Everything after it.
+		"""
+		cut: int = len(self.rps) if bound is None else bisect_right(self.rps, bound)
+
+		head = Ledger()
+		tail = Ledger()
+
+		head.rps, tail.rps = self.rps[:cut], self.rps[cut:]
+		head.columns = tuple(column[:cut] for column in self.columns)
+		tail.columns = tuple(column[cut:] for column in self.columns)
+
+		return head, tail
+
+	def compare(self, real = None, keep: bool = True):
+		"""Compares this (indexed) ledger against the actual one.
+
+		Paths are joined once; the matched rows' stamps are then
+		compared a whole column at a time.
+
+		Args:
+			real (Ledger): Actual stamps.
+			keep (bool): Whether to collect the unaltered files.
+
+		Returns:
+			new (list): Files only in real.
+			deleted (list): Files only in this ledger.
+			diffs (list): Files whose stamps differ.
+			unchanged (list): Files whose stamps match (empty if not kept).
+		"""
+		rows: dict = dict(zip(self.rps, range(len(self.rps))))
+
+		new: list = []
+		left: array = array('q')
+		right: array = array('q')
+
+		for j, rp in enumerate(real.rps):
+			i: int = rows.pop(rp, -1)
+
+			if i < 0:
+				new.append(rp)
+			else:
+				left.append(i)
+				right.append(j)
+
+		deleted: list = list(rows)
+
+		altered: list = changed(self.columns, left, real.columns, right)
+
+		diffs: list = []
+		unchanged: list = []
+
+		for k, j in enumerate(right):
+			if altered[k]:
+				diffs.append(real.rps[j])
+			elif keep is True:
+				unchanged.append(real.rps[j])
+
+		return new, deleted, diffs, unchanged
+
+def changed(lcolumns: tuple = (), left: array = None, rcolumns: tuple = (), right: array = None):
+	"""Flags the matched rows whose stamps differ in any column.
+
+	Args:
+		lcolumns (tuple): Indexed columns.
+		left (array): Matched rows' positions in lcolumns.
+		rcolumns (tuple): Actual columns.
+		right (array): Matched rows' positions in rcolumns.
+
+	Returns:
+		altered (list): One truthy value per matched row if it differs.
+	"""
+	if not left:
+		return []
+
+	if np is not None:
+		li = np.frombuffer(left, dtype=np.int64)
+		ri = np.frombuffer(right, dtype=np.int64)
+
+		altered = np.zeros(len(left), dtype=bool)
+
+		for lcolumn, rcolumn in zip(lcolumns, rcolumns):
+			altered |= np.frombuffer(lcolumn, dtype=lcolumn.typecode)[li] != np.frombuffer(rcolumn, dtype=rcolumn.typecode)[ri]
+
+		return altered.tolist()
+
+	altered: list = [False] * len(left)
+
+	for lcolumn, rcolumn in zip(lcolumns, rcolumns):
+		for k, (i, j) in enumerate(zip(left, right)):
+			if lcolumn[i] != rcolumn[j]:
+				altered[k] = True
+
+	return altered
+
+def blocks(rows = (), size: int = BLOCK):
+	"""Reads up to size (rp, stamp) pairs from a stream into a Ledger."""
+	ledger = Ledger()
+
+	for rp, stamp in rows:
+		ledger.append(rp, stamp)
+
+		if len(ledger) >= size:
+			break
+
+	return ledger
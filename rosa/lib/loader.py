@@ -0,0 +1,169 @@
+"""Bulk loading through LOAD DATA LOCAL INFILE.
+
+Rows are written to a temporary file in MySQL's default load
+format (tab-separated, backslash-escaped) & handed to the
+server in one statement, which skips the per-row parsing &
+round trips of INSERTs. The file is loaded & emptied every
+LOAD_BYTES, so it never holds more than that on disk. Needs
+BULK_LOAD (the client's local_infile) & the server's
+local_infile to both be on.
+"""
+
+from __future__ import annotations
+
+import os
+import logging
+import tempfile
+import contextlib
+
+import mysql.connector
+from mysql.connector import MySQLConnection as MySQL
+
+logger = logging.getLogger('rosa.log')
+
+LOAD_BYTES: int = 256*1024*1024 # bytes written before the file is loaded & emptied
+
+def escape(value = None):
+	"""Renders one field in the load format.
+
+	Args:
+		value (var): None, bool, int, str or any bytes-like object.
+
+	Returns:
+		field (bytes): The escaped field.
+	"""
+	if value is None:
+		return b"\\N"
+
+	if isinstance(value, (bool, int)):
+		return str(int(value)).encode()
+
+	if isinstance(value, str):
+		value = value.encode('utf-8')
+
+	return bytes(value).replace(b"\\", b"\\\\").replace(b"\t", b"\\t").replace(b"\n", b"\\n").replace(b"\0", b"\\0")
+
+def local_infile(conn: MySQL | None = None):
+	"""Checks whether the server accepts LOAD DATA LOCAL."""
+	with conn.cursor() as cursor:
+		cursor.execute("SELECT @@GLOBAL.local_infile;")
+
+		return bool(cursor.fetchone()[0])
+
+class LoadFile:
+	"""Rows bound for one table, loaded in bulk.
+
+	Attributes:
+		conn (mysql): Connection object (opened with local_infile).
+		table (str): Destination table.
+		columns (tuple): Columns each row fills, in order.
+		limit (int): Bytes written before the rows are loaded.
+		fp (str): Path to the temporary load file.
+		written (int): Bytes waiting in the file.
+		rows (int): Rows waiting in the file.
+		loaded (int): Rows loaded so far.
+	"""
+
+	def __init__(self, conn: MySQL | None = None, table: str = "", columns: tuple = (), limit: int = LOAD_BYTES):
+		"""Opens an empty temporary load file for the table."""
+		self.conn = conn
+		self.table: str = table
+		self.columns: tuple = columns
+		self.limit: int = limit
+
+		fd, self.fp = tempfile.mkstemp(prefix=f"rosa_{table}_", suffix=".tsv")
+		self.f = os.fdopen(fd, 'wb')
+
+		self.written: int = 0
+		self.rows: int = 0
+		self.loaded: int = 0
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		try:
+			if exc_type is None:
+				self.flush()
+		finally:
+			self.f.close()
+			os.remove(self.fp)
+
+	def add(self, row: tuple = ()):
+		"""Writes one row, loading the file once it's over the limit."""
+		line: bytes = b"\t".join(escape(value) for value in row) + b"\n"
+
+		self.f.write(line)
+		self.written += len(line)
+		self.rows += 1
+
+		if self.written >= self.limit:
+			self.flush()
+
+	def flush(self):
+		"""Loads whatever the file holds & empties it.
+
+		The server only warns about rows it couldn't take (LOCAL
+		implies IGNORE), so a short count is raised here instead.
+		"""
+		if not self.rows:
+			return
+
+		self.f.flush()
+
+		query: str = f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.table} CHARACTER SET binary ({', '.join(self.columns)});"
+
+		try:
+			with self.conn.cursor() as cursor:
+				cursor.execute(query, (self.fp,))
+
+				if cursor.rowcount != self.rows:
+					raise RuntimeError(f"loaded {cursor.rowcount} of {self.rows} row[s] into {self.table}")
+
+		except (mysql.connector.Error, ConnectionError, Exception) as c:
+			logger.error(f"error encountered while bulk loading {self.table}: {c}", exc_info=True)
+			raise
+
+		logger.debug(f"loaded {self.rows} row[s] ({self.written} bytes) into {self.table}")
+
+		self.loaded += self.rows
+
+		self.f.seek(0)
+		self.f.truncate()
+
+		self.written = 0
+		self.rows = 0
+
+@contextlib.contextmanager
+def deferred(conn: MySQL | None = None, indexes: tuple = ()):
+	"""Drops secondary indexes (& unique checks) for the length of a bulk load, rebuilding them after.
+
+	One sorted build per index is far cheaper than keeping it
+	up to date a row at a time. DDL commits implicitly, so this
+	is only for tables that are being filled from empty.
+
+	Args:
+		conn (mysql): Connection object.
+		indexes (tuple): Tupled (table, index, column).
+
+	Yields:
+		None
+	"""
+	tables: dict = {}
+
+	for table, index, column in indexes:
+		tables.setdefault(table, []).append((index, column))
+
+	with conn.cursor() as cursor:
+		for table, keys in tables.items():
+			cursor.execute(f"ALTER TABLE {table} {', '.join(f'DROP INDEX {index}' for index, _ in keys)};")
+
+		cursor.execute("SET SESSION unique_checks = 0;")
+
+	yield # a failed load leaves them dropped; init drops the tables anyway
+
+	with conn.cursor() as cursor:
+		cursor.execute("SET SESSION unique_checks = 1;")
+
+		for table, keys in tables.items():
+			cursor.execute(f"ALTER TABLE {table} {', '.join(f'ADD INDEX {index} ({column})' for index, column in keys)};")
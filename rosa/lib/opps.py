@@ -5,6 +5,8 @@ Cleanup large logs and delete oldest.
 Timer, counter, wrap up for runtime info.
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import time
@@ -14,6 +16,7 @@ import subprocess
 import diff_match_patch as dp_
 
 from rosa.confs import LOGGING_LEVEL
+from rosa.lib.chunker import OnDisk
 
 logger = logging.getLogger('rosa.log')
 
@@ -252,7 +255,7 @@ def diff_gen(diffs: list = [], details: dict = {}, originals: str = "", origin:
 		origin (str): Target directory.
 	
 	Returns:
-		patches (list): Patches generated as bytes.
+		patches (list): Patches generated as bytes; untracked files' previous content as OnDisk.
 	"""
 	patches: list = []
 	enc: bool = None
@@ -272,8 +275,7 @@ def diff_gen(diffs: list = [], details: dict = {}, originals: str = "", origin:
 			patches.append((rp, patch))
 
 		else:
-			with open(fp_alt, 'rb') as f:
-				patch: bytes = f.read()
+			patch = OnDisk(fp_alt, os.path.getsize(fp_alt)) # uploaded as a blob (streamed, if the server lacks it)
 
 			patches.append((rp, patch))
 
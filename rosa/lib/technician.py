@@ -3,36 +3,90 @@
 Uploads to, updates in, and deletes data from the server.
 """
 
+from __future__ import annotations
+
+import io
 import os
+import queue
+import shutil
 import logging
+import threading
 from itertools import batched
+from collections import Counter
 from datetime import datetime, UTC
 
 import mysql.connector
-import xxhash
 
-from rosa.confs import MAX_ALLOWED_PACKET, INIT2
-from rosa.lib import encoding
+from rosa.confs import MAX_ALLOWED_PACKET, UPLOAD_BUFFER, UPLOAD_CONNECTIONS, BULK_LOAD, INIT2, HASH_ALGO
+from rosa.lib.dispatch import phones
+from rosa.lib.hashing import hash_bytes, hash_file, pool_map, ingest, active, use, DEFAULT
+from rosa.lib.chunker import stow, stow_file, hash_pieces, OnDisk, CHUNKED
+from rosa.lib.codec import squeeze, unsqueeze
+from rosa.lib.loader import LoadFile, deferred, local_infile
 
 logger = logging.getLogger('rosa.log')
 
+LOOKUP: int = 1000 # digests per 'IN (...)' query
+
+PACK_ROWS: int = 1000 # rows per multi-row statement
+PACK_BYTES: int = MAX_ALLOWED_PACKET // 2 # escaping can double binary content in a text-protocol statement
+
+# columns & indexes added after INIT2 first shipped; (table, column, definition) & (table, index, column)
+COLUMNS: tuple = (
+	("files", "addressed", "BOOLEAN NOT NULL DEFAULT 0 AFTER content"),
+	("deltas", "addressed", "BOOLEAN NOT NULL DEFAULT 0 AFTER patch"),
+	("deltas", "hash", "VARBINARY(16) NULL AFTER addressed"),
+	("deleted", "addressed", "BOOLEAN NOT NULL DEFAULT 0 AFTER content"),
+	("deleted", "hash", "VARBINARY(16) NULL AFTER addressed"),
+	("deltas", "codec", "ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw' AFTER patch"),
+	("blobs", "codec", "ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw' AFTER chunked"),
+	("stage_blobs", "codec", "ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw' AFTER chunked"),
+	("chunks", "codec", "ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw' AFTER size"),
+	("stage_chunks", "codec", "ENUM ('raw', 'zlib', 'zstd') NOT NULL DEFAULT 'raw' AFTER size")
+)
+
+INDEXES: tuple = (
+	("files", "fhs", "hash"),
+	("deltas", "mhs", "hash"),
+	("deleted", "dhs", "hash")
+)
+
+# secondary indexes rebuilt once after a bulk init rather than row by row; (table, index, column)
+BULK_INDEXES: tuple = (
+	("files", "rps", "rp"),
+	("files", "fhs", "hash"),
+	("directories", "dps", "rp"),
+	("blobs", "brefs", "refs")
+)
+
 # INITIATE SERVER
 
-def init_remote(conn: MySQL | None = None, core: str = None, drps: list = [], frps: list = []):
+def init_remote(conn: MySQL | None = None, sconn: SQLite3 | None = None, core: str = None, drps: list = [], frps: list = [], copy: str = None):
 	"""Initiates the first upload to and creation of the database.
 
+	The content is staged first, a committed batch at a time &
+	checkpointed in the index, so an interrupted init resumes
+	(see stage_files); the rows all go in one transaction after.
+	Each file is read once: the same read is hashed, uploaded &
+	written to the originals, and the index is built from what
+	this returns (see init_index).
+
 	Args:
 		conn (mysql): Connection obj.
+		sconn (sqlite3): Index's connection object (holds the checkpoints).
 		core (str): Source directory.
 		drps (list): Relative paths of all the directories.
 		frps (list): Relative paths of all the files.
+		copy (str): Optional path to the 'originals' directory, filled on the way through.
 	
 	Returns:
-		None
+		staged (dict): Relative paths keyed to (hash, track, size).
 	"""
 	message: str = "INITIAL"
 	version: int = 0
 
+	use(HASH_ALGO) # the index records the same
+
 	with conn.cursor() as cursor:
 		# make all the tables first
 		cursor.execute(INIT2)
@@ -40,15 +94,299 @@ def init_remote(conn: MySQL | None = None, core: str = None, drps: list = [], fr
 		while cursor.nextset():
 			pass
 
-		# start with the bulk file upload
-		collector(conn, frps, core, version, key="new_files")
+		if BULK_LOAD and local_infile(conn):
+			staged: dict = bulk_init(conn, core, drps, frps, version, copy)
+		else:
+			if BULK_LOAD:
+				logger.warning("the server has local_infile off; uploading row by row instead")
+
+			# start with the bulk file upload
+			staged: dict = stage_files(conn, sconn, frps, core, version, copy=copy)
+			publish(conn, version, staged, core)
 
-		# then upload the directories
-		upload_dirs(conn, drps, version)
+			collector(conn, frps, version, key="new_files", staged=staged)
+
+			# then upload the directories
+			upload_dirs(conn, drps, version)
+
+		record_remote_algo(conn, active())
 
 		# upload the new version no & message last (lightest & least data rich)
 		remote_records(conn, version, message)
 
+	return staged
+
+def bulk_init(conn: MySQL | None = None, core: str = None, drps: list = [], frps: list = [], version: int = 0, copy: str = None):
+	"""Fills a fresh server's files, blobs & directories with LOAD DATA LOCAL INFILE.
+
+	Files are read & hashed in batches on the hashing pool as
+	usual; their rows are written to load files instead of
+	INSERTed. Large files are still streamed up as chunks. Blob
+	references are counted on the server once every file's in,
+	and the secondary indexes are built last (see loader.deferred).
+
+	Args:
+		conn (mysql): Connection obj (opened with BULK_LOAD on).
+		core (str): Source directory.
+		drps (list): Relative paths of all the directories.
+		frps (list): Relative paths of all the files.
+		version (int): Initial version.
+		copy (str): Optional path to the 'originals' directory (see prepare).
+
+	Returns:
+		staged (dict): Relative paths keyed to (hash, track, size).
+	"""
+	sized: dict = {rp: os.stat(os.path.join(core, rp)).st_size for rp in frps}
+	batches: list = pack(frps, list(sized.values()))
+	seen: set = set()
+	staged: dict = {}
+
+	total: int = len(batches)
+	length: int = 100
+	fin: int = 0
+
+	fill: str = '%'
+	none: str = '-'
+
+	with deferred(conn, BULK_INDEXES):
+		with (
+			LoadFile(conn, "blobs", ("digest", "refs", "size", "chunked", "codec", "content")) as blobs,
+			LoadFile(conn, "files", ("content", "addressed", "hash", "original_version", "from_version", "rp", "track")) as files,
+			LoadFile(conn, "directories", ("rp", "version")) as dirs
+		):
+			for _batch in batches:
+				for rp, (content, hash_id, track, size) in zip(_batch, prepare(_batch, core, copy)):
+					files.add(("", 1, hash_id, version, version, rp, track))
+					staged[rp] = (hash_id, track, size)
+
+					if hash_id in seen:
+						continue # copies share one blob
+					seen.add(hash_id)
+
+					if isinstance(content, OnDisk):
+						stow_file(conn, hash_id, content.fp)
+						blobs.add((hash_id, 0, size, 1, "raw", b""))
+
+					elif size >= CHUNKED: # grew since it was sized
+						stow(conn, [(hash_id, content)])
+						blobs.add((hash_id, 0, size, 1, "raw", b""))
+
+					else:
+						codec, data = squeeze(content)
+						blobs.add((hash_id, 0, size, 0, codec, data))
+
+				fin += 1
+				i: int = int((fin/total)*length)
+
+				base: str = f"[{fill*i}{none*(length - i)}] loading batch {fin}/{total}"
+				print(base, end='\r', flush=True)
+
+			for rp in drps:
+				dirs.add((rp, version))
+
+		print("\x1b[2K\r", end="", flush=True)
+
+		with conn.cursor() as cursor:
+			cursor.execute("UPDATE blobs b JOIN (SELECT hash, COUNT(*) AS n FROM files GROUP BY hash) f ON f.hash = b.digest SET b.refs = f.n;")
+
+	logger.info(f"bulk loaded {len(frps)} file[s] ({len(seen)} distinct) & {len(drps)} director[y/ies]")
+
+	return staged
+
+def upgrade_remote(conn: MySQL | None = None):
+	"""Creates any tables, columns & indexes added since the server was initiated.
+
+	DDL commits implicitly, so this runs before a commitment's DML.
+
+	Args:
+		conn (mysql): Connection obj.
+
+	Returns:
+		None
+	"""
+	cquery: str = "SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s;"
+	iquery: str = "SELECT COUNT(*) FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s;"
+
+	with conn.cursor() as cursor:
+		cursor.execute(INIT2)
+
+		while cursor.nextset():
+			pass
+
+		for table, column, definition in COLUMNS:
+			cursor.execute(cquery, (table, column))
+
+			if not cursor.fetchone()[0]:
+				cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition};")
+
+		for table, index, column in INDEXES:
+			cursor.execute(iquery, (table, index))
+
+			if not cursor.fetchone()[0]:
+				cursor.execute(f"CREATE INDEX {index} ON {table} ({column});")
+
+def remote_algo(conn: MySQL | None = None):
+	"""Reads the server's hash algorithm.
+
+	Args:
+		conn (mysql): Connection obj.
+
+	Returns:
+		algo (str): The algorithm's name (xxh64 for servers that predate the setting).
+	"""
+	with conn.cursor() as cursor:
+		cursor.execute("SELECT value FROM settings WHERE name = 'hash_algo';")
+		row: tuple = cursor.fetchone()
+
+	return row[0] if row else DEFAULT
+
+def record_remote_algo(conn: MySQL | None = None, algo: str = ""):
+	"""Records the server's hash algorithm.
+
+	Args:
+		conn (mysql): Connection obj.
+		algo (str): The algorithm's name.
+
+	Returns:
+		None
+	"""
+	query: str = "INSERT INTO settings (name, value) VALUES ('hash_algo', %s) ON DUPLICATE KEY UPDATE value = VALUES(value);"
+
+	with conn.cursor() as cursor:
+		cursor.execute(query, (algo,))
+
+def rehash_remote(conn: MySQL | None = None, algo: str = "", batch_size: int = 5):
+	"""Re-hashes the server's content, a committed batch at a time.
+
+	Rows that predate blobs are re-hashed from their own content.
+	Each blob is re-hashed once (chunked ones as their chunks stream
+	down) and every row & manifest that points at it is re-keyed with
+	it. Chunks are re-keyed last, so content chunked before & after
+	the rehash still shares them. Progress is kept in the settings
+	table, so an interrupted run resumes after the last committed batch.
+
+	Args:
+		conn (mysql): Connection obj.
+		algo (str): The algorithm to migrate to.
+		batch_size (int): Rows per batch.
+
+	Returns:
+		rehashed (int): Inline files, blobs & chunks rehashed by this run.
+	"""
+	rehashed: int = 0
+
+	with conn.cursor() as cursor:
+		cursor.execute("ALTER TABLE files MODIFY hash VARBINARY(16) NOT NULL;") # 16-byte digests; DDL commits implicitly
+
+		cursor.execute("SELECT name, value FROM settings WHERE name IN ('rehash_algo', 'rehash_id', 'rehash_bid', 'rehash_chash');")
+		progress: dict = dict(cursor.fetchall())
+
+	resumed: bool = progress.get("rehash_algo") == algo
+
+	last: int = int(progress.get("rehash_id", 0)) if resumed else 0
+	lastb: int = int(progress.get("rehash_bid", 0)) if resumed else 0
+	lastc: bytes = bytes.fromhex(progress.get("rehash_chash", "")) if resumed else b""
+
+	squery: str = "SELECT id, content FROM files WHERE id > %s AND NOT addressed ORDER BY id LIMIT %s;"
+	uquery: str = "UPDATE files SET hash = %s WHERE id = %s;"
+	bquery: str = "SELECT bid, digest, chunked, codec, content FROM blobs WHERE bid > %s ORDER BY bid LIMIT %s;"
+	cquery: str = "SELECT chash, codec, data FROM chunks WHERE chash > %s ORDER BY chash LIMIT %s;"
+	pquery: str = "INSERT INTO settings (name, value) VALUES (%s, %s) ON DUPLICATE KEY UPDATE value = VALUES(value);"
+
+	rekeys: list = [
+		"UPDATE blobs SET digest = %s WHERE digest = %s;",
+		"UPDATE manifests SET digest = %s WHERE digest = %s;",
+		"UPDATE files SET hash = %s WHERE addressed AND hash = %s;",
+		"UPDATE deleted SET hash = %s WHERE addressed AND hash = %s;",
+		"UPDATE deltas SET hash = %s WHERE addressed AND hash = %s;"
+	]
+
+	while True:
+		with conn.cursor() as cursor:
+			cursor.execute(squery, (last, batch_size))
+			rows: list = cursor.fetchall()
+
+		if not rows:
+			break
+
+		hashes: list = pool_map(lambda content: hash_bytes(content, algo), [content for _, content in rows])
+
+		with conn.cursor(prepared=True) as cursor:
+			cursor.executemany(uquery, [(_hash, _id) for (_id, _), _hash in zip(rows, hashes)])
+
+			last = rows[-1][0]
+			cursor.executemany(pquery, [("rehash_algo", algo), ("rehash_id", str(last))])
+
+		conn.commit()
+
+		rehashed += len(rows)
+		logger.debug(f"rehashed the server's inline files through id {last}")
+
+	while True:
+		with conn.cursor() as cursor:
+			cursor.execute(bquery, (lastb, batch_size))
+			rows: list = cursor.fetchall()
+
+		if not rows:
+			break
+
+		hashes: list = pool_map(lambda row: hash_bytes(unsqueeze(row[3], row[4]), algo), rows)
+
+		for k, (bid, old, chunked, _, _) in enumerate(rows):
+			if chunked:
+				hashes[k] = hash_pieces(conn, old, algo)
+
+		with conn.cursor(prepared=True) as cursor:
+			for (bid, old, _, _, _), new in zip(rows, hashes):
+				if new != old:
+					for rekey in rekeys:
+						cursor.execute(rekey, (new, old))
+
+			lastb = rows[-1][0]
+			cursor.executemany(pquery, [("rehash_algo", algo), ("rehash_bid", str(lastb))])
+
+		conn.commit()
+
+		rehashed += len(rows)
+		logger.debug(f"rehashed the server's blobs through bid {lastb}")
+
+	# a chunk's new key only depends on its data, so one that's re-keyed past lastc & met again is left as is
+	while True:
+		with conn.cursor() as cursor:
+			cursor.execute(cquery, (lastc, batch_size))
+			rows: list = cursor.fetchall()
+
+		if not rows:
+			break
+
+		hashes: list = pool_map(lambda row: hash_bytes(unsqueeze(row[1], row[2]), algo), rows)
+
+		with conn.cursor(prepared=True) as cursor:
+			for (old, _, _), new in zip(rows, hashes):
+				old: bytes = bytes(old)
+
+				if new != old:
+					cursor.execute("UPDATE IGNORE chunks SET chash = %s WHERE chash = %s;", (new, old))
+					cursor.execute("DELETE FROM chunks WHERE chash = %s;", (old,)) # only left if new was stored already
+					cursor.execute("UPDATE manifests SET chash = %s WHERE chash = %s;", (new, old))
+
+			lastc = bytes(rows[-1][0])
+			cursor.executemany(pquery, [("rehash_algo", algo), ("rehash_chash", lastc.hex())])
+
+		conn.commit()
+
+		rehashed += len(rows)
+		logger.debug(f"rehashed the server's chunks through {lastc.hex()}")
+
+	record_remote_algo(conn, algo)
+
+	with conn.cursor() as cursor:
+		cursor.execute("DELETE FROM settings WHERE name IN ('rehash_algo', 'rehash_id', 'rehash_bid', 'rehash_chash');")
+
+	conn.commit()
+
+	return rehashed
+
 def remote_records(conn: MySQL | None = None, version: int = None, message: str = ""):
 	"""Uploads the messave and new version.
 
@@ -68,6 +406,10 @@ def remote_records(conn: MySQL | None = None, version: int = None, message: str
 def upload_patches(conn: MySQL | None = None, patches: list = [], to_version: int = None, details: dict = None):
 	"""Uploads the reverse patches generated for altered files.
 
+	Untracked (binary) files' 'patches' are their previous content
+	(on disk, in the backup); those rows reference its blob, which
+	is usually still stored.
+
 	Args:
 		conn (mysql): Connection obj.
 		patches (dmp): Reverse patches as text.
@@ -77,58 +419,491 @@ def upload_patches(conn: MySQL | None = None, patches: list = [], to_version: in
 	Returns:
 		None
 	"""
-	query: str = "INSERT INTO deltas (rp, patch, original_version, to_version, from_version) VALUES (%s, %s, %s, %s, %s);"
+	query: str = "INSERT INTO deltas (rp, patch, codec, addressed, hash, original_version, to_version, from_version) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);"
 	values: list = []
+	previous: list = []
+
 	for rp, patch in patches:
 		original_version: int = details[rp][0]
 		from_version: int = details[rp][1]
-		values.append((rp, patch, original_version, to_version, from_version))
 
-	with conn.cursor(prepared=True) as cursor:
-		for val in values:
-			cursor.execute(query, val)
+		if details[rp][2] == "F":
+			digest: bytes = hash_file(patch.fp) if isinstance(patch, OnDisk) else hash_bytes(patch)
+			previous.append((digest, patch))
+			values.append((rp, b"", "raw", True, digest, original_version, to_version, from_version))
+		else:
+			codec, patch = squeeze(patch)
+			values.append((rp, patch, codec, False, None, original_version, to_version, from_version))
+
+	if previous:
+		put_blobs(conn, previous)
+
+	try:
+		for group in pack(values, [len(val[1]) for val in values]):
+			if len(group) == 1 and len(group[0][1]) >= PACK_BYTES:
+				insert_long(conn, query, group[0], 1)
+			else:
+				with conn.cursor() as cursor:
+					cursor.executemany(query, group) # one multi-row INSERT per group
+
+	except (mysql.connector.Error, ConnectionError, Exception) as c:
+		logger.error(f"error encountered while uploading patches: {c}", exc_info=True)
+		raise
+
+# BLOBS
+
+def held_blobs(conn: MySQL | None = None, digests: list = [], version: int = None, lock: bool = False):
+	"""Finds which digests the server already stores as blobs.
+
+	Args:
+		conn (mysql): Connection object.
+		digests (list): Content digests.
+		version (int): Optional version whose staged blobs count too.
+		lock (bool): Share-lock the live blobs found until the transaction ends, so no sweep() can take them (live blobs only).
+
+	Returns:
+		held (set): The ones already stored.
+	"""
+	held: set = set()
+
+	with conn.cursor() as cursor:
+		for chunk in batched(list(dict.fromkeys(digests)), LOOKUP):
+			marks: str = ", ".join(["%s"] * len(chunk))
+			query: str = f"SELECT digest FROM blobs WHERE digest IN ({marks})"
+			params: tuple = chunk
+
+			if version is not None:
+				query += f" UNION SELECT digest FROM stage_blobs WHERE version = %s AND digest IN ({marks})"
+				params += (version,) + chunk
+			elif lock:
+				query += " FOR SHARE"
+
+			cursor.execute(query + ";", params)
+
+			held.update(bytes(digest) for (digest,) in cursor.fetchall())
+
+	return held
+
+def store_blobs(conn: MySQL | None = None, contents: dict = {}, refs: Counter = None, version: int = None):
+	"""Uploads blobs the server lacks; large ones go up as content-defined chunks.
+
+	Args:
+		conn (mysql): Connection object.
+		contents (dict): Digests keyed to their content (bytes, or OnDisk to stream it from its file).
+		refs (Counter): References each new blob starts with (live blobs only).
+		version (int): Optional version to stage the blobs under instead.
+
+	Returns:
+		None
+	"""
+	big: list = [(digest, content) for digest, content in contents.items() if not isinstance(content, OnDisk) and len(content) >= CHUNKED]
+
+	if big:
+		stow(conn, big, version)
+
+	for digest, content in contents.items():
+		if isinstance(content, OnDisk):
+			stow_file(conn, digest, content.fp, version)
+
+	if version is None:
+		query: str = "INSERT INTO blobs (digest, refs, size, chunked, codec, content) VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE refs = refs + VALUES(refs);"
+	else:
+		query: str = "INSERT IGNORE INTO stage_blobs (version, digest, size, chunked, codec, content) VALUES (%s, %s, %s, %s, %s, %s);"
+
+	rows: list = []
+	sizes: list = []
+
+	for digest, content in contents.items():
+		if isinstance(content, OnDisk):
+			size, chunked = content.size, True
+		else:
+			size, chunked = len(content), len(content) >= CHUNKED
+
+		lead: tuple = (digest, refs[digest]) if version is None else (version, digest)
+		codec, data = ("raw", b"") if chunked else squeeze(content)
+
+		rows.append(lead + (size, chunked, codec, data))
+		sizes.append(len(data))
+
+	try:
+		for group in pack(rows, sizes):
+			if len(group) == 1 and len(group[0][-1]) >= PACK_BYTES:
+				insert_long(conn, query, group[0], len(group[0]) - 1)
+			else:
+				with conn.cursor() as cursor:
+					cursor.executemany(query, group) # one multi-row INSERT per group
+
+	except (mysql.connector.Error, ConnectionError, Exception) as c:
+		logger.error(f"error encountered while uploading blob[s]: {c}", exc_info=True)
+		raise
+
+def put_blobs(conn: MySQL | None = None, items: list = []):
+	"""Adds one reference per item to its blob, uploading only content the server lacks.
+
+	Args:
+		conn (mysql): Connection object.
+		items (list): Tupled (digest, content); content can be None if the blob is known to be stored.
+
+	Returns:
+		None
+	"""
+	counts: Counter = Counter(digest for digest, _ in items)
+	contents: dict = {digest: content for digest, content in items if content is not None}
+
+	held: set = held_blobs(conn, list(counts))
+	missing: list = [digest for digest in counts if digest not in held]
+
+	lost: list = [digest for digest in missing if digest not in contents]
+	if lost:
+		raise RuntimeError(f"{len(lost)} blob[s] expected on the server are gone (swept by another commitment?); nothing was written")
+
+	store_blobs(conn, {digest: contents[digest] for digest in missing}, counts)
+
+	if held:
+		try:
+			with conn.cursor(prepared=True) as cursor:
+				cursor.executemany("UPDATE blobs SET refs = refs + %s WHERE digest = %s;", [(counts[digest], digest) for digest in held])
+
+		except (mysql.connector.Error, ConnectionError, Exception) as c:
+			logger.error(f"error encountered while referencing blob[s]: {c}", exc_info=True)
+			raise
+
+	logger.debug(f"{len(items)} reference[s]; uploaded {len(missing)} blob[s], {len(held)} already stored")
+
+def stage_blobs(conn: MySQL | None = None, items: list = [], version: int = None):
+	"""Uploads content the server lacks into a version's staging tables (no references are taken).
+
+	Args:
+		conn (mysql): A worker's own connection object.
+		items (list): Tupled (digest, content).
+		version (int): Version being uploaded.
+
+	Returns:
+		None
+	"""
+	contents: dict = dict(items)
+
+	held: set = held_blobs(conn, list(contents), version)
+
+	store_blobs(conn, {digest: content for digest, content in contents.items() if digest not in held}, None, version)
+
+def publish(conn: MySQL | None = None, version: int = None, staged: dict = {}, abs_path: str = ""):
+	"""Moves a version's staged content into the live tables.
+
+	Runs inside the commitment's transaction, so readers see the
+	staged content together with the rows that reference it or not
+	at all. Blobs arrive without references; put_blobs() adds them.
+	Leftovers from earlier, abandoned uploads are cleared too.
+
+	Content that was already live when it was staged wasn't staged
+	again, and another commitment's sweep() may have taken it since.
+	Every staged file's blob is share-locked here (so none can go
+	before this transaction ends) and the missing ones are read &
+	uploaded again.
+
+	Args:
+		conn (mysql): The commitment's connection object.
+		version (int): Version being uploaded.
+		staged (dict): Relative paths keyed to (hash, track, size), from stage_files().
+		abs_path (str): Path to the given directory.
+
+	Returns:
+		None
+	"""
+	moves: list = [
+		"INSERT IGNORE INTO chunks (chash, size, codec, data) SELECT chash, size, codec, data FROM stage_chunks WHERE version = %s;",
+		"INSERT IGNORE INTO manifests (digest, seq, chash) SELECT digest, seq, chash FROM stage_manifests WHERE version = %s;",
+		"INSERT INTO blobs (digest, refs, size, chunked, codec, content) SELECT digest, 0, size, chunked, codec, content FROM stage_blobs WHERE version = %s ON DUPLICATE KEY UPDATE refs = blobs.refs;",
+		"DELETE FROM stage_chunks WHERE version <= %s;",
+		"DELETE FROM stage_manifests WHERE version <= %s;",
+		"DELETE FROM stage_blobs WHERE version <= %s;"
+	]
+
+	with conn.cursor() as cursor:
+		for query in moves:
+			cursor.execute(query, (version,))
+
+	owners: dict = {}
+	for rp, (hash_id, track, size) in staged.items():
+		owners.setdefault(hash_id, rp)
+
+	held: set = held_blobs(conn, list(owners), lock=True)
+	swept: list = [rp for digest, rp in owners.items() if digest not in held]
+
+	if swept:
+		logger.warning(f"{len(swept)} blob[s] were swept since they were staged; uploading them again")
+		contents: dict = {}
+
+		for rp, (content, hash_id, track, size) in zip(swept, prepare(swept, abs_path)):
+			if hash_id != staged[rp][0]:
+				raise RuntimeError(f"{rp} changed after it was staged & its stored content was swept meanwhile; give again")
+
+			contents[hash_id] = content
+
+		store_blobs(conn, contents, Counter())
+
+	logger.debug(f"published v{version}'s staged content")
+
+def drop_refs(conn: MySQL | None = None, digests: list = []):
+	"""Drops one reference per digest; sweep() reclaims what's left unreferenced.
+
+	Args:
+		conn (mysql): Connection object.
+		digests (list): Digests of blobs no longer referenced by a row.
+
+	Returns:
+		None
+	"""
+	counts: Counter = Counter(digests)
+
+	if counts:
+		with conn.cursor(prepared=True) as cursor:
+			cursor.executemany("UPDATE blobs SET refs = refs - %s WHERE digest = %s;", [(n, digest) for digest, n in counts.items()])
+
+def sweep(conn: MySQL | None = None):
+	"""Deletes unreferenced blobs, their manifests & any chunks no manifest uses.
+
+	Runs once a commitment's references are all in, so content that's
+	dropped by one row & picked up by another (i.e., a binary file's
+	previous content moving into deltas) is never re-uploaded.
+
+	Args:
+		conn (mysql): Connection object.
+
+	Returns:
+		None
+	"""
+	with conn.cursor() as cursor:
+		cursor.execute("DELETE m FROM manifests m JOIN blobs b ON b.digest = m.digest WHERE b.refs <= 0 AND b.chunked;")
+		orphaned: int = cursor.rowcount
+
+		cursor.execute("DELETE FROM blobs WHERE refs <= 0;")
+		logger.debug(f"swept {cursor.rowcount} unreferenced blob[s]")
+
+		if orphaned > 0:
+			cursor.execute("DELETE c FROM chunks c LEFT JOIN manifests m ON m.chash = c.chash WHERE m.chash IS NULL;")
+
+def file_blobs(conn: MySQL | None = None, rps: list = []):
+	"""Finds the blobs files currently reference.
+
+	Args:
+		conn (mysql): Connection object.
+		rps (list): Files' relative paths.
+
+	Returns:
+		digests (dict): Relative paths keyed to their blob's digest (files stored inline are left out).
+	"""
+	digests: dict = {}
+
+	with conn.cursor() as cursor:
+		for chunk in batched(list(rps), LOOKUP):
+			marks: str = ", ".join(["%s"] * len(chunk))
+			cursor.execute(f"SELECT rp, hash FROM files WHERE addressed AND rp IN ({marks});", chunk)
+
+			digests.update((rp, bytes(digest)) for rp, digest in cursor.fetchall())
+
+	return digests
 
 # EDIT SERVER
 
-def avg(files: list = [], dirx: str = ""):
-	"""Finds abatch size for the files passed.
+def insert_long(conn: MySQL | None = None, query: str = "", row: tuple = (), at: int = -1):
+	"""Inserts one row whose content is too big for a packet.
+
+	The content goes up as a stream, so the prepared statement sends
+	it in pieces (COM_STMT_SEND_LONG_DATA) instead of inside the execute
+	packet.
 
 	Args:
-		files (list): Relative paths of files.
-		dirx (str): Source directory.
+		conn (mysql): Connection object.
+		query (str): Single-row INSERT.
+		row (tuple): Its parameters.
+		at (int): Index of the content in row.
 
 	Returns:
-		batch_count (int): Packet size divided by average file size.
+		None
+	"""
+	row = row[:at] + (io.BytesIO(row[at]),) + row[at + 1:]
+
+	with conn.cursor(prepared=True) as cursor: # binary protocol; nothing's escaped
+		cursor.execute(query, row)
+
+def pack(items: list = [], sizes: list = [], budget: int = PACK_BYTES, rows: int = PACK_ROWS):
+	"""Packs items, in order, into batches under a byte budget & a row cap.
+
+	Args:
+		items (list): Anything (i.e., relative paths or rows).
+		sizes (list): Each item's size in bytes.
+		budget (int): Bytes per batch.
+		rows (int): Items per batch.
+
+	Returns:
+		batches (list): Lists of items; an item of budget bytes or more gets a batch of its own.
+	"""
+	batches: list = []
+	current: list = []
+	used: int = 0
+
+	for item, size in zip(items, sizes):
+		if size >= budget:
+			if current:
+				batches.append(current)
+				current, used = [], 0
+
+			batches.append([item])
+			continue
+
+		if current and (used + size > budget or len(current) >= rows):
+			batches.append(current)
+			current, used = [], 0
+
+		current.append(item)
+		used += size
+
+	if current:
+		batches.append(current)
+
+	return batches
+
+class Throttle:
+	"""Caps the bytes read but not yet uploaded.
+
+	Attributes:
+		limit (int): Bytes allowed in flight.
+		used (int): Bytes currently in flight.
+		closed (bool): Set once the upload stops; wakes any waiting reader.
 	"""
-	tsz: int = 0
+	def __init__(self, limit: int = UPLOAD_BUFFER):
+		"""Starts with nothing in flight."""
+		self.limit: int = limit
+		self.used: int = 0
+		self.closed: bool = False
+		self.cond = threading.Condition()
+
+	def take(self, n: int = 0):
+		"""Waits until n more bytes fit (a batch bigger than limit goes alone); False if closed."""
+		with self.cond:
+			while not self.closed and self.used and self.used + n > self.limit:
+				self.cond.wait()
 
-	for path in files:
-		fp: str = os.path.join(dirx, path)
+			self.used += n
 
-		tsz: int += os.stat(fp).st_size
+			return not self.closed
 
-	avg: int = tsz / len(files)
+	def give(self, n: int = 0):
+		"""Returns n bytes once they're uploaded."""
+		with self.cond:
+			self.used -= n
+			self.cond.notify_all()
 
-	batch_count: int = int(MAX_ALLOWED_PACKET / avg)
+	def close(self):
+		"""Stops the reader from waiting any longer."""
+		with self.cond:
+			self.closed = True
+			self.cond.notify_all()
 
-	return batch_count
+def collector(conn: MySQL | None = None, files: list = [], version: int = None, key: bool = None, staged: dict = {}):
+	"""Writes staged files' rows, in batches.
 
-def collector(conn: MySQL | None = None, files: list = [], abs_path: str = "", version: int = None, key: bool = None):
-	"""Manages the batched uploading to the server.
+	Runs after publish(), inside the commitment's transaction; the
+	content's already on the server (see stage_files).
 
 	Args:
 		conn (mysql): Connection object.
 		files (list): Relative paths, for uploading.
-		abs_path (str): Path to the given directory.
 		version (int): Current version.
 		key (var): Specifies files as new or altered.
+		staged (dict): Relative paths keyed to (hash, track, size), from stage_files().
 
 	Returns:
 		None
 	"""
-	batch_count: int = avg(files[:50], abs_path)
-	batches: list = list(batched(files, batch_count))
+	for _batch in batched(files, PACK_ROWS):
+		send(conn, list(_batch), [(None,) + staged[rp] for rp in _batch], version, key)
+
+def stage_files(conn: MySQL | None = None, sconn: SQLite3 | None = None, files: list = [], abs_path: str = "", version: int = None, connections: int = UPLOAD_CONNECTIONS, copy: str = None):
+	"""Uploads files' content into a pending version, a committed batch at a time.
+
+	Each batch is committed into the staging tables, then
+	checkpointed in the index. An interrupted upload resumes from
+	the last acknowledged batch: a checkpointed file whose size &
+	mtime still match isn't read or sent again. Nothing is visible
+	until publish() runs in the commitment's transaction, and no
+	transaction ever holds more than a batch of content.
+
+	conn commits after every batch, so it can't have uncommitted
+	work of its own yet.
+
+	Args:
+		conn (mysql): Connection object.
+		sconn (sqlite3): Index's connection object.
+		files (list): Relative paths of new & altered files.
+		abs_path (str): Path to the given directory.
+		version (int): The pending version.
+		connections (int): Connections to stage over (see fan_upload).
+		copy (str): Optional directory every file is copied into as it's read (see prepare); resumed files are copied on their own.
+
+	Returns:
+		staged (dict): Relative paths keyed to (hash, track, size).
+	"""
+	acked: dict = checkpoints(sconn, version)
+
+	staged: dict = {}
+	stats: dict = {}
+
+	for rp in files:
+		st = os.stat(os.path.join(abs_path, rp))
+		mark: tuple = acked.get(rp)
+
+		if mark and mark[2:] == (st.st_size, st.st_mtime_ns):
+			staged[rp] = mark[:3]
+		else:
+			stats[rp] = (st.st_size, st.st_mtime_ns) # taken before the read; a later edit can't match it
+
+	if staged:
+		logger.info(f"resuming v{version}; {len(staged)} file[s] were already uploaded")
+
+		if copy:
+			pool_map(lambda rp: shutil.copy2(os.path.join(abs_path, rp), backup(copy, rp)), list(staged))
 
+	sized: dict = {rp: size for rp, (size, _) in stats.items()}
+	batches: list = pack(list(sized), list(sized.values()))
+
+	def ack(_batch: list = [], loaded: list = []):
+		"""Checkpoints a batch the server has committed."""
+		rows: list = []
+
+		for rp, (content, hash_id, track, size) in zip(_batch, loaded):
+			staged[rp] = (hash_id, track, size)
+			rows.append((rp, hash_id, track, size, stats[rp][1]))
+
+		checkpoint(sconn, version, rows)
+
+	if connections > 1 and len(batches) > 1:
+		fan_upload(batches, abs_path, version, ack, connections, copy)
+	elif batches:
+		relay(conn, batches, sized, abs_path, version, ack, copy)
+
+	return staged
+
+def relay(conn: MySQL | None = None, batches: list = [], sized: dict = {}, abs_path: str = "", version: int = None, ack = None, copy: str = None):
+	"""Stages batches over one connection, committing each.
+
+	A reader thread prepares batches (read & hash, on the hashing
+	pool) while this thread stages the previous one; Throttle keeps
+	at most UPLOAD_BUFFER bytes read ahead.
+
+	Args:
+		conn (mysql): Connection object.
+		batches (list): Batches of relative paths.
+		sized (dict): Relative paths keyed to their sizes.
+		abs_path (str): Path to the given directory.
+		version (int): The pending version.
+		ack (function): Called with each batch & its prepare() output once it's committed.
+		copy (str): Optional directory the files are copied into (see prepare).
+
+	Returns:
+		None
+	"""
 	total: int = len(batches)
 	length: int = 100
 	fin: int = 0
@@ -136,20 +911,227 @@ def collector(conn: MySQL | None = None, files: list = [], abs_path: str = "", v
 	fill: str = '%'
 	none: str = '-'
 
+	throttle = Throttle()
+	ready: queue.Queue = queue.Queue()
+
+	def read():
+		"""Prepares every batch in order, handing each over as it's ready."""
+		try:
+			for _batch in batches:
+				size: int = sum(sized[rp] for rp in _batch if sized[rp] < CHUNKED) # larger files are streamed, not held
+
+				if not throttle.take(size): # reserved before reading, so memory stays within the limit
+					return
+
+				ready.put((_batch, prepare(_batch, abs_path, copy), size))
+
+		except BaseException as e:
+			ready.put(e)
+		else:
+			ready.put(None)
+
+	reader = threading.Thread(target=read, name="rosa-reader", daemon=True)
+	reader.start()
+
+	try:
+		while True:
+			item = ready.get()
+
+			if item is None:
+				break
+
+			if isinstance(item, BaseException):
+				raise item
+
+			_batch, loaded, size = item
+
+			try:
+				stage_blobs(conn, [(hash_id, content) for content, hash_id, track, size in loaded], version)
+				conn.commit()
+			finally:
+				throttle.give(size)
+
+			ack(_batch, loaded)
+
+			fin += 1
+			i: int = int((fin/total)*length)
+
+			base: str = f"[{fill*i}{none*(length - i)}] uploading batch {fin}/{total}"
+			print(base, end='\r', flush=True)
+
+	finally:
+		throttle.close()
+
+	reader.join()
+
+	print("\x1b[2K\r", end="", flush=True)
+
+def fan_upload(batches: list = [], abs_path: str = "", version: int = None, ack = None, connections: int = UPLOAD_CONNECTIONS, copy: str = None):
+	"""Stages batches over several connections.
+
+	Each worker reads its own batches and stages whatever content
+	the server lacks under the version, committing as it goes;
+	this thread checkpoints each one as it's acknowledged.
+
+	Args:
+		batches (list): Batches of relative paths.
+		abs_path (str): Path to the given directory.
+		version (int): The pending version.
+		ack (function): Called with each batch & its prepare() output once it's committed.
+		connections (int): Worker connections to open.
+		copy (str): Optional directory the files are copied into (see prepare).
+
+	Returns:
+		None
+	"""
+	todo: queue.Queue = queue.Queue()
+	done: queue.Queue = queue.Queue()
+
 	for _batch in batches:
-		collect_data(conn, _batch, abs_path, version, key)
+		todo.put(_batch)
+
+	def work():
+		"""Stages batches over this worker's own connection until none are left."""
+		try:
+			with phones() as wconn:
+				while True:
+					try:
+						_batch = todo.get_nowait()
+					except queue.Empty:
+						break
+
+					loaded: list = prepare(_batch, abs_path, copy)
+
+					stage_blobs(wconn, [(hash_id, content) for content, hash_id, track, size in loaded], version)
+					wconn.commit()
+
+					done.put((_batch, [(None, hash_id, track, size) for content, hash_id, track, size in loaded])) # content's on the server now
+
+		except BaseException as e:
+			done.put(e)
+
+	workers: list = [threading.Thread(target=work, name=f"rosa-upload-{n}", daemon=True) for n in range(min(connections, len(batches)))]
+
+	for worker in workers:
+		worker.start()
+
+	total: int = len(batches)
+	length: int = 100
+	fin: int = 0
+
+	fill: str = '%'
+	none: str = '-'
+
+	try:
+		while fin < total:
+			item = done.get()
+
+			if isinstance(item, BaseException):
+				raise item
+
+			ack(*item) # the index is only touched from this thread
+
+			fin += 1
+			i: int = int((fin/total)*length)
+
+			base: str = f"[{fill*i}{none*(length - i)}] staging batch {fin}/{total}"
+			print(base, end='\r', flush=True)
 
-		fin: int += 1
-		i: int = int((fin/total)*length)
+	finally:
+		while not todo.empty(): # stop the other workers after their current batch
+			try:
+				todo.get_nowait()
+			except queue.Empty:
+				break
 
-		base: str = f"[{fill*i}{none*(length - i)}] uploading batch {fin}/{total}"
-		print(base, end='\r', flush=True)
+	for worker in workers:
+		worker.join()
 
 	print("\x1b[2K\r", end="", flush=True)
 
+# CHECKPOINTS
+
+def checkpoints(sconn: SQLite3 | None = None, version: int = None):
+	"""Reads the index's checkpoints for a pending version, dropping any another version left.
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		version (int): The pending version.
+
+	Returns:
+		acked (dict): Relative paths keyed to (hash, track, size, mtime_ns) as they were staged.
+	"""
+	sconn.execute("DELETE FROM checkpoints WHERE version != ?;", (version,))
+
+	query: str = "SELECT rp, hash, track, size, mtime_ns FROM checkpoints WHERE version = ?;"
+
+	return {rp: (_hash, track, size, mtime_ns) for rp, _hash, track, size, mtime_ns in sconn.execute(query, (version,))}
+
+def checkpoint(sconn: SQLite3 | None = None, version: int = None, rows: list = []):
+	"""Records an acknowledged batch & commits the index (it's on the server already).
+
+	Args:
+		sconn (sqlite3): Index's connection object.
+		version (int): The pending version.
+		rows (list): Tupled (rp, hash, track, size, mtime_ns).
+
+	Returns:
+		None
+	"""
+	query: str = "INSERT OR REPLACE INTO checkpoints (version, rp, hash, track, size, mtime_ns) VALUES (?, ?, ?, ?, ?, ?);"
+
+	sconn.executemany(query, [(version,) + row for row in rows])
+	sconn.commit()
+
+def checkpointed(sconn: SQLite3 | None = None):
+	"""The pending version an interrupted upload left checkpoints for (None if there isn't one)."""
+	return sconn.execute("SELECT MAX(version) FROM checkpoints;").fetchone()[0]
+
+def clear_checkpoints(sconn: SQLite3 | None = None):
+	"""Drops every checkpoint once their version is published."""
+	sconn.execute("DELETE FROM checkpoints;")
+
+def backup(copy: str = "", rp: str = ""):
+	"""Path of a file's copy under copy, with its parent directories made."""
+	dst: str = os.path.join(copy, rp)
+	os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+	return dst
+
+def prepare(dicts_: list = [], abs_path: str = "", copy: str = None):
+	"""Reads, hashes & classifies a batch's files (each in a single read, on the hashing pool).
+
+	Files of CHUNKED bytes or more are only hashed here; their
+	content stays on disk & is streamed up if the server lacks it.
+
+	Args:
+		dicts_ (list): Batch's relative paths.
+		abs_path (str): Path to the given directory.
+		copy (str): Optional directory each file is written into from the same read (i.e., the originals).
+
+	Returns:
+		loaded (list): Each file's (content, hash, track, size), in the batch's order.
+	"""
+	def load(path: str = ""):
+		"""Reads one file."""
+		fp: str = os.path.join(abs_path, path)
+		dst: str = backup(copy, path) if copy else None
+
+		if os.stat(fp).st_size < CHUNKED:
+			loaded: tuple = ingest(fp, keep=True, copy=dst)
+		else:
+			content, hash_id, track, size = ingest(fp, copy=dst)
+			loaded: tuple = (OnDisk(fp, size), hash_id, track, size)
+
+		if dst:
+			shutil.copystat(fp, dst) # like the copytree the originals used to come from
+
+		return loaded
+
+	return pool_map(load, list(dicts_))
 
 def collect_data(conn: MySQL | None = None, dicts_: list = [], abs_path: str = "", version: int = None, key: bool = None):
-	"""Collects details about the batch passed to it.
+	"""Collects details about the batch passed to it & uploads them.
 
 	Args:
 		conn (mysql): Connection object.
@@ -159,41 +1141,39 @@ def collect_data(conn: MySQL | None = None, dicts_: list = [], abs_path: str = "
 		key (var): Specifies files as new or altered.
 
 	Returns:
-		item_data (list): Tuples containing each files' content, hash, and relative path from the files in the given list.
+		None
 	"""
-	item_data: list = []
+	send(conn, dicts_, prepare(dicts_, abs_path), version, key)
 
-	hasher = xxhash.xxh64()
+def send(conn: MySQL | None = None, dicts_: list = [], loaded: list = [], version: int = None, key: bool = None):
+	"""Uploads a prepared batch.
 
-	if key == "altered_files":
-		for path in dicts_:
-			item: str = os.path.join(abs_path, path)
+	Args:
+		conn (mysql): Connection object.
+		dicts_ (list): Batch's relative paths.
+		loaded (list): Each file's (content, hash, track, size) from prepare().
+		version (int): Current version.
+		key (var): Specifies files as new or altered.
 
-			with open(item, 'rb') as f:
-				content: bytes = f.read()
+	Returns:
+		None
+	"""
+	item_data: list = []
+
+	# content already on the server (copies, vendored trees, reverts) only gains a reference
+	put_blobs(conn, [(hash_id, content) for content, hash_id, track, size in loaded])
 
-			hasher.reset()
-			hasher.update(content)
-			hash_id: bytes = hasher.digest()
+	if key == "altered_files":
+		drop_refs(conn, list(file_blobs(conn, dicts_).values()))
 
-			item_data.append((content, hash_id, version, path))
+		for path, (content, hash_id, track, size) in zip(dicts_, loaded):
+			item_data.append((hash_id, version, path))
 
 		upload_edited(conn, item_data)
 
 	if key == "new_files":
-		for path in dicts_:
-			item: str = os.path.join(abs_path, path)
-
-			with open(item, 'rb') as f:
-				content: bytes = f.read()
-
-			hasher.reset()
-			hasher.update(content)
-			hash_id: bytes = hasher.digest()
-
-			track: str = encoding(item)
-
-			item_data.append((content, hash_id, version, version, path, track))
+		for path, (content, hash_id, track, size) in zip(dicts_, loaded):
+			item_data.append((hash_id, version, version, path, track))
 
 		upload_created(conn, item_data)
 
@@ -238,52 +1218,81 @@ def rm_remdir(conn: MySQL | None = None, sconn: SQLite3 | None = None, gates: li
 		else:
 			logger.debug('removed remote-only directory[s] from server w.o exception')
 
-def rm_remfile(conn: MySQL | None = None, sconn: SQLite3 | None = None, cherubs: list = []):
-	"""Removes files from the server via DELETE.
+def rm_remfile(conn: MySQL | None = None, cherubs: list = [], to_version: int = None):
+	"""Archives deleted files on the server, moving their rows from files to deleted.
 
-	DML so executemany().
+	Set-based & server-side, a batch of paths at a time (one
+	INSERT ... SELECT & one DELETE each), so only the paths are
+	sent. The archived rows keep their hash & addressed flag, so
+	their blobs' references carry over unchanged; content stored
+	inline is copied across as it is.
 
 	Args:
 		conn (mysql): Connection object to the server.
-		sconn (sqlite3): Connection object to the index.
 		cherubs (list): Remote-only files' relative paths.
-	
+		to_version (int): Version the files were deleted in.
+
 	Returns:
-		Three-element tuple containing:
-			doversions (dict): Previous versions.
-			dogversions (dict): Original versions.
-			dotrack (dict): Tracking values.
+		None
 	"""
-	logger.debug('...deleting remote-only file[s] from server...')
-	ovquery: str = "SELECT original_version FROM files WHERE rp = %s;"
-	sovquery: str = "SELECT from_version, track FROM records WHERE rp = ?;"
-	query: str = "DELETE FROM files WHERE rp = %s;"
-	doversions: dict = {}
-	dogversions: dict = {}
-	dotrack: dict = {}
+	logger.debug('...archiving remote-only file[s] on the server...')
+	moved: int = 0
 
-	with conn.cursor(prepared=True) as cursor:
+	with conn.cursor() as cursor:
 		try:
-			for cherub in cherubs:
-				cursor.execute(ovquery, (cherub,)) # this is the sqlite index as well, no?
-				original_version: int = cursor.fetchone()[0]
+			for chunk in batched(cherubs, LOOKUP):
+				marks: str = ", ".join(["%s"] * len(chunk))
+
+				aquery: str = f"INSERT INTO deleted (rp, content, addressed, hash, original_version, from_version, to_version, track) SELECT rp, content, addressed, hash, original_version, from_version, %s, track FROM files WHERE rp IN ({marks});"
+				xquery: str = f"DELETE FROM files WHERE rp IN ({marks});"
+
+				cursor.execute(aquery, (to_version,) + chunk)
+				moved += cursor.rowcount
+
+				cursor.execute(xquery, chunk)
+
+		except (mysql.connector.Error, ConnectionError, Exception) as c:
+			logger.error(f"error encountered when trying to archive file[s] on the server: {c}", exc_info=True)
+			raise
 
-				dogversions[cherub] = original_version
+	if moved != len(cherubs):
+		logger.warning(f"{len(cherubs) - moved} deleted file[s] weren't on the server to archive")
 
-				index_data: tuple = sconn.execute(sovquery, (cherub,)).fetchone()
+	logger.debug(f"archived {moved} remote-only file[s] on the server w.o exception")
 
-				doversions[cherub] = index_data[0]
+def move_remfiles(conn: MySQL | None = None, moves: list = [], version: int = None):
+	"""Renames moved files' rows on the server instead of re-uploading them.
 
-				dotrack[cherub] = index_data[1]
+	Their deltas follow them; the moves table keeps the old paths for older versions.
 
-				cursor.execute(query, (cherub,))
+	DML so executemany().
+
+	Args:
+		conn (mysql): Connection object to the server.
+		moves (list): Tupled (previous, current) relative paths.
+		version (int): Current version.
+
+	Returns:
+		None
+	"""
+	logger.debug('...moving file[s] on the server...')
+	fquery: str = "UPDATE files SET rp = %s WHERE rp = %s;"
+	dquery: str = "UPDATE deltas SET rp = %s WHERE rp = %s;"
+	mquery: str = "INSERT INTO moves (rp, from_rp, version) VALUES (%s, %s, %s);"
+
+	values: list = [(current, previous) for previous, current in moves]
+
+	with conn.cursor(prepared=True) as cursor:
+		try:
+			cursor.executemany(fquery, values)
+			cursor.executemany(dquery, values)
+			cursor.executemany(mquery, [(current, previous, version) for previous, current in moves])
 
 		except (mysql.connector.Error, ConnectionError, Exception) as c:
-			logger.error(f"error encountered when trying to delete file[s] from server: {c}", exc_info=True)
+			logger.error(f"error encountered when trying to move file[s] on the server: {c}", exc_info=True)
 			raise
 		else:
-			logger.debug('removed remote-only file[s] from server w.o exception')
-			return doversions, dogversions, dotrack
+			logger.debug('moved file[s] on the server w.o exception')
 
 def upload_dirs(conn: MySQL | None = None, drps: list = [], version: int = None):
 	"""Uploads directories to the server via INSERT.
@@ -316,12 +1325,12 @@ def upload_created(conn: MySQL | None = None, serpent_data: list = []):
 
 	Args:
 		conn (mysql): Connection object to query the server.
-		serpent_data (list): 3-element tuples containing each new files' new content, new hash, and relative path.
+		serpent_data (list): Tuples containing each new files' hash (its blob's digest), versions, relative path, and track.
 
 	Returns:
 		None
 	"""
-	query: str = "INSERT INTO files (content, hash, original_version, from_version, rp, track) VALUES (%s, %s, %s, %s, %s, %s);"
+	query: str = "INSERT INTO files (content, addressed, hash, original_version, from_version, rp, track) VALUES ('', 1, %s, %s, %s, %s, %s);"
 
 	try:
 		with conn.cursor(prepared=True, buffered=False) as cursor:
@@ -339,12 +1348,12 @@ def upload_edited(conn: MySQL | None = None, soul_data: list = []):
 
 	Args:
 		conn (mysql): Connection object to query the server.
-		soul_data (list): 3-element tuples containing each altered files' new content, new hash, and relative path.
+		soul_data (list): Tuples containing each altered files' new hash (its blob's digest), version, and relative path.
 	
 	Returns:
 		None
 	"""
-	j: str = "UPDATE files SET content = %s, hash = %s, from_version = %s WHERE rp = %s;"
+	j: str = "UPDATE files SET content = '', addressed = 1, hash = %s, from_version = %s WHERE rp = %s;"
 
 	try:
 		with conn.cursor(prepared=True, buffered=False) as cursor:
@@ -0,0 +1,380 @@
+"""Single-pass traversal of a directory tree.
+
+Walks the tree once with os.scandir and hands out
+files (with their DirEntry's cached stat) and
+directories from the same pass.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from rosa.confs import SCAN_WORKERS
+from rosa.lib.ignore import IGNORE_FILE, read_ignore
+
+logger = logging.getLogger('rosa.log')
+
+AHEAD: int = 4096 # entries a scan thread may queue ahead of the consumer before it waits
+
+RACY: int = 2 * 10**9 # listings younger than this (ns) aren't trusted; coarse mtimes can hide a same-tick edit
+
+class Seen:
+	"""Stand-in for os.DirEntry when a directory's listing comes from the dirstate cache.
+
+	Attributes:
+		name (str): Entry's name.
+		path (str): Entry's full path.
+	"""
+	__slots__ = ("name", "path", "_dir", "_stat")
+
+	def __init__(self, dirx: str = "", name: str = "", is_dir: bool = False):
+		"""Builds the entry without touching the disk."""
+		self.name: str = name
+		self.path: str = os.path.join(dirx, name)
+		self._dir: bool = is_dir
+		self._stat = None
+
+	def is_dir(self):
+		"""Whether the cached listing recorded a directory."""
+		return self._dir
+
+	def stat(self):
+		"""Stats the entry once, like DirEntry.stat()."""
+		if self._stat is None:
+			self._stat = os.stat(self.path)
+
+		return self._stat
+
+def listing(dirx: str = "", rp: str = "", dstat = None, cached: dict = None, seen: dict = None):
+	"""Lists a directory, from the dirstate cache when its mtime hasn't moved.
+
+	Args:
+		dirx (str): Path to the directory.
+		rp (str): Its relative path ('' for the origin).
+		dstat (stat_result): The directory's stat, if already known.
+		cached (dict): Relative paths keyed to (st_mtime_ns, [(name, is_dir), ...]) from the index (anything with .get(), like index.Dirstate).
+		seen (dict): Collects this walk's dirstate; None marks a cache hit, (mtime, listing) a fresh scan. Written to from the scan threads.
+
+	Returns:
+		entries (list): DirEntry (scanned) or Seen (cached) objects.
+	"""
+	if cached is None:
+		with os.scandir(dirx) as it:
+			return list(it)
+
+	mtime: int = (dstat or os.stat(dirx)).st_mtime_ns
+	hit = cached.get(rp)
+
+	if hit and hit[0] == mtime:
+		seen[rp] = None
+		return [Seen(dirx, name, is_dir) for name, is_dir in hit[1]]
+
+	with os.scandir(dirx) as it:
+		entries: list = list(it)
+
+	if time.time_ns() - mtime < RACY:
+		mtime = -1 # re-list next time
+
+	seen[rp] = (mtime, [(entry.name, entry.is_dir()) for entry in entries])
+
+	return entries
+
+def walk(origin: str = "", matcher = None, pruned: list = None, cached: dict = None, seen: dict = None, top: str = ""):
+	"""Iterative scandir walk; every directory is listed exactly once.
+
+	Ignored directories are never descended into. A directory's own
+	ignore file extends the matcher for everything beneath it. With a
+	dirstate cache, directories whose st_mtime_ns is unchanged aren't
+	listed at all; only their files get stat'd.
+
+	Args:
+		origin (str): Path to the requested directory.
+		matcher (Matcher): Optional compiled ignore rules for the origin.
+		pruned (list): Optional list collecting the paths that were cut off.
+		cached (dict): Optional dirstate from the index (see listing()).
+		seen (dict): Collects the dirstate observed by this walk (required with cached).
+		top (str): Optional relative path of the subtree to start from (paths stay relative to origin).
+
+	Yields:
+		entry (os.DirEntry | Seen): Every kept file & directory.
+	"""
+	pfx: int = len(origin) + 1
+	start: str = os.path.join(origin, top) if top else origin
+	stack: list = [(start, matcher, None)]
+
+	while stack:
+		dirx, rules, dstat = stack.pop()
+
+		entries: list = listing(dirx, dirx[pfx:], dstat, cached, seen)
+
+		if rules is not None and dirx != origin:
+			if any(entry.name == IGNORE_FILE for entry in entries):
+				rules = rules.extend(dirx[pfx:], read_ignore(dirx))
+
+		for entry in entries:
+			is_dir: bool = entry.is_dir()
+
+			if rules is not None and rules.ignores(entry.path[pfx:], is_dir):
+				if pruned is not None:
+					pruned.append(entry.path)
+				continue
+
+			yield entry
+
+			if is_dir:
+				dstat = entry.stat() if cached is not None else None
+				stack.append((entry.path, rules, dstat))
+
+def ordered(origin: str = "", matcher = None, cached: dict = None, seen: dict = None, top: str = ""):
+	"""Walks like walk() but yields entries in relative-path order.
+
+	Each listing is sorted with directories keyed as 'name/', so the
+	files come out in the same order as the index's 'ORDER BY rp'
+	and the two can be merged without holding either in memory.
+	Only the listings along the current branch are kept.
+
+	Args:
+		origin (str): Path to the requested directory.
+		matcher (Matcher): Optional compiled ignore rules for the origin.
+		cached (dict): Optional dirstate from the index (see listing()).
+		seen (dict): Collects the dirstate observed by this walk (required with cached).
+		top (str): Optional relative path of the subtree to start from (paths stay relative to origin).
+
+	Yields:
+		entry (os.DirEntry | Seen): Every kept file & directory, parents before their contents.
+	"""
+	pfx: int = len(origin) + 1
+
+	def opened(dirx: str = "", rules = None, dstat = None):
+		"""Lists a directory, applies its ignore file and sorts the listing."""
+		entries: list = listing(dirx, dirx[pfx:], dstat, cached, seen)
+
+		if rules is not None and dirx != origin:
+			if any(entry.name == IGNORE_FILE for entry in entries):
+				rules = rules.extend(dirx[pfx:], read_ignore(dirx))
+
+		entries.sort(key=lambda entry: entry.name + "/" if entry.is_dir() else entry.name)
+
+		return rules, iter(entries)
+
+	stack: list = [opened(os.path.join(origin, top) if top else origin, matcher)]
+
+	while stack:
+		rules, it = stack[-1]
+		entry = next(it, None)
+
+		if entry is None:
+			stack.pop()
+			continue
+
+		is_dir: bool = entry.is_dir()
+
+		if rules is not None and rules.ignores(entry.path[pfx:], is_dir):
+			continue
+
+		yield entry
+
+		if is_dir:
+			dstat = entry.stat() if cached is not None else None
+			stack.append(opened(entry.path, rules, dstat))
+
+def scan(origin: str = "", matcher = None, cached: dict = None, seen: dict = None, top: str = ""):
+	"""Stats everything in a subtree, in relative-path order.
+
+	Args:
+		origin (str): Path to the requested directory.
+		matcher (Matcher): Optional compiled ignore rules for the origin.
+		cached (dict): Optional dirstate from the index.
+		seen (dict): Collects the dirstate observed by this walk.
+		top (str): Optional relative path of the subtree to scan.
+
+	Yields:
+		rp (str): A kept entry's relative path.
+		stats (stat_result): A file's stat; None for directories.
+	"""
+	pfx: int = len(origin) + 1
+
+	for entry in ordered(origin, matcher, cached, seen, top):
+		rp: str = entry.path[pfx:]
+
+		if entry.is_dir():
+			yield rp, None
+		else:
+			try:
+				yield rp, entry.stat()
+			except FileNotFoundError:
+				logger.debug(f"{rp} vanished mid-walk")
+
+def fanout(origin: str = "", matcher = None, cached: dict = None, seen: dict = None, top: str = "", workers: int = SCAN_WORKERS):
+	"""Scans the top-level subtrees on a thread pool, handing results out in relative-path order.
+
+	The first directory's listing happens here; every subdirectory
+	beneath it is scanned (listed & stat'd) by a worker. Only a
+	couple of subtrees per worker are ever started ahead of the
+	consumer, and each one streams through a queue holding at most
+	AHEAD entries, so memory stays bounded however big a subtree
+	is. On high-latency filesystems this keeps several stat()s in
+	flight instead of one.
+
+	Args:
+		origin (str): Path to the requested directory.
+		matcher (Matcher): Optional compiled ignore rules for the origin.
+		cached (dict): Optional dirstate from the index.
+		seen (dict): Collects the dirstate observed by this walk.
+		top (str): Optional relative path of the subtree to scan.
+		workers (int): Threads to scan with (1 scans in this thread).
+
+	Yields:
+		rp (str): A kept entry's relative path.
+		stats (stat_result): A file's stat; None for directories.
+	"""
+	if workers <= 1:
+		yield from scan(origin, matcher, cached, seen, top)
+		return
+
+	pfx: int = len(origin) + 1
+	start: str = os.path.join(origin, top) if top else origin
+
+	entries: list = listing(start, top, None, cached, seen)
+
+	if matcher is not None and top:
+		if any(entry.name == IGNORE_FILE for entry in entries):
+			matcher = matcher.extend(top, read_ignore(start))
+
+	entries.sort(key=lambda entry: entry.name + "/" if entry.is_dir() else entry.name)
+
+	stop = threading.Event() # set once the consumer is done (or gave up); parked scans bail out
+
+	def offer(out: queue.Queue = None, item = None):
+		"""Queues one item, waiting for room; False if the consumer is gone."""
+		while not stop.is_set():
+			try:
+				out.put(item, timeout=0.1)
+				return True
+			except queue.Full:
+				continue
+
+		return False
+
+	def subtree(rp: str = "", out: queue.Queue = None):
+		"""Scans one subtree into its bounded queue, ending it with None."""
+		try:
+			for found in scan(origin, matcher, cached, seen, rp):
+				if not offer(out, found):
+					return
+		finally:
+			offer(out, None)
+
+	kept: list = []
+
+	for entry in entries:
+		is_dir: bool = entry.is_dir()
+
+		if matcher is None or not matcher.ignores(entry.path[pfx:], is_dir):
+			kept.append((entry, is_dir))
+
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rosa-scan") as pool:
+		queued = iter(kept)
+		ahead: deque = deque()
+
+		try:
+			while True:
+				while len(ahead) < workers * 2:
+					entry, is_dir = next(queued, (None, None))
+
+					if entry is None:
+						break
+
+					if is_dir:
+						out: queue.Queue = queue.Queue(maxsize=AHEAD)
+						ahead.append((entry, out, pool.submit(subtree, entry.path[pfx:], out)))
+					else:
+						ahead.append((entry, None, None))
+
+				if not ahead:
+					break
+
+				entry, out, future = ahead.popleft()
+				rp: str = entry.path[pfx:]
+
+				if future is None:
+					try:
+						yield rp, entry.stat()
+					except FileNotFoundError:
+						logger.debug(f"{rp} vanished mid-walk")
+					continue
+
+				yield rp, None
+
+				while (found := out.get()) is not None:
+					yield found
+
+				future.result() # re-raises a failed scan
+
+		finally:
+			stop.set()
+
+def survey(origin: str = "", matcher = None, cached: dict = None, seen: dict = None, top: str = ""):
+	"""Collects the files' stats and the directories in one (parallel) walk.
+
+	Args:
+		origin (str): Path to the requested directory.
+		matcher (Matcher): Optional compiled ignore rules for the origin.
+		cached (dict): Optional dirstate from the index.
+		seen (dict): Collects the dirstate observed by this walk.
+		top (str): Optional relative path of the subtree to survey.
+
+	Returns:
+		files (list): Tupled relative paths and stat results for every file found.
+		dirs (list): Relative paths of every directory found.
+	"""
+	files: list = []
+	dirs: list = []
+
+	for rp, stats in fanout(origin, matcher, cached, seen, top):
+		if stats is None:
+			dirs.append(rp)
+		else:
+			files.append((rp, stats))
+
+	return files, dirs
+
+def share(origin: str = "", half: str = "files", matcher = None, cached: dict = None, seen: dict = None, parked: dict = None):
+	"""Hands out one half of a survey, parking the other for its next caller.
+
+	query_index and query_dindex each need half of the same walk;
+	whoever asks second takes the parked half instead of walking again.
+	The caller owns parked (one per scan), so nothing outlives it.
+
+	Args:
+		origin (str): Path to the requested directory.
+		half (str): 'files' or 'dirs'.
+		matcher (Matcher): Optional compiled ignore rules for the origin.
+		cached (dict): Optional dirstate from the index.
+		seen (dict): Collects the dirstate observed by this walk.
+		parked (dict): Optional halves keyed by name; None walks every time.
+
+	Returns:
+		The requested half of survey(origin, matcher, cached, seen).
+	"""
+	if parked is not None and half in parked:
+		logger.debug(f"reusing the parked {half} from this scan's walk")
+		return parked.pop(half)
+
+	files, dirs = survey(origin, matcher, cached, seen)
+
+	if half == "files":
+		park(parked, "dirs", dirs)
+		return files
+
+	park(parked, "files", files)
+	return dirs
+
+def park(parked: dict = None, half: str = "dirs", found: list = []):
+	"""Parks a half for share(), i.e., one worked out without a walk (from the journal)."""
+	if parked is not None:
+		parked[half] = found
@@ -33,6 +33,14 @@ def get_curr(args):
 	from rosa.fxs import get_curr
 	get_curr.main(args)
 
+def watch(args):
+	from rosa.fxs import watch
+	watch.main(args)
+
+def rehash(args):
+	from rosa.fxs import rehash
+	rehash.main(args)
+
 rosa = {
 	'get': { # rosa get
 		'func': get, 
@@ -75,6 +83,14 @@ rosa = {
 	'gen': { # rosa gen -r [options]
 		'func': gen,
 		'name': "gen"
+	},
+	'watch': { # rosa watch
+		'func': watch,
+		'name': "watch"
+	},
+	'rehash': { # rosa rehash
+		'func': rehash,
+		'name': "rehash"
 	}
 }
 
@@ -0,0 +1,23 @@
+import os
+import sqlite3
+
+from rosa.confs import SINIT
+from rosa.lib.index import _scoped, qfdiffr
+from rosa.lib.journal import pending
+
+
+def test_nested_mkdir_is_new_once(tmp_path):
+	os.makedirs(tmp_path / "a" / "b")
+	(tmp_path / "a" / "b" / "f").write_bytes(b"x")
+
+	sconn = sqlite3.connect(":memory:")
+	sconn.executescript(SINIT)
+	sconn.executemany("INSERT INTO journal (rp, event, is_dir) VALUES (?, 'C', 1);", [("a",), ("a/b",)])
+
+	files, dirs = pending(sconn, 2)
+	real_stats, index_records, real_dirs, index_dirs = _scoped(sconn, str(tmp_path), files, dirs)
+	new, deleted, diffs, unchanged = qfdiffr(index_records, real_stats)
+
+	assert new == ["a/b/f"]
+	assert sorted(real_dirs) == ["a", "a/b"]
+	assert not deleted and not diffs
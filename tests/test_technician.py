@@ -0,0 +1,59 @@
+import io
+import os
+from collections import Counter
+
+from rosa.lib import technician
+from rosa.lib.technician import PACK_BYTES, upload_patches, store_blobs
+
+
+class Cursor:
+	def __init__(self, calls: list = None, prepared: bool = False):
+		self.calls = calls
+		self.prepared = prepared
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		return False
+
+	def execute(self, query: str = "", params: tuple = ()):
+		self.calls.append((self.prepared, "execute", params))
+
+	def executemany(self, query: str = "", rows: list = []):
+		self.calls.append((self.prepared, "executemany", rows))
+
+
+class Conn:
+	def __init__(self):
+		self.calls: list = []
+
+	def cursor(self, prepared: bool = False, **kwargs):
+		return Cursor(self.calls, prepared)
+
+
+def test_oversize_patch_is_streamed():
+	conn = Conn()
+	big: bytes = os.urandom(PACK_BYTES + 1) # random; squeeze leaves it raw
+	small: bytes = os.urandom(64)
+
+	upload_patches(conn, [("a", big), ("b", small)], 3, {"a": (1, 2, "N"), "b": (1, 2, "N")})
+
+	assert len(conn.calls) == 2
+	prepared, how, params = conn.calls[0]
+	assert prepared and how == "execute"
+	assert isinstance(params[1], io.BytesIO) and params[1].getvalue() == big
+	assert conn.calls[1][1] == "executemany" and conn.calls[1][2][0][1] == small
+
+
+def test_oversize_blob_is_streamed(monkeypatch):
+	monkeypatch.setattr(technician, "CHUNKED", 4 * PACK_BYTES) # keep it inline
+	conn = Conn()
+	big: bytes = os.urandom(PACK_BYTES + 1)
+
+	store_blobs(conn, {b"d": big}, Counter({b"d": 1}))
+
+	prepared, how, params = conn.calls[0]
+	assert prepared and how == "execute"
+	assert isinstance(params[-1], io.BytesIO) and params[-1].getvalue() == big
+	assert params[:-1] == (b"d", 1, len(big), False, "raw")
@@ -0,0 +1,16 @@
+import os
+
+from rosa.lib.walker import share
+
+
+def test_parked_half_belongs_to_the_scan(tmp_path):
+	os.mkdir(tmp_path / "a")
+	(tmp_path / "f").write_bytes(b"x")
+	origin: str = str(tmp_path)
+
+	parked: dict = {}
+	assert share(origin, "files", parked=parked) and "dirs" in parked
+	assert share(origin, "dirs", parked=parked) == ["a"] and not parked
+
+	os.mkdir(tmp_path / "b")
+	assert sorted(share(origin, "dirs")) == ["a", "b"] # no scan of its own; walks afresh